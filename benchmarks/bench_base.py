@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks of the per-object overhead of loading and dumping configs.
+
+Run with `PYTHONPATH=. python benchmarks/bench_base.py [number]` from the root
+of the repository, the data of the configs is shared with the tests.
+"""
+from __future__ import absolute_import, division, print_function
+
+import sys
+import timeit
+import uuid
+
+from tests.utils import get_job_dict
+
+from polyaxon_schemas.clusters import ClusterNodeConfig
+from polyaxon_schemas.environments import K8SResourcesConfig, PodResourcesConfig
+from polyaxon_schemas.experiment import (
+    ExperimentConfig,
+    ExperimentJobConfig,
+    ExperimentMetricConfig,
+    ExperimentStatusConfig,
+    PodStateConfig
+)
+from polyaxon_schemas.layers.convolutional import Conv2DConfig
+from polyaxon_schemas.layers.core import DenseConfig
+from polyaxon_schemas.layers.recurrent import LSTMConfig
+from polyaxon_schemas.utils import local_now
+
+
+def get_resources_dict():
+    return {
+        'cpu': {'requests': 1, 'limits': 2},
+        'memory': {'requests': 256, 'limits': 1024},
+        'gpu': {'requests': 1, 'limits': 1},
+    }
+
+
+def get_experiment_dict(num_jobs=2):
+    return {
+        'uuid': uuid.uuid4().hex,
+        'project': uuid.uuid4().hex,
+        'project_name': 'user.proj',
+        'experiment_group': uuid.uuid4().hex,
+        'experiment_group_name': 'user.proj.1',
+        'unique_name': 'user.proj.1',
+        'user': 'user',
+        'sequence': 1,
+        'last_status': 'Running',
+        'description': 'description',
+        'content': 'content',
+        'config': {'k': 'v'},
+        'declarations': {'lr': 0.1, 'loss': 'MeanSquaredError'},
+        'last_metric': {'loss': 0.1, 'accuracy': 0.9},
+        'resources': get_resources_dict(),
+        'num_jobs': num_jobs,
+        'jobs': [get_job_dict() for _ in range(num_jobs)],
+        'created_at': local_now().isoformat(),
+        'updated_at': local_now().isoformat(),
+        'started_at': local_now().isoformat(),
+    }
+
+
+def get_status_dict():
+    return {
+        'uuid': uuid.uuid4().hex,
+        'experiment': uuid.uuid4().hex,
+        'created_at': local_now().isoformat(),
+        'status': 'Running',
+        'message': None,
+    }
+
+
+def get_metric_dict():
+    return {
+        'uuid': uuid.uuid4().hex,
+        'experiment': uuid.uuid4().hex,
+        'created_at': local_now().isoformat(),
+        'values': {'loss': 0.1, 'accuracy': 0.9},
+    }
+
+
+def get_cluster_node_dict():
+    return {
+        'uuid': uuid.uuid4().hex,
+        'sequence': 1,
+        'name': 'node',
+        'hostname': 'node.local',
+        'role': 'Worker',
+        'docker_version': '17.09.0-ce',
+        'kubelet_version': 'v1.8.3',
+        'os_image': 'Ubuntu',
+        'kernel_version': '4.9',
+        'schedulable_taints': False,
+        'schedulable_state': True,
+        'memory': 8 * 1024 * 1024 * 1024,
+        'cpu': 4,
+        'n_gpus': 0,
+        'status': 'Ready',
+        'gpus': [],
+    }
+
+
+def get_pod_state_dict():
+    return {
+        'event_type': 'ADDED',
+        'labels': {
+            'project_name': 'user.proj',
+            'project_uuid': uuid.uuid4().hex,
+            'experiment_name': 'user.proj.1',
+            'experiment_uuid': uuid.uuid4().hex,
+            'task_type': 'master',
+            'task_idx': '0',
+            'role': 'polyaxon-workers',
+            'type': 'polyaxon-experiment',
+        },
+        'phase': 'Running',
+        'deletion_timestamp': None,
+        'pod_conditions': {'Ready': {'status': True}},
+        'container_statuses': {'container': {'ready': True}},
+    }
+
+
+CONFIGS = [
+    (K8SResourcesConfig, {'requests': 1, 'limits': 2}),
+    (PodResourcesConfig, get_resources_dict()),
+    (ExperimentStatusConfig, get_status_dict()),
+    (ExperimentMetricConfig, get_metric_dict()),
+    (ExperimentJobConfig, get_job_dict()),
+    (ExperimentConfig, get_experiment_dict()),
+    (DenseConfig, {'units': 10, 'activation': 'relu'}),
+    (Conv2DConfig, {'filters': 10, 'kernel_size': [3, 3], 'strides': [1, 1]}),
+    (LSTMConfig, {'units': 10, 'dropout': 0.1}),
+]
+
+
+def get_time_per_object(func, number):
+    """Returns the best time of a call over 3 repeats, in microseconds."""
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def bench_schema_cache(number=1000):
+    """Compares a fresh schema per object, as before the cache, to the cached schemas."""
+    print('{:<24} {:>12} {:>12} {:>12} {:>12}'.format(
+        'config', 'load fresh', 'load cached', 'dump fresh', 'dump cached'))
+    for config_cls, config_dict in CONFIGS:
+        config = config_cls.from_dict(config_dict)
+        schema_cls = config_cls.SCHEMA
+        results = [
+            get_time_per_object(
+                lambda: schema_cls(strict=True).load(config_dict).data, number),
+            get_time_per_object(lambda: config_cls.from_dict(config_dict), number),
+            get_time_per_object(lambda: schema_cls(strict=True).dump(config).data, number),
+            get_time_per_object(lambda: config.to_dict(), number),
+        ]
+        print('{:<24} {:>10.1f}us {:>10.1f}us {:>10.1f}us {:>10.1f}us'.format(
+            config_cls.__name__, *results))
+
+
+def bench_bulk(size=5000):
+    """Compares loading and dumping a list of configs one by one to the bulk methods."""
+    print('{:<24} {:>12} {:>12} {:>12} {:>12}'.format(
+        'config', 'from_dict', 'from_dicts', 'to_dict', 'to_dicts'))
+    for config_cls, get_dict in [(ExperimentConfig, get_experiment_dict),
+                                 (ExperimentJobConfig, get_job_dict),
+                                 (ClusterNodeConfig, get_cluster_node_dict)]:
+        config_dicts = [get_dict() for _ in range(size)]
+        configs = list(config_cls.from_dicts(config_dicts))
+        results = [
+            get_time_per_object(
+                lambda: [config_cls.from_dict(d) for d in config_dicts], 1) / size,
+            get_time_per_object(lambda: list(config_cls.from_dicts(config_dicts)), 1) / size,
+            get_time_per_object(lambda: [c.to_dict() for c in configs], 1) / size,
+            get_time_per_object(lambda: list(config_cls.to_dicts(configs)), 1) / size,
+        ]
+        print('{:<24} {:>10.1f}us {:>10.1f}us {:>10.1f}us {:>10.1f}us'.format(
+            config_cls.__name__, *results))
+
+
+def bench_light_dict(number=1000):
+    """Compares dumping all the fields and removing the excluded ones to dumping a projection."""
+    def get_filtered_dict(config):
+        obj_dict = config.to_dict()
+        include_attrs = config.DEFAULT_INCLUDE_ATTRIBUTES
+        exclude_attrs = config.DEFAULT_EXCLUDE_ATTRIBUTES
+        if include_attrs:
+            exclude_attrs = set(obj_dict) - set(include_attrs)
+        for attr in exclude_attrs:
+            obj_dict.pop(attr, None)
+        return obj_dict
+
+    print('{:<24} {:>12} {:>12}'.format('config', 'filtered', 'projection'))
+    for num_jobs in [0, 2, 10]:
+        config = ExperimentConfig.from_dict(get_experiment_dict(num_jobs=num_jobs))
+        results = [
+            get_time_per_object(lambda: get_filtered_dict(config), number),
+            get_time_per_object(lambda: config.to_light_dict(), number),
+        ]
+        print('{:<24} {:>10.1f}us {:>10.1f}us'.format(
+            'Experiment {} jobs'.format(num_jobs), *results))
+
+
+def bench_compiled_schema(number=1000):
+    """Compares the marshmallow path to the compiled schemas."""
+    print('{:<24} {:>12} {:>12} {:>12} {:>12}'.format(
+        'config', 'load schema', 'load compiled', 'dump schema', 'dump compiled'))
+    for config_cls, config_dict in [(ExperimentStatusConfig, get_status_dict()),
+                                    (ExperimentMetricConfig, get_metric_dict()),
+                                    (PodStateConfig, get_pod_state_dict()),
+                                    (ClusterNodeConfig, get_cluster_node_dict()),
+                                    (ExperimentJobConfig, get_job_dict()),
+                                    (ExperimentConfig, get_experiment_dict())]:
+        config = config_cls.from_dict(config_dict)
+        compiled_schema = config_cls.get_compiled_schema()
+        results = [
+            get_time_per_object(lambda: config_cls.schema_load(config_dict), number),
+            get_time_per_object(lambda: compiled_schema.load(config_dict), number),
+            get_time_per_object(lambda: config_cls.schema_dump(config), number),
+            get_time_per_object(lambda: compiled_schema.dump(config), number),
+        ]
+        print('{:<24} {:>10.1f}us {:>10.1f}us {:>10.1f}us {:>10.1f}us'.format(
+            config_cls.__name__, *results))
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    bench_schema_cache(number=number)
+    print()
+    bench_bulk(size=5 * number)
+    print()
+    bench_light_dict(number=number)
+    print()
+    bench_compiled_schema(number=number)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks of the memory footprint of the configs with and without `__slots__`.
+
+Run with `PYTHONPATH=. python benchmarks/bench_memory.py [num_experiments]`
+from the root of the repository.
+"""
+from __future__ import absolute_import, division, print_function
+
+import sys
+
+from bench_base import (
+    get_experiment_dict,
+    get_job_dict,
+    get_metric_dict,
+    get_resources_dict,
+    get_status_dict
+)
+
+from polyaxon_schemas.base import BaseConfig
+from polyaxon_schemas.environments import K8SResourcesConfig, PodResourcesConfig
+from polyaxon_schemas.experiment import (
+    ExperimentConfig,
+    ExperimentJobConfig,
+    ExperimentMetricConfig,
+    ExperimentStatusConfig
+)
+
+CONFIGS = [
+    (K8SResourcesConfig, {'requests': 1, 'limits': 2}),
+    (PodResourcesConfig, get_resources_dict()),
+    (ExperimentStatusConfig, get_status_dict()),
+    (ExperimentMetricConfig, get_metric_dict()),
+    (ExperimentJobConfig, get_job_dict()),
+    (ExperimentConfig, get_experiment_dict()),
+]
+
+DICT_CONFIGS = {}
+
+
+def get_dict_config_class(config_cls):
+    """Returns a copy of the config class without its slots, i.e. with a `__dict__`."""
+    if config_cls not in DICT_CONFIGS:
+        attrs = {key: value for key, value in config_cls.__dict__.items()
+                 if key not in config_cls.__slots__ and key != '__slots__'}
+        DICT_CONFIGS[config_cls] = type(config_cls.__name__, (BaseConfig,), attrs)
+    return DICT_CONFIGS[config_cls]
+
+
+def to_dict_config(value):
+    """Returns a copy of the config, and its nested configs, without slots."""
+    if isinstance(value, list):
+        return [to_dict_config(v) for v in value]
+    if not isinstance(value, BaseConfig):
+        return value
+    state = {key: to_dict_config(v) for key, v in value.__getstate__().items()}
+    return get_dict_config_class(value.__class__)(**state)
+
+
+def get_config_size(value):
+    """Returns the size in bytes of the config objects, and their `__dict__`,
+    without the values they share, e.g. the strings or dates.
+    """
+    if isinstance(value, list):
+        return sum(get_config_size(v) for v in value)
+    if not isinstance(value, BaseConfig):
+        return 0
+    size = sys.getsizeof(value)
+    if hasattr(value, '__dict__'):
+        size += sys.getsizeof(value.__dict__)
+    return size + sum(get_config_size(v) for v in value.__getstate__().values())
+
+
+def bench_instance_size():
+    """Compares the footprint of an instance, with its nested configs, with and without slots."""
+    print('{:<24} {:>12} {:>12}'.format('config', 'dict', 'slots'))
+    for config_cls, config_dict in CONFIGS:
+        config = config_cls.from_dict(config_dict)
+        print('{:<24} {:>11}B {:>11}B'.format(
+            config_cls.__name__, get_config_size(to_dict_config(config)), get_config_size(config)))
+
+
+def bench_listing(num_experiments=1000, num_jobs=2):
+    """Compares the footprint of a listing of experiments with and without slots."""
+    config_dicts = [get_experiment_dict(num_jobs=num_jobs) for _ in range(num_experiments)]
+    configs = list(ExperimentConfig.from_dicts(config_dicts))
+    dict_size = get_config_size(to_dict_config(configs))
+    slots_size = get_config_size(configs)
+    print('{} experiments with {} jobs: {:.1f}KB with dict, {:.1f}KB with slots ({:.0%})'.format(
+        num_experiments, num_jobs, dict_size / 1024, slots_size / 1024, slots_size / dict_size))
+
+
+if __name__ == '__main__':
+    num_experiments = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    bench_instance_size()
+    print()
+    bench_listing(num_experiments=num_experiments)
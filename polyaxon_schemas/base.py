@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function
 
+import itertools
 import six
+import threading
 
 from collections import Mapping, OrderedDict
 
@@ -9,6 +11,7 @@ from marshmallow import Schema, ValidationError, post_dump, post_load
 from marshmallow.utils import utc
 
 from polyaxon_schemas.exceptions import PolyaxonSchemaError
+from polyaxon_schemas.schema_compiler import CompiledSchema
 from polyaxon_schemas.utils import (
     TIME_ZONE,
     humanize_timesince,
@@ -18,8 +21,93 @@ from polyaxon_schemas.utils import (
 )
 
 
+def iter_chunks(values, size):
+    """Returns an iterator over lists of at most `size` items of an iterable."""
+    iterator = iter(values)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def get_schema_slots(schema_cls, *attrs):
+    """Returns the `__slots__` of a config, i.e. the attributes of the schema's declared fields,
+    in the order of the schema, followed by the additional `attrs`.
+    """
+    slots = [field.attribute or name for name, field in six.iteritems(schema_cls._declared_fields)]
+    return tuple(slots + [attr for attr in attrs if attr not in slots])
+
+
+class SchemaCache(object):
+    """A thread-safe cache of ready schema instances, by schema class and options,
+    i.e. `many` and the `only` and `exclude` fields of a projection.
+
+    Marshmallow schemas keep the errors of the current load or dump, so an instance
+    is never shared: each thread has its own pools, and an instance in use, e.g. by a nested
+    load of the same class, is taken out of its pool until it is released.
+    An instance that raised is not released, since its state is unknown.
+
+    Schemas with implicit fields, i.e. `Meta.fields` or `Meta.additional` without declared
+    fields, are not cached, marshmallow infers their types from the first dumped object.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._cacheable = {}
+
+    def is_cacheable(self, schema_cls):
+        try:
+            return self._cacheable[schema_cls]
+        except KeyError:
+            opts = schema_cls.opts
+            implicit_fields = (
+                set(opts.fields) | set(opts.additional)) - set(schema_cls._declared_fields)
+            return self._cacheable.setdefault(schema_cls, not implicit_fields)
+
+    def _get_pool(self, key):
+        try:
+            pools = self._local.pools
+        except AttributeError:
+            pools = self._local.pools = {}
+        try:
+            return pools[key]
+        except KeyError:
+            return pools.setdefault(key, [])
+
+    def acquire(self, schema_cls, many=False, only=None, exclude=()):
+        if not self.is_cacheable(schema_cls):
+            return schema_cls(strict=True, many=many, only=only, exclude=exclude)
+
+        key = (schema_cls, many, only, exclude)
+        pool = self._get_pool(key)
+        if pool:
+            return pool.pop()
+        schema = schema_cls(strict=True, many=many, only=only, exclude=exclude)
+        schema._schema_cache_key = key
+        return schema
+
+    def release(self, schema):
+        key = getattr(schema, '_schema_cache_key', None)
+        if key is not None:
+            self._get_pool(key).append(schema)
+
+    def clear(self):
+        self._local.pools = {}
+
+
 class BaseConfig(object):
-    """Base for config classes."""
+    """Base for config classes.
+
+    The configs store their attributes in a per-instance `__dict__`,
+    unless they declare their `__slots__`, e.g. with `get_schema_slots`,
+    which saves the memory of the dict when many instances are kept.
+    """
+
+    __slots__ = ()
+
+    # The schema instances of all the config classes
+    SCHEMA_CACHE = SchemaCache()
 
     SCHEMA = None
     IDENTIFIER = None
@@ -30,9 +118,16 @@ class BaseConfig(object):
     MEM_SIZE_ATTRIBUTES = []
     PERCENT_ATTRIBUTES = []
     ROUNDING = 2
+    BULK_CHUNK_SIZE = 1000  # The number of objects loaded or dumped at once by the bulk methods
+    COMPILED_SCHEMA = False  # To load and dump with the generated functions, see `CompiledSchema`
 
     def to_light_dict(self, humanize_values=False, include_attrs=None, exclude_attrs=None):
-        obj_dict = self.to_dict(humanize_values=humanize_values)
+        """Returns the dict of a projection of the object.
+
+        Only the attributes of the projection are dumped, and humanized, with the
+        compiled dump of the projection if `COMPILED_SCHEMA` is set, or with a cached
+        schema of the projection, see `get_projection`.
+        """
         if all([include_attrs, exclude_attrs]):
             raise PolyaxonSchemaError(
                 'Only one value `include_attrs` or `exclude_attrs` is allowed.')
@@ -40,13 +135,71 @@ class BaseConfig(object):
             include_attrs = self.DEFAULT_INCLUDE_ATTRIBUTES
             exclude_attrs = self.DEFAULT_EXCLUDE_ATTRIBUTES
 
-        if include_attrs:
-            exclude_attrs = set(six.iterkeys(obj_dict)) - set(include_attrs)
-        for attr in exclude_attrs:
-            obj_dict.pop(attr, None)
+        if not self.SCHEMA_CACHE.is_cacheable(self.SCHEMA):
+            # The fields of the schema are only known after dumping the object
+            obj_dict = self.to_dict(humanize_values=humanize_values)
+            if include_attrs:
+                exclude_attrs = set(six.iterkeys(obj_dict)) - set(include_attrs)
+            for attr in exclude_attrs:
+                obj_dict.pop(attr, None)
+            return obj_dict
+
+        only, exclude = self.get_projection(include_attrs, exclude_attrs)
+        compiled_schema = self.get_compiled_schema()
+        if only == ():
+            # None of the fields is included, but marshmallow dumps all of them for an empty `only`
+            obj_dict = {}
+        elif compiled_schema:
+            obj_dict = compiled_schema.dump_projection(self, only=only, exclude=exclude)
+        else:
+            obj_dict = self.schema_dump_projection(self, only=only, exclude=exclude)
 
+        if humanize_values:
+            if include_attrs:
+                attrs = set(include_attrs)
+            else:
+                attrs = set(self.DATETIME_ATTRIBUTES + self.PERCENT_ATTRIBUTES +
+                            self.MEM_SIZE_ATTRIBUTES) - set(exclude_attrs or [])
+            for k, v in six.iteritems(self.humanize_attrs(self, attrs=attrs)):
+                obj_dict[k] = v
         return obj_dict
 
+    @classmethod
+    def get_projection(cls, include_attrs=None, exclude_attrs=None):
+        """Returns the `only` and `exclude` schema options of a projection.
+
+        The fields are kept in the order of the schema, and the attributes
+        that are not fields of the schema are ignored.
+        """
+        field_names = cls.SCHEMA._declared_fields
+        if include_attrs:
+            include_attrs = set(include_attrs)
+            return tuple(name for name in field_names if name in include_attrs), ()
+        exclude_attrs = set(exclude_attrs or [])
+        return None, tuple(name for name in field_names if name in exclude_attrs)
+
+    @classmethod
+    def get_slots(cls):
+        """Returns the slots of the class and its bases."""
+        slots = []
+        for base in reversed(cls.__mro__):
+            base_slots = base.__dict__.get('__slots__', ())
+            if isinstance(base_slots, six.string_types):
+                base_slots = (base_slots,)
+            slots += [slot for slot in base_slots if slot not in ('__dict__', '__weakref__')]
+        return tuple(slots)
+
+    def __getstate__(self):
+        state = dict(getattr(self, '__dict__', {}))
+        for attr in self.get_slots():
+            if hasattr(self, attr):
+                state[attr] = getattr(self, attr)
+        return state
+
+    def __setstate__(self, state):
+        for attr, value in six.iteritems(state):
+            setattr(self, attr, value)
+
     def to_dict(self, humanize_values=False):
         return self.obj_to_dict(self, humanize_values=humanize_values)
 
@@ -54,30 +207,98 @@ class BaseConfig(object):
         return self.obj_to_schema(self)
 
     @classmethod
-    def humanize_attrs(cls, obj):
+    def humanize_attrs(cls, obj, attrs=None):
+        """Returns the humanized values of the object, only of `attrs` if given."""
         humanized_attrs = {}
         for attr in cls.DATETIME_ATTRIBUTES:
-            humanized_attrs[attr] = humanize_timesince(getattr(obj, attr))
+            if attrs is None or attr in attrs:
+                humanized_attrs[attr] = humanize_timesince(getattr(obj, attr))
         for attr in cls.PERCENT_ATTRIBUTES:
-            humanized_attrs[attr] = to_percentage(getattr(obj, attr), cls.ROUNDING)
+            if attrs is None or attr in attrs:
+                humanized_attrs[attr] = to_percentage(getattr(obj, attr), cls.ROUNDING)
         for attr in cls.MEM_SIZE_ATTRIBUTES:
-            humanized_attrs[attr] = to_unit_memory(getattr(obj, attr))
+            if attrs is None or attr in attrs:
+                humanized_attrs[attr] = to_unit_memory(getattr(obj, attr))
         return humanized_attrs
 
+    @classmethod
+    def schema_dump(cls, obj, many=False):
+        """Dumps the object, or the list of objects if `many`, with a cached schema."""
+        schema = cls.SCHEMA_CACHE.acquire(cls.SCHEMA, many=many)
+        data = schema.dump(obj).data
+        cls.SCHEMA_CACHE.release(schema)
+        return data
+
+    @classmethod
+    def schema_dump_projection(cls, obj, only=None, exclude=()):
+        """Dumps a projection of the object with a cached schema, see `get_projection`."""
+        schema = cls.SCHEMA_CACHE.acquire(cls.SCHEMA, only=only, exclude=exclude)
+        data = schema.dump(obj).data
+        cls.SCHEMA_CACHE.release(schema)
+        return data
+
+    @classmethod
+    def schema_load(cls, value, many=False):
+        """Loads the value, or the list of values if `many`, with a cached schema."""
+        schema = cls.SCHEMA_CACHE.acquire(cls.SCHEMA, many=many)
+        data = schema.load(value).data
+        cls.SCHEMA_CACHE.release(schema)
+        return data
+
+    @classmethod
+    def get_compiled_schema(cls):
+        """Returns the `CompiledSchema` of the class if `COMPILED_SCHEMA` is set, else `None`.
+
+        The schema is compiled once per class, on first use.
+        """
+        if not cls.COMPILED_SCHEMA:
+            return None
+        compiled_schema = cls.__dict__.get('_compiled_schema')
+        if compiled_schema is None or compiled_schema.schema_cls is not cls.SCHEMA:
+            compiled_schema = CompiledSchema(
+                cls.SCHEMA, cls.schema_dump, cls.schema_load, cls.schema_dump_projection)
+            cls._compiled_schema = compiled_schema
+        return compiled_schema
+
     @classmethod
     def obj_to_dict(cls, obj, humanize_values=False):
         humanized_attrs = cls.humanize_attrs(obj) if humanize_values else {}
-        data_dict = cls.SCHEMA(strict=True).dump(obj).data  # pylint: disable=not-callable
+        compiled_schema = cls.get_compiled_schema()
+        if compiled_schema:
+            data_dict = compiled_schema.dump(obj)
+        else:
+            data_dict = cls.schema_dump(obj)
 
         for k, v in six.iteritems(humanized_attrs):
             data_dict[k] = v
         return data_dict
 
+    @classmethod
+    def to_dicts(cls, objs, humanize_values=False):
+        """Returns an iterator over the dicts of many objects, see `obj_to_dict`.
+
+        The objects are dumped by chunks with a shared `many=True` schema,
+        or one by one with the compiled schema if any.
+        """
+        compiled_schema = cls.get_compiled_schema()
+        for chunk in iter_chunks(objs, cls.BULK_CHUNK_SIZE):
+            if compiled_schema:
+                data_dicts = [compiled_schema.dump(obj) for obj in chunk]
+            else:
+                data_dicts = cls.schema_dump(chunk, many=True)
+
+            for obj, data_dict in zip(chunk, data_dicts):
+                if humanize_values:
+                    for k, v in six.iteritems(cls.humanize_attrs(obj)):
+                        data_dict[k] = v
+                yield data_dict
+
     @classmethod
     def remove_reduced_attrs(cls, data):
         obj_dict = OrderedDict((key, value) for (key, value) in six.iteritems(data))
         for attr in cls.REDUCED_ATTRIBUTES:
-            if obj_dict[attr] is None:
+            # The attribute is not dumped if it is not in the projection
+            if attr in obj_dict and obj_dict[attr] is None:
                 del obj_dict[attr]
 
         return obj_dict
@@ -88,7 +309,28 @@ class BaseConfig(object):
 
     @classmethod
     def from_dict(cls, value):
-        return cls.SCHEMA(strict=True).load(value).data  # pylint: disable=not-callable
+        compiled_schema = cls.get_compiled_schema()
+        if compiled_schema:
+            return compiled_schema.load(value)
+        return cls.schema_load(value)
+
+    @classmethod
+    def from_dicts(cls, values):
+        """Returns an iterator over the configs of many values, see `from_dict`.
+
+        The values are loaded by chunks with a shared `many=True` schema,
+        so that large inputs, e.g. a generator over a paginated API, are streamed.
+        With the compiled schema if any, the values are loaded one by one.
+        """
+        compiled_schema = cls.get_compiled_schema()
+        for chunk in iter_chunks(values, cls.BULK_CHUNK_SIZE):
+            if compiled_schema:
+                configs = [compiled_schema.load(value) for value in chunk]
+            else:
+                configs = cls.schema_load(chunk, many=True)
+
+            for config in configs:
+                yield config
 
     @staticmethod
     def localize_date(dt):
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function
+
+import numbers
+import numpy as np
+import six
+
+from collections import Mapping
+
+from polyaxon_schemas.exceptions import PolyaxonConfigurationError
+from polyaxon_schemas.matrix import MatrixSampler
+from polyaxon_schemas.utils import Optimization, norm_cdf, norm_pdf
+
+
+def _get_value_key(value):
+    """Returns a hashable key of a matrix value, e.g. for list values."""
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+class MatrixEncoder(object):
+    """Encodes matrix declarations as points of the unit hypercube, more or less,
+    for the surrogate model.
+
+    Each matrix key, sorted by name, is encoded as:
+
+        * categorical `values` and `pvalues`: one column per value, i.e. one-hot encoded.
+        * numerical `values`, `pvalues`, and spaces: the rank of the value, ordinal encoded.
+        * uniform distributions: the position of the value, or its log, between low and high.
+        * normal distributions: the standardized value, or log value, scaled by 1 / 4.
+
+    Args:
+        matrix: `dict`. The matrix keys and their `MatrixConfig`.
+    """
+
+    def __init__(self, matrix):
+        self.keys = sorted(matrix)
+        self.configs = [matrix[key] for key in self.keys]
+        self._indices = {}
+        self._one_hot = set()
+        self.num_columns = 0
+        for key, config in zip(self.keys, self.configs):
+            if config.is_distribution:
+                self.num_columns += 1
+                continue
+            values = config.get_values()
+            if all(isinstance(value, numbers.Number) for value in values):
+                ranks = np.argsort(np.argsort(np.asarray(values, dtype=np.float64)))
+                self.num_columns += 1
+            else:
+                ranks = np.arange(len(values))
+                self._one_hot.add(key)
+                self.num_columns += len(values)
+            self._indices[key] = (
+                {_get_value_key(value): rank for value, rank in zip(values, ranks)},
+                len(values))
+
+    def encode_column(self, key, config, values):
+        """Returns the encoded columns of the values of a matrix key, as a 2-D array."""
+        option, params = config.get_option()
+        if not config.is_distribution:
+            indices, length = self._indices[key]
+            ranks = np.array([indices[_get_value_key(value)] for value in values], dtype=np.int64)
+            if key in self._one_hot:
+                return np.eye(length)[ranks]
+            return (ranks / max(length - 1, 1))[:, None]
+
+        values = np.asarray(values, dtype=np.float64)
+        if option in {'loguniform', 'qloguniform', 'lognormal', 'qlognormal'}:
+            # Quantized values can be 0
+            values = np.log(np.maximum(values, np.finfo(np.float64).tiny))
+        if option in {'uniform', 'quniform', 'loguniform', 'qloguniform'}:
+            encoded = (values - params['low']) / (params['high'] - params['low'])
+        else:
+            encoded = 0.5 + 0.25 * (values - params['loc']) / params['scale']
+        return encoded[:, None]
+
+    def encode(self, columns):
+        """Returns the encoded points of matrix declarations in columnar form."""
+        return np.hstack([
+            self.encode_column(key, config, columns[key])
+            for key, config in zip(self.keys, self.configs)
+        ])
+
+    def encode_declarations(self, declarations):
+        if isinstance(declarations, Mapping):
+            declarations = [declarations]
+        columns = {key: [declaration[key] for declaration in declarations] for key in self.keys}
+        return self.encode(columns)
+
+
+class GaussianProcess(object):
+    """A Gaussian process regression with a squared exponential kernel.
+
+    Observations are added incrementally, each one extends the Cholesky factor
+    of the kernel matrix by one row in `O(n ** 2)`, instead of factorizing it again in `O(n ** 3)`.
+    The observed values are standardized before fitting.
+
+    Args:
+        length_scale: `float`. The length scale of the kernel.
+        noise: `float`. The variance of the observation noise, relative to the kernel's.
+    """
+
+    def __init__(self, length_scale=0.3, noise=1e-4):
+        self.length_scale = length_scale
+        self.noise = noise
+        self.x = None
+        self.y = np.empty(0)
+        self.cholesky = np.empty((0, 0))
+
+    def __len__(self):
+        return len(self.y)
+
+    def kernel(self, x1, x2):
+        distances = (np.sum(x1 * x1, axis=1)[:, None] + np.sum(x2 * x2, axis=1)[None, :] -
+                     2 * np.dot(x1, x2.T))
+        return np.exp(-0.5 * np.maximum(distances, 0) / self.length_scale ** 2)
+
+    @staticmethod
+    def solve_lower(lower, b):
+        """Solves `lower * x = b` by forward substitution, `b` can be a vector or a matrix."""
+        x = np.array(b, dtype=np.float64)
+        for i in range(len(lower)):
+            x[i] = (x[i] - np.dot(lower[i, :i], x[:i])) / lower[i, i]
+        return x
+
+    @staticmethod
+    def solve_upper(upper, b):
+        """Solves `upper * x = b` by backward substitution."""
+        x = np.array(b, dtype=np.float64)
+        for i in reversed(range(len(upper))):
+            x[i] = (x[i] - np.dot(upper[i, i + 1:], x[i + 1:])) / upper[i, i]
+        return x
+
+    def add(self, x, y):
+        """Adds an observation with a rank-one extension of the Cholesky factor."""
+        x = np.asarray(x, dtype=np.float64).reshape(1, -1)
+        n = len(self.y)
+        if n == 0:
+            self.x = x
+            self.cholesky = np.array([[np.sqrt(1. + self.noise)]])
+            self.y = np.array([y], dtype=np.float64)
+            return
+
+        row = self.solve_lower(self.cholesky, self.kernel(self.x, x)[:, 0])
+        # Duplicate points are only kept positive definite by the noise
+        diagonal = np.sqrt(max(1. + self.noise - np.dot(row, row), self.noise))
+        cholesky = np.zeros((n + 1, n + 1))
+        cholesky[:n, :n] = self.cholesky
+        cholesky[n, :n] = row
+        cholesky[n, n] = diagonal
+        self.cholesky = cholesky
+        self.x = np.vstack([self.x, x])
+        self.y = np.append(self.y, y)
+
+    def fit(self, x, y):
+        for x_i, y_i in zip(x, y):
+            self.add(x_i, y_i)
+        return self
+
+    def predict(self, x):
+        """Returns the mean and the standard deviation of the posterior at points `x`."""
+        x = np.asarray(x, dtype=np.float64)
+        if not len(self.y):
+            return np.zeros(len(x)), np.ones(len(x))
+
+        y_mean = np.mean(self.y)
+        y_std = np.std(self.y) or 1.
+        y = (self.y - y_mean) / y_std
+        alpha = self.solve_upper(self.cholesky.T, self.solve_lower(self.cholesky, y))
+
+        kernel = self.kernel(self.x, x)
+        mean = np.dot(kernel.T, alpha)
+        v = self.solve_lower(self.cholesky, kernel)
+        variance = np.maximum(1. - np.sum(v * v, axis=0), 1e-12)
+        return y_mean + y_std * mean, y_std * np.sqrt(variance)
+
+
+def expected_improvement(mean, std, best, xi=0.01):
+    """The expected improvement over `best` of a maximization."""
+    improvement = mean - best - xi
+    z = improvement / std
+    return improvement * norm_cdf(z) + std * norm_pdf(z)
+
+
+class BayesianOptimizer(object):
+    """Suggests matrix declarations with a Gaussian process surrogate
+    and an expected improvement acquisition.
+
+    The first suggestions are random, then each suggestion is the candidate,
+    out of `n_candidates` random ones, with the highest expected improvement.
+
+    Args:
+        matrix: `dict`. The matrix keys and their `MatrixConfig`.
+        optimization: `str`. The optimization of the observed metric, one of `Optimization`.
+        n_initial_trials: `int`. The number of random suggestions before using the surrogate.
+        n_iterations: `int`. The number of suggestions, unlimited if `None`.
+        n_candidates: `int`. The number of candidates evaluated by the acquisition.
+        xi: `float`. The exploration of the expected improvement.
+        length_scale: `float`. The length scale of the Gaussian process kernel.
+        rand_generator: a numpy `RandomState`.
+        constraints: `MatrixConstraints`. The conditions of the valid suggestions.
+    """
+
+    def __init__(self,
+                 matrix,
+                 optimization=Optimization.MAXIMIZE,
+                 n_initial_trials=5,
+                 n_iterations=None,
+                 n_candidates=1000,
+                 xi=0.01,
+                 length_scale=0.3,
+                 rand_generator=None,
+                 constraints=None):
+        self.encoder = MatrixEncoder(matrix)
+        self.sampler = MatrixSampler(
+            matrix, rand_generator=rand_generator, constraints=constraints)
+        self.gaussian_process = GaussianProcess(length_scale=length_scale)
+        self.maximize = Optimization.maximize(optimization)
+        self.n_initial_trials = n_initial_trials
+        self.n_iterations = n_iterations
+        self.n_candidates = n_candidates
+        self.xi = xi
+        self.num_suggested = 0
+
+    @property
+    def num_observations(self):
+        return len(self.gaussian_process)
+
+    def observe(self, declaration, value):
+        """Updates the surrogate with the metric value of a matrix declaration."""
+        x = self.encoder.encode_declarations(declaration)[0]
+        self.gaussian_process.add(x, value if self.maximize else -value)
+
+    def suggest(self):
+        """Returns the next matrix declaration to evaluate,
+        or `None` once `n_iterations` declarations were suggested.
+        """
+        if self.n_iterations is not None and self.num_suggested >= self.n_iterations:
+            return None
+
+        size = 1 if self.num_observations < self.n_initial_trials else self.n_candidates
+        candidates = self.sampler.sample(size)
+        if not len(next(six.itervalues(candidates))):
+            raise PolyaxonConfigurationError(
+                'No valid matrix declaration was sampled, the matrix constraints are too strict.')
+        self.num_suggested += 1
+        if size == 1:
+            return {key: values[0] for key, values in six.iteritems(candidates)}
+
+        mean, std = self.gaussian_process.predict(self.encoder.encode(candidates))
+        acquisition = expected_improvement(
+            mean, std, best=np.max(self.gaussian_process.y), xi=self.xi)
+        best = int(np.argmax(acquisition))
+        return {key: values[best] for key, values in six.iteritems(candidates)}
@@ -74,6 +74,7 @@ class ClusterNodeSchema(Schema):
 class ClusterNodeConfig(BaseConfig):
     SCHEMA = ClusterNodeSchema
     IDENTIFIER = 'ClusterNode'
+    COMPILED_SCHEMA = True
     DEFAULT_INCLUDE_ATTRIBUTES = [
         'sequence', 'name', 'hostname', 'role', 'memory', 'cpu', 'n_gpus', 'status'
     ]
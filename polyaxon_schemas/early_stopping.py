@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function
+
+import numbers
+import numpy as np
+
+from collections import namedtuple
+
+from polyaxon_schemas.utils import EarlyStoppingPolicy, Optimization
+
+EarlyStoppingDecision = namedtuple(
+    'EarlyStoppingDecision', ['experiments', 'stop_group', 'stop_all'])
+
+
+def _to_float(value):
+    if isinstance(value, numbers.Number) and not isinstance(value, bool):
+        return value
+    return np.nan
+
+
+class EarlyStoppingEvaluator(object):
+    """Evaluates the early stopping conditions of a group over batches of metric records.
+
+    The conditions are compiled once to arrays, and a batch of `ExperimentMetricConfig`
+    is evaluated in one pass: a matrix of the records' values, one column per condition,
+    is compared to the conditions' values.
+
+    A condition is reached when its metric is greater than or equal to its value
+    for a maximization, and less than or equal to it for a minimization.
+    Then depending on its policy:
+
+        * experiment: the experiment of the record is stopped.
+        * group: the group is stopped.
+        * all: the group and all its experiments are stopped, including the experiment
+            of the record.
+
+    Records without a condition's metric, or with a non numerical value, never reach it,
+    nor do conditions without a value.
+
+    Args:
+        early_stopping: `list`. The `EarlyStoppingMetricConfig` of the group.
+    """
+
+    def __init__(self, early_stopping):
+        early_stopping = early_stopping or []
+        self.metrics = [config.metric for config in early_stopping]
+        self.values = np.array(
+            [np.nan if config.value is None else config.value for config in early_stopping],
+            dtype=np.float64)
+        # The missing optimizations and policies default to their config's defaults
+        self.maximize = np.array(
+            [not Optimization.minimize(config.optimization) for config in early_stopping],
+            dtype=bool)
+        policies = [config.policy or EarlyStoppingPolicy.ALL for config in early_stopping]
+        self.stop_all = np.array(
+            [EarlyStoppingPolicy.stop_all(policy) for policy in policies], dtype=bool)
+        self.stop_experiment = self.stop_all | np.array(
+            [EarlyStoppingPolicy.stop_experiment(policy) for policy in policies], dtype=bool)
+        self.stop_group = self.stop_all | np.array(
+            [EarlyStoppingPolicy.stop_group(policy) for policy in policies], dtype=bool)
+
+    def __len__(self):
+        return len(self.metrics)
+
+    def get_values(self, metrics):
+        """Returns the values of the conditions' metrics for each record, `nan` if missing."""
+        values = np.empty((len(metrics), len(self.metrics)), dtype=np.float64)
+        for j, metric in enumerate(self.metrics):
+            values[:, j] = [_to_float(record.values.get(metric, np.nan)) for record in metrics]
+        return values
+
+    def get_mask(self, metrics):
+        """Returns, for each record, the mask of the conditions it reaches."""
+        values = self.get_values(metrics)
+        # Comparisons with `nan` are always false
+        with np.errstate(invalid='ignore'):
+            return np.where(self.maximize, values >= self.values, values <= self.values)
+
+    def evaluate(self, metrics):
+        """Returns the `EarlyStoppingDecision` of a batch of `ExperimentMetricConfig`:
+
+            * experiments: the experiments to stop, in the order of their first record.
+            * stop_group: if the group should stop.
+            * stop_all: if the group and all its experiments should stop.
+        """
+        metrics = list(metrics)
+        if not len(self) or not metrics:
+            return EarlyStoppingDecision(experiments=[], stop_group=False, stop_all=False)
+
+        mask = self.get_mask(metrics)
+        stop_experiments = np.flatnonzero(np.any(mask & self.stop_experiment, axis=1))
+        experiments = []
+        seen = set()
+        for i in stop_experiments:
+            experiment = metrics[i].experiment
+            if experiment not in seen:
+                seen.add(experiment)
+                experiments.append(experiment)
+        return EarlyStoppingDecision(
+            experiments=experiments,
+            stop_group=bool(np.any(mask & self.stop_group)),
+            stop_all=bool(np.any(mask & self.stop_all)))
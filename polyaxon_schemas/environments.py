@@ -132,6 +132,8 @@ class K8SResourcesSchema(Schema):
 
 
 class K8SResourcesConfig(BaseConfig):
+    __slots__ = ('limits', 'requests')
+
     IDENTIFIER = 'resources'
     SCHEMA = K8SResourcesSchema
 
@@ -178,6 +180,8 @@ class PodResourcesSchema(Schema):
 
 
 class PodResourcesConfig(BaseConfig):
+    __slots__ = ('index', 'cpu', 'memory', 'gpu')
+
     IDENTIFIER = 'pod_resources'
     SCHEMA = PodResourcesSchema
     REDUCED_ATTRIBUTES = ['index']
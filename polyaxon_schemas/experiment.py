@@ -3,7 +3,7 @@ from __future__ import absolute_import, division, print_function
 
 from marshmallow import Schema, fields, post_dump, post_load, validate
 
-from polyaxon_schemas.base import BaseConfig
+from polyaxon_schemas.base import BaseConfig, get_schema_slots
 from polyaxon_schemas.environments import PodResourcesSchema
 from polyaxon_schemas.utils import UUID, humanize_timedelta
 
@@ -39,8 +39,11 @@ class ExperimentJobSchema(Schema):
 
 
 class ExperimentJobConfig(BaseConfig):
+    __slots__ = get_schema_slots(ExperimentJobSchema)
+
     SCHEMA = ExperimentJobSchema
     IDENTIFIER = 'ExperimentJob'
+    COMPILED_SCHEMA = True
     DEFAULT_EXCLUDE_ATTRIBUTES = [
         'uuid', 'definition', 'experiment', 'unique_name', 'updated_at', 'resources']
     DATETIME_ATTRIBUTES = ['created_at', 'updated_at', 'started_at', 'finished_at']
@@ -122,8 +125,11 @@ class ExperimentSchema(Schema):
 
 
 class ExperimentConfig(BaseConfig):
+    __slots__ = get_schema_slots(ExperimentSchema)
+
     SCHEMA = ExperimentSchema
     IDENTIFIER = 'Experiment'
+    COMPILED_SCHEMA = True
     DEFAULT_INCLUDE_ATTRIBUTES = [
         'sequence', 'unique_name', 'user', 'experiment_group_name', 'last_status',
         'created_at', 'started_at', 'finished_at', 'total_run', 'num_jobs', 'is_done', 'is_running'
@@ -205,8 +211,11 @@ class ExperimentStatusSchema(Schema):
 
 
 class ExperimentStatusConfig(BaseConfig):
+    __slots__ = get_schema_slots(ExperimentStatusSchema)
+
     SCHEMA = ExperimentStatusSchema
     IDENTIFIER = 'ExperimentStatus'
+    COMPILED_SCHEMA = True
     DATETIME_ATTRIBUTES = ['created_at']
     DEFAULT_EXCLUDE_ATTRIBUTES = ['experiment', 'uuid']
 
@@ -237,8 +246,11 @@ class ExperimentMetricSchema(Schema):
 
 
 class ExperimentMetricConfig(BaseConfig):
+    __slots__ = get_schema_slots(ExperimentMetricSchema)
+
     SCHEMA = ExperimentMetricSchema
     IDENTIFIER = 'ExperimentMetric'
+    COMPILED_SCHEMA = True
     DATETIME_ATTRIBUTES = ['created_at']
     DEFAULT_EXCLUDE_ATTRIBUTES = ['experiment', 'uuid']
 
@@ -370,6 +382,7 @@ class PodStateSchema(Schema):
 class PodStateConfig(BaseConfig):
     SCHEMA = PodStateSchema
     IDENTIFIER = 'PodState'
+    COMPILED_SCHEMA = True
     DATETIME_ATTRIBUTES = ['deletion_timestamp']
 
     def __init__(self,
@@ -1,15 +1,18 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function
 
+import jinja2
 import numpy as np
 import six
 
-from numpy.random.mtrand import normal  # noqa
+from collections import OrderedDict
+from jinja2 import meta
 
-from marshmallow import Schema, fields, post_dump, post_load, validates_schema
+from marshmallow import Schema, ValidationError, fields, post_dump, post_load, validates_schema
 
 from polyaxon_schemas.base import BaseConfig
 from polyaxon_schemas.utils import (
+    SOBOL_BITS,
     GeomSpace,
     LinSpace,
     LogNormal,
@@ -21,15 +24,23 @@ from polyaxon_schemas.utils import (
     QLogUniform,
     QNormal,
     QUniform,
+    QuasiRandomMethods,
     Range,
     Uniform,
+    latin_hypercube,
     lognormal,
     loguniform,
+    norm_ppf,
+    normal,
     pvalues,
     qlognormal,
     qloguniform,
     qnormal,
-    quniform
+    quantize,
+    quniform,
+    sobol,
+    to_object_array,
+    uniform
 )
 
 # pylint:disable=redefined-outer-name
@@ -41,6 +52,18 @@ def validate_matrix(values):
         raise ValueError("Matrix element is not valid, one and only one option is required.")
 
 
+def validate_pvalues(values):
+    """Checks that the probabilities of `pvalues` are positive and sum to 1,
+    with the tolerance of `numpy.random.choice`.
+    """
+    probabilities = np.array([v[1] for v in values], dtype=np.float64)
+    if (probabilities < 0).any():
+        raise ValidationError('The probabilities of `pvalues` must be positive.', 'pvalues')
+    if abs(probabilities.sum() - 1) > np.sqrt(np.finfo(np.float64).eps):
+        raise ValidationError('The probabilities of `pvalues` must sum to 1, '
+                              'received `{}`.'.format(probabilities.sum()), 'pvalues')
+
+
 class MatrixSchema(Schema):
     # Discrete
     values = fields.List(fields.Raw(), allow_none=True)
@@ -88,6 +111,8 @@ class MatrixSchema(Schema):
             data.get('lognormal'),
             data.get('qlognormal'),
         ])
+        if data.get('pvalues'):
+            validate_pvalues(data['pvalues'])
 
 
 class MatrixConfig(BaseConfig):
@@ -104,7 +129,7 @@ class MatrixConfig(BaseConfig):
         'linspace': np.linspace,
         'logspace': np.logspace,
         'geomspace': np.geomspace,
-        'uniform': np.random.uniform(),
+        'uniform': uniform,
         'quniform': quniform,
         'loguniform': loguniform,
         'qloguniform': qloguniform,
@@ -148,12 +173,146 @@ class MatrixConfig(BaseConfig):
             values, pvalues, range, linspace, logspace, geomspace, uniform, quniform,
             loguniform, qloguniform, normal, qnormal, lognormal, qlognormal])
 
+    DISCRETE_KEYS = {'values', 'pvalues', 'range', 'linspace', 'logspace', 'geomspace'}
+    CONTINUOUS_KEYS = {
+        'uniform', 'quniform', 'loguniform', 'qloguniform',
+        'normal', 'qnormal', 'lognormal', 'qlognormal'
+    }
+    # The length of continuous distributions
+    INFINITE = float('inf')
+
+    def get_option(self):
+        """Returns the defined option key and its value."""
+        for key in self.REDUCED_ATTRIBUTES:
+            value = getattr(self, key)
+            if value:
+                return key, value
+
+    @property
+    def is_distribution(self):
+        return self.get_option()[0] in self.CONTINUOUS_KEYS
+
+    @property
+    def length(self):
+        """The number of values of this matrix option, computed without creating them.
+
+        Returns `INFINITE` for continuous distributions.
+        """
+        key, value = self.get_option()
+        if key in self.CONTINUOUS_KEYS:
+            return self.INFINITE
+        if key in {'values', 'pvalues'}:
+            return len(value)
+        if key == 'range':
+            # Same computation as `np.arange`
+            length = np.ceil((value['stop'] - value['start']) / value['step'])
+            return max(int(length), 0)
+        return max(int(value['num']), 0)
+
+    @staticmethod
+    def _get_linspace_value(start, stop, num, index):
+        # Same computation as `np.linspace`
+        start = np.float64(start)
+        stop = np.float64(stop)
+        if num == 1:
+            return start
+        if index == num - 1:
+            return stop
+        delta = stop - start
+        step = delta / (num - 1)
+        if step == 0:
+            return np.float64(index) / (num - 1) * delta + start
+        return np.float64(index) * step + start
+
+    def get_value(self, index):
+        """Returns the value at `index` of this matrix option, computed without creating them.
+
+        The value is the same as `self.to_numpy()[index]`.
+        """
+        key, value = self.get_option()
+        if key in self.CONTINUOUS_KEYS:
+            raise ValueError('Matrix option `{}` is a distribution, '
+                             'its values cannot be indexed.'.format(key))
+        length = self.length
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError('Matrix option index out of range.')
+
+        if key == 'values':
+            return value[index]
+        if key == 'pvalues':
+            return value[index][0]
+        if key == 'range':
+            # Same computation as `np.arange`
+            dtype = np.result_type(value['start'], value['stop'], value['step'])
+            start = dtype.type(value['start'])
+            delta = dtype.type(start + value['step']) - start
+            return dtype.type(start + index * delta)
+        if key == 'linspace':
+            return self._get_linspace_value(value['start'], value['stop'], value['num'], index)
+        if key == 'logspace':
+            exponent = self._get_linspace_value(
+                value['start'], value['stop'], value['num'], index)
+            return np.power(value.get('base') or 10.0, exponent)
+
+        # Same computation as `np.geomspace`
+        start, stop, sign = value['start'], value['stop'], 1
+        if np.sign(start) == np.sign(stop) == -1:
+            start, stop, sign = -start, -stop, -1
+        exponent = self._get_linspace_value(
+            np.log10(start), np.log10(stop), value['num'], index)
+        return sign * np.power(10.0, exponent)
+
+    def get_values(self):
+        """Returns the array of values of a discrete matrix option."""
+        key, value = self.get_option()
+        if key == 'values':
+            return to_object_array(value)
+        if key == 'pvalues':
+            return to_object_array([v[0] for v in value])
+        return np.asarray(self.to_numpy())
+
+    def ppf(self, quantiles, values=None):
+        """Returns the values of this matrix option at the given quantiles, i.e. its inverse CDF.
+
+        Transforms points of the unit interval, e.g. of a low discrepancy sequence,
+        to values distributed as this option. For discrete options, the values are
+        uniformly distributed, or distributed with their probabilities for `pvalues`.
+
+        Args:
+            quantiles: array of floats in `[0, 1)`.
+            values: the array of values of a discrete option, if already computed.
+        """
+        quantiles = np.asarray(quantiles, dtype=np.float64)
+        key, value = self.get_option()
+        if key in self.DISCRETE_KEYS:
+            values = self.get_values() if values is None else values
+            if key == 'pvalues':
+                probabilities = np.cumsum([v[1] for v in value])
+                indices = np.searchsorted(probabilities / probabilities[-1], quantiles, 'right')
+            else:
+                indices = (quantiles * len(values)).astype(np.int64)
+            return values[np.minimum(indices, len(values) - 1)]
+
+        if key in {'uniform', 'quniform', 'loguniform', 'qloguniform'}:
+            draw = value['low'] + quantiles * (value['high'] - value['low'])
+            if key in {'loguniform', 'qloguniform'}:
+                draw = np.exp(draw)
+        else:
+            draw = value['loc'] + value['scale'] * norm_ppf(quantiles)
+            if key in {'lognormal', 'qlognormal'}:
+                draw = np.exp(draw)
+        if key in {'quniform', 'qloguniform', 'qnormal', 'qlognormal'}:
+            draw = quantize(draw, value['q'])
+        return draw
+
     def to_numpy(self):
         key, value = list(six.iteritems(self.to_dict()))[0]
         if key == 'values':
             return value
         if key == 'pvalues':
-            return pvalues(values=value)
+            return [v[0] for v in value]
 
         return self.NUMPY_MAPPING[key](**value)
 
@@ -171,3 +330,394 @@ class MatrixConfig(BaseConfig):
         value['size'] = size
         value['rand_generator'] = rand_generator
         return self.NUMPY_MAPPING[key](**value)
+
+
+def get_shard_range(size, shard, num_shards):
+    """Returns the `(start, stop)` range of a shard of `size` items split in `num_shards`.
+
+    The shards are disjoint, cover all the items, and their sizes differ by at most one.
+    """
+    if num_shards < 1:
+        raise ValueError('The number of shards must be positive.')
+    if not 0 <= shard < num_shards:
+        raise ValueError('Shard `{}` is out of range for {} shards.'.format(shard, num_shards))
+    return size * shard // num_shards, size * (shard + 1) // num_shards
+
+
+class MatrixConstraints(object):
+    """Conditions that the matrix declarations must satisfy,
+    e.g. `n_ps == 0 or n_workers > 0` or `kernel_size <= input_size`.
+
+    Each condition is a Jinja expression, optionally between `{{ }}`,
+    reading the values of the matrix keys of a declaration.
+
+    Args:
+        expressions: `list`. The conditions.
+    """
+
+    env = jinja2.Environment()
+
+    def __init__(self, expressions):
+        self.expressions = []
+        self.variables = []
+        self.conditions = []
+        for expression in expressions:
+            expression = expression.strip()
+            if expression.startswith('{{') and expression.endswith('}}'):
+                expression = expression[2:-2].strip()
+            self.expressions.append(expression)
+            self.variables.append(
+                meta.find_undeclared_variables(self.env.parse('{{ %s }}' % expression)))
+            self.conditions.append(self.env.compile_expression(expression))
+
+    def __len__(self):
+        return len(self.conditions)
+
+    def __reduce__(self):
+        # The compiled conditions cannot be pickled, they are compiled again
+        return self.__class__, (self.expressions,)
+
+    def get_unknown_variables(self, keys):
+        """Returns the names read by the conditions that are not in `keys`."""
+        return set().union(*self.variables) - set(keys) if self.variables else set()
+
+    def get_positions(self, keys):
+        """Returns the position, in `keys`, of the last matrix key read by each condition."""
+        positions = {key: position for position, key in enumerate(keys)}
+        return [max([positions[name] for name in variables if name in positions] or [0])
+                for variables in self.variables]
+
+    def get_failures(self, declaration):
+        """Returns the indices of the conditions not satisfied by a declaration."""
+        return [i for i, condition in enumerate(self.conditions) if not condition(**declaration)]
+
+    def is_valid(self, declaration):
+        return all(condition(**declaration) for condition in self.conditions)
+
+    def get_mask(self, columns):
+        """Returns the mask of the valid declarations of a columnar sample."""
+        return np.array([self.is_valid(declaration)
+                         for declaration in MatrixSampler.to_declarations(columns)],
+                        dtype=bool)
+
+
+def filter_columns(columns, mask):
+    return OrderedDict((key, values[mask]) for key, values in six.iteritems(columns))
+
+
+def concatenate_columns(columns, other_columns):
+    if columns is None:
+        return other_columns
+    return OrderedDict((key, np.concatenate([values, other_columns[key]]))
+                       for key, values in six.iteritems(columns))
+
+
+class MatrixSampler(object):
+    """Draws batches of matrix declarations with one vectorized draw per matrix key.
+
+    Samples are returned in columnar form, an `OrderedDict` of arrays keyed by
+    the sorted matrix keys, so that they only depend on the state of the random generator.
+
+    Args:
+        matrix: `dict`. The matrix keys and their `MatrixConfig`.
+        rand_generator: a numpy `RandomState`, defaults to the global one.
+        constraints: `MatrixConstraints`. The invalid declarations are rejected
+            and drawn again.
+    """
+
+    # The maximum number of draws to replace the duplicates or the invalid declarations
+    MAX_UNIQUE_DRAWS = 32
+
+    def __init__(self, matrix, rand_generator=None, constraints=None):
+        self.keys = sorted(matrix)
+        self.configs = [matrix[key] for key in self.keys]
+        self.rand_generator = rand_generator or np.random
+        self.constraints = constraints or None
+        self._values = {}
+
+    @property
+    def is_discrete(self):
+        return not any(config.is_distribution for config in self.configs)
+
+    def get_values(self, key, config):
+        """Returns the array of values of a discrete matrix option."""
+        if key not in self._values:
+            self._values[key] = config.get_values()
+        return self._values[key]
+
+    def sample_indices(self, config, size):
+        """Draws the indices of `size` values of a discrete matrix option."""
+        option, value = config.get_option()
+        if option == 'pvalues':
+            return self.rand_generator.choice(
+                len(value), size=size, p=[v[1] for v in value])
+        return self.rand_generator.randint(config.length, size=size)
+
+    def _sample_discrete_indices(self, size):
+        return np.column_stack([self.sample_indices(config, size) for config in self.configs])
+
+    def _sample_unique_indices(self, size):
+        space = 1
+        for config in self.configs:
+            space *= config.length
+        size = min(size, space)
+
+        indices = np.empty((0, len(self.configs)), dtype=np.int64)
+        for _ in range(self.MAX_UNIQUE_DRAWS):
+            indices = np.concatenate([indices, self._sample_discrete_indices(size - len(indices))])
+            # Keeps the first occurrence of each declaration, in the order of the draws
+            _, first_indices = np.unique(indices, axis=0, return_index=True)
+            indices = indices[np.sort(first_indices)]
+            if self.constraints:
+                indices = indices[self.constraints.get_mask(self._get_columns(indices))]
+            if len(indices) == size:
+                break
+        return indices
+
+    def _get_columns(self, indices):
+        columns = OrderedDict()
+        for i, (key, config) in enumerate(zip(self.keys, self.configs)):
+            columns[key] = self.get_values(key, config)[indices[:, i]]
+        return columns
+
+    def _sample(self, size):
+        columns = OrderedDict()
+        for key, config in zip(self.keys, self.configs):
+            if config.is_distribution:
+                values = config.sample(size=size, rand_generator=self.rand_generator)
+                columns[key] = np.asarray(values).reshape(size)
+            else:
+                columns[key] = self.get_values(key, config)[self.sample_indices(config, size)]
+        return columns
+
+    def sample(self, size, unique=False):
+        """Returns `size` declarations in columnar form.
+
+        Args:
+            size: `int`. The number of declarations.
+            unique: `bool`. To not return the same declaration twice, if all the options
+                are discrete. The sample has less declarations than `size` if the matrix
+                space is smaller, or if the duplicates, or the invalid declarations,
+                could not be replaced after `MAX_UNIQUE_DRAWS` draws,
+                e.g. with very unlikely `pvalues`.
+        """
+        if unique and self.is_discrete:
+            return self._get_columns(self._sample_unique_indices(size))
+
+        if not self.constraints:
+            return self._sample(size)
+
+        columns = None
+        for _ in range(self.MAX_UNIQUE_DRAWS):
+            draw = self._sample(size - (len(columns[self.keys[0]]) if columns else 0))
+            columns = concatenate_columns(
+                columns, filter_columns(draw, self.constraints.get_mask(draw)))
+            if len(columns[self.keys[0]]) == size:
+                break
+        return columns
+
+    @staticmethod
+    def to_declarations(columns):
+        """Returns the matrix declarations of a columnar sample."""
+        keys = list(columns)
+        return [dict(zip(keys, values)) for values in zip(*six.itervalues(columns))]
+
+    def sample_declarations(self, size, unique=False):
+        return self.to_declarations(self.sample(size=size, unique=unique))
+
+
+class MatrixQuasiSampler(object):
+    """Draws low discrepancy designs over the matrix.
+
+    Each matrix key, sorted by name, is a dimension of a Sobol sequence or a Latin hypercube
+    design in the unit hypercube, transformed to the values of its option with `MatrixConfig.ppf`.
+    The designs cover the matrix space more evenly than random samples of the same size.
+
+    Args:
+        matrix: `dict`. The matrix keys and their `MatrixConfig`.
+        method: `str`. One of `QuasiRandomMethods`.
+        rand_generator: a numpy `RandomState`, to scramble the Sobol sequence
+            or to draw the Latin hypercube design.
+        constraints: `MatrixConstraints`. The invalid declarations are removed,
+            and replaced by the next points of a Sobol sequence.
+    """
+
+    # The maximum number of extensions of a Sobol sequence to replace invalid declarations
+    MAX_CONSTRAINED_DRAWS = 32
+
+    def __init__(self,
+                 matrix,
+                 method=QuasiRandomMethods.SOBOL,
+                 rand_generator=None,
+                 constraints=None):
+        if method not in QuasiRandomMethods.VALUES:
+            raise ValueError('Quasi random method `{}` is not supported.'.format(method))
+        self.keys = sorted(matrix)
+        self.configs = [matrix[key] for key in self.keys]
+        self.method = method
+        self.constraints = constraints or None
+        self.rand_generator = rand_generator
+        self.shift = None
+        if QuasiRandomMethods.is_sobol(method) and rand_generator is not None:
+            # The same digital shift scrambles all the points of the sequence
+            self.shift = rand_generator.randint(
+                0, 2 ** SOBOL_BITS, size=len(self.keys), dtype=np.uint64)
+
+    def get_points(self, size, start=0):
+        """Returns the points of the design in the unit hypercube."""
+        dimensions = len(self.keys)
+        if QuasiRandomMethods.is_latin_hypercube(self.method):
+            if start:
+                raise ValueError('A Latin hypercube design cannot start at an offset.')
+            return latin_hypercube(size, dimensions, rand_generator=self.rand_generator)
+        return sobol(size, dimensions, start=start, shift=self.shift)
+
+    def sample(self, size, start=0):
+        """Returns `size` declarations of the design in columnar form, see `MatrixSampler`.
+
+        With constraints, a Latin hypercube design can have less than `size` declarations.
+
+        Args:
+            size: `int`. The number of declarations.
+            start: `int`. The index of the first declaration in the Sobol sequence,
+                e.g. to resume or shard a design.
+        """
+        columns = self._sample(size, start)
+        if not self.constraints:
+            return columns
+
+        columns = filter_columns(columns, self.constraints.get_mask(columns))
+        if QuasiRandomMethods.is_latin_hypercube(self.method):
+            return columns
+        for _ in range(self.MAX_CONSTRAINED_DRAWS):
+            if len(columns[self.keys[0]]) >= size:
+                break
+            start += size
+            draw = self._sample(size, start)
+            columns = concatenate_columns(
+                columns, filter_columns(draw, self.constraints.get_mask(draw)))
+        return filter_columns(columns, slice(0, size))
+
+    def _sample(self, size, start):
+        points = self.get_points(size, start=start)
+        columns = OrderedDict()
+        for i, (key, config) in enumerate(zip(self.keys, self.configs)):
+            columns[key] = config.ppf(points[:, i])
+        return columns
+
+    def sample_declarations(self, size, start=0):
+        return MatrixSampler.to_declarations(self.sample(size=size, start=start))
+
+
+class MatrixGrid(object):
+    """A lazy and randomly addressable grid over the values of a discrete matrix.
+
+    The grid is ordered as `itertools.product` over the matrix keys sorted by name,
+    i.e. the values of the last key vary the fastest.
+    A matrix declaration is decoded from its index as a mixed radix number
+    with the lengths of the matrix options as bases, without creating the other declarations.
+
+    With constraints, indexing still addresses all the declarations, but iterations skip
+    the invalid ones. A condition is checked as soon as the keys it reads are set,
+    so the declarations sharing an invalid prefix are skipped at once.
+
+    Args:
+        matrix: `dict`. The matrix keys and their `MatrixConfig`.
+        constraints: `MatrixConstraints`. The conditions of the valid declarations.
+    """
+
+    def __init__(self, matrix, constraints=None):
+        self.keys = sorted(matrix)
+        self.configs = [matrix[key] for key in self.keys]
+        for key, config in zip(self.keys, self.configs):
+            if config.is_distribution:
+                raise ValueError('Matrix key `{}` is a distribution, '
+                                 'a grid requires discrete options.'.format(key))
+        self.lengths = [config.length for config in self.configs]
+
+        size = 1
+        # The number of declarations sharing the same values up to each position
+        self.strides = []
+        for length in reversed(self.lengths):
+            self.strides.insert(0, size)
+            size *= length
+        self.size = size
+
+        self.constraints = constraints or None
+        self.constraint_positions = (
+            constraints.get_positions(self.keys) if self.constraints else None)
+
+    def __len__(self):
+        return self.size
+
+    def get_indices(self, index):
+        """Returns the index of each matrix option in the declaration at `index`."""
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError('Matrix grid index out of range.')
+
+        indices = [0] * len(self.lengths)
+        for position in reversed(range(len(self.lengths))):
+            index, indices[position] = divmod(index, self.lengths[position])
+        return indices
+
+    def get_declaration(self, indices):
+        return {
+            key: config.get_value(i)
+            for key, config, i in zip(self.keys, self.configs, indices)
+        }
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in six.moves.range(*index.indices(self.size))]
+        return self.get_declaration(self.get_indices(index))
+
+    def __iter__(self):
+        return self.iter_range()
+
+    def iter_shard(self, shard, num_shards):
+        """Iterates over the declarations of a shard, see `get_shard_range`."""
+        return self.iter_range(*get_shard_range(self.size, shard, num_shards))
+
+    def is_valid(self, declaration):
+        return self.constraints is None or self.constraints.is_valid(declaration)
+
+    def _iter_valid_range(self, start, stop):
+        index = start
+        while index < stop:
+            declaration = self[index]
+            failures = self.constraints.get_failures(declaration)
+            if not failures:
+                yield declaration
+                index += 1
+                continue
+            # Skips all the declarations with the same values up to the failure position
+            stride = self.strides[min(self.constraint_positions[i] for i in failures)]
+            index = (index // stride + 1) * stride
+
+    def iter_range(self, start=0, stop=None):
+        """Iterates over the declarations from `start` to `stop`, e.g. to resume or shard a grid.
+
+        Only the values of the options changing from one declaration to the next are computed.
+        """
+        stop = self.size if stop is None else min(stop, self.size)
+        if start >= stop:
+            return
+        if self.constraints:
+            for declaration in self._iter_valid_range(start, stop):
+                yield declaration
+            return
+
+        indices = self.get_indices(start)
+        values = [config.get_value(i) for config, i in zip(self.configs, indices)]
+        for _ in six.moves.range(start, stop):
+            yield dict(zip(self.keys, values))
+            # Increments the indices as an odometer
+            for position in reversed(range(len(indices))):
+                indices[position] += 1
+                if indices[position] < self.lengths[position]:
+                    values[position] = self.configs[position].get_value(indices[position])
+                    break
+                indices[position] = 0
+                values[position] = self.configs[position].get_value(0)
@@ -6,6 +6,7 @@ import itertools
 from marshmallow import Schema, post_dump, post_load
 
 from polyaxon_schemas.base import BaseConfig
+from polyaxon_schemas.polyaxonfile.utils import DeclarationsScope
 
 
 class ForSchema(Schema):
@@ -35,9 +36,10 @@ class ForConfig(BaseConfig):
         parsed_data = []
         length = parser.parse_expression(spec, self.len, declarations, check_operators=True)
         length = int(length)
+        declarations = DeclarationsScope.wrap(declarations)
         for i in range(length):
-            i_declarations = {self.index: i}
-            i_declarations.update(declarations)
+            # The index does not override existing declarations
+            i_declarations = declarations.new_defaults({self.index: i})
             parsed_data.append(
                 parser.parse_expression(spec, self.do, i_declarations, check_operators=True))
         if parsed_data and isinstance(parsed_data[0], (list, tuple)):
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function
+
+import copy
+import six
+import threading
+
+from collections import Mapping, OrderedDict
+
+from marshmallow import ValidationError
+from marshmallow.decorators import POST_DUMP, POST_LOAD
+from marshmallow.utils import missing
+
+from polyaxon_schemas.polyaxonfile import validator
+from polyaxon_schemas.polyaxonfile.parser import Parser
+from polyaxon_schemas.polyaxonfile.utils import get_fingerprint, get_section_fingerprint
+
+
+_local = threading.local()
+
+
+def get_schema(schema_cls):
+    """Returns a schema instance, for its bound fields and hooks, cached per thread and class.
+
+    The nested fields keep a schema instance, which must not be shared between threads.
+    """
+    try:
+        schemas = _local.schemas
+    except AttributeError:
+        schemas = _local.schemas = {}
+    try:
+        return schemas[schema_cls]
+    except KeyError:
+        return schemas.setdefault(schema_cls, schema_cls())
+
+
+def can_load_fields(schema_cls):
+    """Returns if a config can be loaded field by field, i.e. its schema only has `post_load`
+    hooks, to create the config from the loaded values, without the original data.
+    """
+    if schema_cls is None:
+        return False
+    for (tag, pass_many), attr_names in six.iteritems(schema_cls.__processors__):
+        if not attr_names or tag == POST_DUMP:
+            continue
+        if tag != POST_LOAD or pass_many:
+            return False
+        for attr_name in attr_names:
+            kwargs = getattr(schema_cls, attr_name).__marshmallow_kwargs__[(tag, pass_many)]
+            if kwargs.get('pass_original'):
+                return False
+    return True
+
+
+class CompiledSubtree(object):
+    """A top level subtree of a section and the matrix dependent names it reads."""
+
+    def __init__(self, key, data, dependencies):
+        self.key = key
+        self.data = data
+        self.dependencies = dependencies
+        self.parsed_data = None
+
+    @property
+    def is_static(self):
+        return not self.dependencies
+
+
+class CompiledSection(object):
+    """A polyaxonfile section and the matrix dependent names it reads.
+
+    A static section is parsed and validated only once at compile time.
+    A dynamic section keeps its static subtrees, if it can be split,
+    to only evaluate and validate the dynamic ones: the loaded values of the static fields
+    are kept, and the config is created from a copy of them and the loaded dynamic fields.
+    """
+
+    def __init__(self, name, data, dependencies, subtrees=None):
+        self.name = name
+        self.data = data
+        self.dependencies = dependencies
+        self.subtrees = subtrees or OrderedDict()
+        self.parsed_data = None
+        self.validated_data = None
+        self.fingerprint = None
+        self.schema_cls = None
+        self.loaded_data = None  # The loaded values of the static fields, by attribute
+        self.dynamic_fields = None  # The data key, attribute and field of the dynamic subtrees
+
+    @property
+    def is_static(self):
+        return not self.dependencies
+
+    def get_fingerprints(self):
+        """Returns the section fingerprint if static, otherwise its static subtrees fingerprints."""
+        if self.is_static:
+            return self.fingerprint
+        return {
+            key: subtree.fingerprint for key, subtree in six.iteritems(self.subtrees)
+            if subtree.is_static
+        }
+
+    @property
+    def dynamic_subtrees(self):
+        return [key for key, subtree in six.iteritems(self.subtrees) if not subtree.is_static]
+
+
+class CompiledPolyaxonfile(object):
+    """Compile once, render many representation of a polyaxonfile with a matrix.
+
+    Rendering a matrix declaration only evaluates and validates the sections and subtrees
+    depending on the matrix, the parsed data and config objects of static ones
+    are reused (and shared) by all the rendered results.
+    """
+
+    def __init__(self, spec, data, matrix_declarations):
+        self.spec = spec
+        self.data = data
+        self.dependency_graph = spec.dependency_graph
+
+        declarations = Parser.parse_declarations(spec, data, matrix_declarations)
+        self.sections = OrderedDict()
+        for section in spec.PARSED_SECTIONS:
+            if section not in data:
+                continue
+            dependencies = self.dependency_graph.get_matrix_dependencies((section,))
+            compiled_section = CompiledSection(
+                name=section,
+                data=data[section],
+                dependencies=dependencies,
+                subtrees=self.get_subtrees(section, data[section]) if dependencies else None)
+            compiled_section.parsed_data = self.parse_section(compiled_section, declarations)
+            compiled_section.validated_data = validator.validate_section(
+                spec, section, compiled_section.parsed_data)
+            if compiled_section.is_static:
+                compiled_section.fingerprint = get_section_fingerprint(
+                    compiled_section.parsed_data)
+            elif compiled_section.subtrees:
+                self.compile_fields(compiled_section)
+            self.sections[section] = compiled_section
+
+    @property
+    def dynamic_declarations(self):
+        return self.dependency_graph.dynamic_declarations
+
+    def get_subtrees(self, section, data):
+        """Splits a section in subtrees that can be parsed independently.
+
+        Only sections with many plain keys, i.e. not operators nor templates, are split.
+        """
+        if not isinstance(data, Mapping) or len(data) < 2:
+            return None
+
+        subtrees = OrderedDict()
+        for key, value in six.iteritems(data):
+            is_plain_key = (isinstance(key, six.string_types) and
+                            Parser.is_literal(key) and
+                            not Parser.is_operator(self.spec, key) and
+                            Parser.parse_literal(key) == key)
+            if not is_plain_key:
+                return None
+            subtrees[key] = CompiledSubtree(
+                key=key,
+                data=value,
+                dependencies=self.dependency_graph.get_matrix_dependencies((section, key)))
+        return subtrees
+
+    @property
+    def static_sections(self):
+        return [name for name, section in six.iteritems(self.sections) if section.is_static]
+
+    @property
+    def dynamic_sections(self):
+        return [name for name, section in six.iteritems(self.sections) if not section.is_static]
+
+    def parse_section(self, compiled_section, declarations):
+        if not compiled_section.subtrees:
+            return Parser.parse_section(
+                self.spec, compiled_section.name, compiled_section.data, declarations)
+
+        parsed_data = {}
+        for key, subtree in six.iteritems(compiled_section.subtrees):
+            if subtree.is_static and subtree.parsed_data is not None:
+                parsed_data[key] = subtree.parsed_data
+                continue
+            value = Parser.parse_section(
+                self.spec, compiled_section.name, {key: subtree.data}, declarations)[key]
+            if subtree.is_static:
+                subtree.parsed_data = value
+                subtree.fingerprint = get_fingerprint(value)
+            parsed_data[key] = value
+        return parsed_data
+
+    def compile_fields(self, compiled_section):
+        """Loads the static fields of a split section, as marshmallow does,
+        if the dynamic subtrees can be validated with their schema fields only.
+        """
+        config = compiled_section.validated_data
+        schema_cls = getattr(config, 'SCHEMA', None)
+        if not can_load_fields(schema_cls):
+            return
+
+        parsed_data = compiled_section.parsed_data
+        schema_fields = get_schema(schema_cls).fields
+        fields_by_key = {}
+        for name, field in six.iteritems(schema_fields):
+            if field.dump_only:
+                continue
+            fields_by_key[name] = (name, field)
+            # The `load_from` key is only read when the field's name is missing
+            if field.load_from and name not in parsed_data:
+                fields_by_key.setdefault(field.load_from, (name, field))
+
+        dynamic_fields = []
+        for key in compiled_section.dynamic_subtrees:
+            if key not in fields_by_key:
+                # e.g. the type of a multi schema config
+                return
+            name, field = fields_by_key[key]
+            dynamic_fields.append((key, field.attribute or name, field))
+        dynamic_names = {field.name for _, _, field in dynamic_fields}
+
+        loaded_data = {}
+        for name, field in six.iteritems(schema_fields):
+            if field.dump_only or name in dynamic_names:
+                continue
+            value = parsed_data.get(name, missing)
+            if value is missing and field.load_from:
+                value = parsed_data.get(field.load_from, missing)
+            if value is missing:
+                value = field.missing() if callable(field.missing) else field.missing
+            if value is missing:
+                if field.required:
+                    return
+                continue
+            loaded_data[field.attribute or name] = field.deserialize(
+                copy.deepcopy(value), field.load_from or name, parsed_data)
+
+        compiled_section.schema_cls = schema_cls
+        compiled_section.loaded_data = loaded_data
+        compiled_section.dynamic_fields = dynamic_fields
+
+    def validate_section(self, compiled_section, parsed_data):
+        """Validates a dynamic section.
+
+        If the section was split, only the dynamic subtrees are validated with their schema fields,
+        and the config is created, with the schema's `post_load` hooks, from them
+        and a copy of the static fields loaded at compile time.
+        Otherwise, or if the section is not valid, the whole section is validated.
+        """
+        if compiled_section.loaded_data is None or not parsed_data:
+            return validator.validate_section(self.spec, compiled_section.name, parsed_data)
+
+        schema = get_schema(compiled_section.schema_cls)
+        # The static values are not shared with the configs of other experiments
+        data = copy.deepcopy(compiled_section.loaded_data)
+        try:
+            for key, attr, field in compiled_section.dynamic_fields:
+                data[attr] = field.deserialize(
+                    copy.deepcopy(parsed_data[key]), key, parsed_data)
+            for attr_name in schema.__processors__.get((POST_LOAD, False), []):
+                result = getattr(schema, attr_name)(data)
+                if result is not None:
+                    data = result
+        except ValidationError:
+            # The whole validation raises the same errors as the legacy path
+            return validator.validate_section(self.spec, compiled_section.name, parsed_data)
+        return data
+
+    def render(self, matrix_declarations):
+        """Returns the parsed data, the validated data, and the already known fingerprints
+        of the sections for a matrix declaration.
+        """
+        spec = self.spec
+        declarations = Parser.parse_declarations(spec, self.data, matrix_declarations)
+
+        parsed_data = {
+            spec.VERSION: self.data[spec.VERSION],
+            spec.KIND: self.data[spec.KIND],
+            spec.PROJECT: self.data[spec.PROJECT],
+        }
+        if declarations:
+            parsed_data[spec.DECLARATIONS] = declarations
+
+        validated_data = {}
+        fingerprints = {}
+        for name, section in six.iteritems(self.sections):
+            if section.is_static:
+                section_parsed_data = section.parsed_data
+                section_validated_data = section.validated_data
+            else:
+                section_parsed_data = self.parse_section(section, declarations)
+                section_validated_data = self.validate_section(section, section_parsed_data)
+            parsed_data[name] = section_parsed_data
+            fingerprints[name] = section.get_fingerprints()
+            if section_validated_data is not None:
+                validated_data[name] = section_validated_data
+
+        return parsed_data, validated_data, fingerprints
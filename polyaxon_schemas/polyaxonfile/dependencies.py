@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function
+
+import jinja2
+import six
+
+from collections import Mapping, OrderedDict
+
+from polyaxon_schemas.polyaxonfile.parser import Parser
+
+
+class DependencyGraph(object):
+    """Declarations and matrix keys read by the sections and subtrees of a polyaxonfile.
+
+    Nodes are paths, `(section,)` for a section and `(section, key)` for its top level subtrees,
+    and declarations, mapped to the names they read directly.
+    """
+
+    def __init__(self, matrix_keys, declarations, nodes):
+        self.matrix_keys = set(matrix_keys)
+        self.declarations = declarations
+        self.nodes = nodes
+        # The matrix keys and all the declarations depending on them
+        self.dynamic_declarations = {
+            name for name in set(declarations) | self.matrix_keys
+            if self._resolve([name]) & self.matrix_keys
+        }
+
+    @classmethod
+    def from_data(cls, spec, data, matrix_keys=None):
+        matrix_keys = set(matrix_keys or [])
+        raw_declarations = data.get(spec.DECLARATIONS) or {}
+        names = matrix_keys | set(six.iterkeys(raw_declarations))
+
+        def get_names(value):
+            try:
+                return Parser.get_variables(value) & names
+            except jinja2.TemplateSyntaxError:
+                # We cannot tell which names are read, so we assume all of them are
+                return set(names)
+
+        declarations = {
+            key: get_names(value) for key, value in six.iteritems(raw_declarations)
+        }
+
+        nodes = OrderedDict()
+        for section in spec.PARSED_SECTIONS:
+            if section not in data:
+                continue
+            nodes[(section,)] = get_names(data[section])
+            if isinstance(data[section], Mapping):
+                for key, value in six.iteritems(data[section]):
+                    nodes[(section, key)] = get_names({key: value})
+
+        return cls(matrix_keys=matrix_keys, declarations=declarations, nodes=nodes)
+
+    def get_dependencies(self, path):
+        """Returns the names read directly by a path."""
+        return set(self.nodes[path])
+
+    def _resolve(self, names):
+        resolved = set()
+        to_resolve = list(names)
+        while to_resolve:
+            name = to_resolve.pop()
+            if name in resolved:
+                continue
+            resolved.add(name)
+            to_resolve.extend(self.declarations.get(name, []))
+        return resolved
+
+    def get_all_dependencies(self, path):
+        """Returns the names read by a path directly or through other declarations."""
+        return self._resolve(self.nodes[path])
+
+    def get_matrix_dependencies(self, path):
+        """Returns the matrix keys and the declarations depending on them read by a path."""
+        return self.get_all_dependencies(path) & self.dynamic_declarations
+
+    def get_affected(self, names):
+        """Returns the paths to re-evaluate when the values of `names` change."""
+        names = set(names)
+        return [path for path in self.nodes if self.get_all_dependencies(path) & names]
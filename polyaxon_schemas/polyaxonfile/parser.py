@@ -4,12 +4,16 @@ from __future__ import absolute_import, division, print_function
 import ast
 import copy
 import jinja2
+import numbers
+import re
 import six
 
 from collections import Mapping, defaultdict
+from jinja2 import meta
+from jinja2.nativetypes import NativeEnvironment
 
 from polyaxon_schemas.exceptions import PolyaxonfileError
-from polyaxon_schemas.polyaxonfile.utils import deep_update
+from polyaxon_schemas.polyaxonfile.utils import DeclarationsScope, LRUCache, deep_update
 from polyaxon_schemas.utils import to_list
 
 
@@ -17,6 +21,86 @@ class Parser(object):
     """Parses the Polyaxonfile."""
 
     env = jinja2.Environment()
+    # Compiled templates keyed by their source, shared by all specifications
+    template_cache = LRUCache(maxsize=2048)
+    # Environment used by specifications evaluating expressions to native python types
+    native_env = NativeEnvironment()
+    native_template_cache = LRUCache(maxsize=2048)
+    # Coerced values of strings without any template markup
+    literal_cache = LRUCache(maxsize=8192)
+    # Names of the variables used by a template source
+    variables_cache = LRUCache(maxsize=2048)
+    TEMPLATE_MARKERS = (
+        env.block_start_string, env.variable_start_string, env.comment_start_string
+    )
+    # The newlines normalized by the Jinja lexer
+    NEWLINE_RE = re.compile(r'\r\n|\r|\n')
+    # The other line boundaries of `str.splitlines`, which some Jinja versions also normalize,
+    # strings containing them are always rendered
+    LINE_BOUNDARY_RE = re.compile(u'[\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+
+    @classmethod
+    def get_template(cls, expression, native_types=False):
+        if native_types:
+            return cls.native_template_cache.get_or_set(expression, cls.native_env.from_string)
+        return cls.template_cache.get_or_set(expression, cls.env.from_string)
+
+    @classmethod
+    def is_template(cls, expression):
+        return any(marker in expression for marker in cls.TEMPLATE_MARKERS)
+
+    @classmethod
+    def is_literal(cls, expression):
+        """Returns if the string renders to itself up to its newlines, i.e. can skip Jinja."""
+        return not cls.is_template(expression) and not cls.LINE_BOUNDARY_RE.search(expression)
+
+    @classmethod
+    def _get_template_variables(cls, expression):
+        return frozenset(meta.find_undeclared_variables(cls.env.parse(expression)))
+
+    @classmethod
+    def get_variables(cls, expression):
+        """Returns the names of the variables used by all the templates of an expression."""
+        variables = set()
+        if isinstance(expression, Mapping):
+            for key, value in six.iteritems(expression):
+                variables |= cls.get_variables(key)
+                variables |= cls.get_variables(value)
+        elif isinstance(expression, (list, tuple)):
+            for value in expression:
+                variables |= cls.get_variables(value)
+        elif isinstance(expression, six.string_types) and cls.is_template(expression):
+            variables |= cls.variables_cache.get_or_set(expression, cls._get_template_variables)
+        return variables
+
+    @classmethod
+    def get_context(cls, expression, declarations):
+        """Returns the declarations used by a template, without copying all the declarations."""
+        variables = cls.variables_cache.get_or_set(expression, cls._get_template_variables)
+        return {name: declarations[name] for name in variables if name in declarations}
+
+    @classmethod
+    def _literal_eval(cls, expression):
+        # Jinja normalizes the newlines and drops the trailing one of a template without markup,
+        # the result is rendered again until it is stable, i.e. without trailing newlines
+        lines = cls.NEWLINE_RE.split(expression)
+        while lines and lines[-1] == '':
+            del lines[-1]
+        expression = '\n'.join(lines)
+        try:
+            return ast.literal_eval(expression)
+        except (ValueError, SyntaxError):
+            pass
+        return expression
+
+    @classmethod
+    def parse_literal(cls, expression):
+        """Returns the value of a string without template markup, memoized per string."""
+        value = cls.literal_cache.get_or_set(expression, cls._literal_eval)
+        if isinstance(value, (six.string_types, int, float, complex, type(None))):
+            return value
+        # Never share mutable values between parsed sections
+        return copy.deepcopy(value)
 
     @classmethod
     def get_headers(cls, spec, data):
@@ -27,12 +111,28 @@ class Parser(object):
         return parsed_data
 
     @classmethod
-    def parse(cls, spec, data, matrix_declarations=None):
+    def parse_declarations(cls, spec, data, matrix_declarations=None):
         declarations = copy.copy(data.get(spec.DECLARATIONS, {}))
         matrix_declarations = copy.copy(matrix_declarations)
         if matrix_declarations:
             declarations = deep_update(matrix_declarations, declarations)
 
+        if declarations:
+            declarations = cls.parse_expression(spec, declarations, declarations)
+        return declarations
+
+    @classmethod
+    def parse_section(cls, spec, section, value, declarations):
+        if section == spec.RUN_EXEC:
+            return cls.parse_expression(spec, value, declarations, True, False)
+        if section in spec.GRAPH_SECTIONS:
+            return cls.parse_expression(spec, value, declarations, True, True)
+        return cls.parse_expression(spec, value, declarations)
+
+    @classmethod
+    def parse(cls, spec, data, matrix_declarations=None):
+        declarations = cls.parse_declarations(spec, data, matrix_declarations)
+
         parsed_data = {
             spec.VERSION: data[spec.VERSION],
             spec.KIND: data[spec.KIND],
@@ -40,25 +140,12 @@ class Parser(object):
         }
 
         if declarations:
-            declarations = cls.parse_expression(spec, declarations, declarations)
             parsed_data[spec.DECLARATIONS] = declarations
 
-        if spec.ENVIRONMENT in data:
-            parsed_data[spec.ENVIRONMENT] = cls.parse_expression(
-                spec, data[spec.ENVIRONMENT], declarations)
-
-        if spec.SETTINGS in data:
-            parsed_data[spec.SETTINGS] = cls.parse_expression(
-                spec, data[spec.SETTINGS], declarations)
-
-        if spec.RUN_EXEC in data:
-            parsed_data[spec.RUN_EXEC] = cls.parse_expression(
-                spec, data[spec.RUN_EXEC], declarations, True, False)
-
-        for section in spec.GRAPH_SECTIONS:
+        for section in spec.PARSED_SECTIONS:
             if section in data:
-                parsed_data[section] = cls.parse_expression(
-                    spec, data[section], declarations, True, True)
+                parsed_data[section] = cls.parse_section(
+                    spec, section, data[section], declarations)
 
         return parsed_data
 
@@ -69,7 +156,8 @@ class Parser(object):
                          declarations,
                          check_operators=False,
                          check_graph=False):
-        if isinstance(expression, (int, float, complex, type(None))):
+        # Numbers include numpy scalars, e.g. the values of a matrix
+        if isinstance(expression, (numbers.Number, type(None))):
             return expression
         if isinstance(expression, Mapping):
             if len(expression) == 1:
@@ -107,20 +195,39 @@ class Parser(object):
             return tuple(cls.parse_expression(spec, v, declarations, check_operators, check_graph)
                          for v in expression)
         if isinstance(expression, six.string_types):
+            if cls.is_literal(expression):
+                return cls.parse_literal(expression)
             return cls._evaluate_expression(
                 spec, expression, declarations, check_operators, check_graph)
 
     @classmethod
     def _evaluate_expression(cls, spec, expression, declarations, check_operators, check_graph):
-        result = cls.env.from_string(expression).render(**declarations)
+        if spec.native_types:
+            return cls._evaluate_native_expression(
+                spec, expression, declarations, check_operators, check_graph)
+        result = cls.get_template(expression).render(cls.get_context(expression, declarations))
         if result == expression:
-            try:
-                return ast.literal_eval(result)
-            except (ValueError, SyntaxError):
-                pass
-            return result
+            return cls.parse_literal(result)
         return cls.parse_expression(spec, result, declarations, check_operators, check_graph)
 
+    @classmethod
+    def _evaluate_native_expression(cls,
+                                    spec,
+                                    expression,
+                                    declarations,
+                                    check_operators,
+                                    check_graph):
+        result = cls.get_template(expression, native_types=True).render(
+            cls.get_context(expression, declarations))
+        if isinstance(result, jinja2.Undefined):
+            return ''
+        if isinstance(result, six.string_types):
+            if result == expression:
+                return cls.parse_literal(result)
+            return cls.parse_expression(spec, result, declarations, check_operators, check_graph)
+        # The value is the declaration's object itself, it must not be altered by later steps
+        return copy.deepcopy(result)
+
     @classmethod
     def _parse_operator(cls, spec, expression, declarations):
         k, v = list(six.iteritems(expression))[0]
@@ -158,8 +265,9 @@ class Parser(object):
 
             return layer_value['name']
 
-        layers_declarations = {}
-        layers_declarations.update(declarations)
+        # The tags are only visible to the layers following the first one
+        tags_declarations = {}
+        layers_declarations = DeclarationsScope.wrap(declarations).new_child(tags_declarations)
 
         last_layer = None
         first_layer = True
@@ -222,7 +330,7 @@ class Parser(object):
                 layers.append({layer_type: layer_value})
 
                 # Update layers_declarations
-                layers_declarations['tags'] = tags
+                tags_declarations['tags'] = tags
 
                 # Update last_layer
                 last_layer = layer_value
@@ -2,15 +2,23 @@
 from __future__ import absolute_import, division, print_function
 
 import abc
+import hashlib
+import pickle
 import six
+import zlib
 
 from marshmallow import ValidationError
 
 from polyaxon_schemas.exceptions import PolyaxonConfigurationError, PolyaxonfileError
 from polyaxon_schemas.operators import ForConfig, IfConfig
 from polyaxon_schemas.polyaxonfile import reader, validator
+from polyaxon_schemas.polyaxonfile.dependencies import DependencyGraph
 from polyaxon_schemas.polyaxonfile.parser import Parser
-from polyaxon_schemas.polyaxonfile.utils import cached_property
+from polyaxon_schemas.polyaxonfile.utils import (
+    cached_property,
+    get_fingerprint,
+    get_section_fingerprint
+)
 from polyaxon_schemas.utils import to_list
 
 
@@ -52,6 +60,11 @@ class BaseSpecification(object):
         MODEL, TRAIN, EVAL
     )
 
+    # Sections evaluated by the parser, in their parsing order
+    PARSED_SECTIONS = (
+        ENVIRONMENT, SETTINGS, RUN_EXEC, MODEL, TRAIN, EVAL
+    )
+
     REQUIRED_SECTIONS = (
         VERSION, PROJECT, KIND
     )
@@ -61,24 +74,127 @@ class BaseSpecification(object):
         IfConfig.IDENTIFIER: IfConfig,
     }
 
-    def __init__(self, values):
+    # Evaluate expressions to the declarations' python objects instead of rendering them to text
+    native_types = False
+
+    SNAPSHOT_HEADER = b'polyaxon-specification'
+    SNAPSHOT_VERSION = 2
+    # The state kept by the snapshots: the source data, and the parts expensive to rebuild,
+    # the values, the parsed data and the cached properties are derived again when needed
+    SNAPSHOT_ATTRIBUTES = ('_data', 'native_types', '_headers', '_validated_data', '_fingerprints')
+
+    def __init__(self, values, native_types=None):
+        if native_types is not None:
+            self.native_types = native_types
         self._values = to_list(values)
+        self._fingerprints = None
 
         self._data = reader.read(self._values)
         self.check_data()
-        headers = Parser.get_headers(spec=self, data=self._data)
-        try:
-            self._headers = validator.validate_headers(spec=self, data=headers)
-        except ValidationError as e:
-            raise PolyaxonConfigurationError(e)
+        self._set_headers()
         self._parsed_data = None
         self._validated_data = None
         self._set_parsed_data()
         self._extra_validation()
 
+    @classmethod
+    def from_validated_data(cls, parsed_data, validated_data, native_types=None, fingerprints=None):
+        """Creates a specification from data that was already parsed and validated.
+
+        The sections are neither read, parsed nor validated again, only the headers are.
+
+        Args:
+            parsed_data: `dict`. The parsed sections.
+            validated_data: `dict`. The config objects of the validated sections.
+            native_types: `bool`. If the expressions were evaluated to native types.
+            fingerprints: `dict`. The already known fingerprints of some sections,
+                either the section fingerprint or a dict with the fingerprints of its subtrees.
+        """
+        spec = cls.__new__(cls)
+        if native_types is not None:
+            spec.native_types = native_types
+        spec._fingerprints = fingerprints
+        spec._values = [parsed_data]
+        spec._data = parsed_data
+        spec.check_data()
+        spec._set_headers()
+        spec._parsed_data = parsed_data
+        spec._validated_data = validated_data
+        spec._extra_validation()
+        return spec
+
+    def __getstate__(self):
+        state = {
+            key: value for key, value in six.iteritems(self.__dict__)
+            if key in self.SNAPSHOT_ATTRIBUTES
+        }
+        if self._parsed_data is not None and self._parsed_data is self._data:
+            # e.g. the experiments of a group, the data is only pickled once
+            state['_parsed_data'] = self._parsed_data
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.setdefault('_parsed_data', None)
+        self._values = [self._data]
+
+    def to_snapshot(self):
+        """Returns a compact snapshot of this specification, see `from_snapshot`.
+
+        The snapshot starts with a header line: `<SNAPSHOT_HEADER> <version> <sha256 of content>`.
+        """
+        content = zlib.compress(pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL))
+        header = b' '.join([self.SNAPSHOT_HEADER,
+                            str(self.SNAPSHOT_VERSION).encode('utf-8'),
+                            hashlib.sha256(content).hexdigest().encode('utf-8')])
+        return header + b'\n' + content
+
+    @classmethod
+    def get_snapshot_hash(cls, snapshot):
+        """Returns the content hash of a snapshot."""
+        header, _ = cls._split_snapshot(snapshot)
+        return header[2].decode('utf-8')
+
+    @classmethod
+    def _split_snapshot(cls, snapshot):
+        header, _, content = snapshot.partition(b'\n')
+        header = header.split(b' ')
+        if len(header) != 3 or header[0] != cls.SNAPSHOT_HEADER:
+            raise PolyaxonConfigurationError('Received a non valid specification snapshot.')
+        return header, content
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Rebuilds a specification from a snapshot without reading, parsing or validating it.
+
+        Snapshots are pickled data, they must only be loaded from trusted sources,
+        the content hash only detects corrupted snapshots.
+        """
+        header, content = cls._split_snapshot(snapshot)
+        if header[1] != str(cls.SNAPSHOT_VERSION).encode('utf-8'):
+            raise PolyaxonConfigurationError(
+                'The specification snapshot version `{}` is not supported, '
+                'expected version `{}`.'.format(header[1].decode('utf-8'), cls.SNAPSHOT_VERSION))
+        if hashlib.sha256(content).hexdigest().encode('utf-8') != header[2]:
+            raise PolyaxonConfigurationError('The specification snapshot is corrupted.')
+
+        spec = pickle.loads(zlib.decompress(content))
+        if not isinstance(spec, cls):
+            raise PolyaxonConfigurationError(
+                'The snapshot contains a `{}`, expected a `{}`.'.format(
+                    spec.__class__.__name__, cls.__name__))
+        return spec
+
     def _extra_validation(self):
         pass
 
+    def _set_headers(self):
+        headers = Parser.get_headers(spec=self, data=self._data)
+        try:
+            self._headers = validator.validate_headers(spec=self, data=headers)
+        except ValidationError as e:
+            raise PolyaxonConfigurationError(e)
+
     def _set_parsed_data(self):
         parsed_data = Parser.parse(self, self._data, None)
         self._validated_data = validator.validate(spec=self, data=parsed_data)
@@ -164,8 +280,40 @@ class BaseSpecification(object):
 
     @cached_property
     def parsed_data(self):
+        if self._parsed_data is None and self._validated_data is not None:
+            # Restored from a snapshot, the data is parsed again, but not validated
+            self._parsed_data = Parser.parse(self, self._data, None)
         return self._parsed_data
 
+    @cached_property
+    def section_fingerprints(self):
+        """The fingerprints of the parsed sections, computed over their canonical form."""
+        known_fingerprints = getattr(self, '_fingerprints', None) or {}
+        # Group specifications are only compiled, their raw content is used instead
+        data = self.parsed_data if self.parsed_data is not None else self._data
+        fingerprints = {}
+        for section in self.SECTIONS:
+            if section not in data:
+                continue
+            known_fingerprint = known_fingerprints.get(section)
+            if isinstance(known_fingerprint, six.string_types):
+                fingerprints[section] = known_fingerprint
+            else:
+                fingerprints[section] = get_section_fingerprint(
+                    data[section], known_fingerprint)
+        return fingerprints
+
+    @cached_property
+    def fingerprint(self):
+        """A stable hash of the specification, e.g. to find duplicate experiments."""
+        return get_fingerprint(self.section_fingerprints)
+
+    @cached_property
+    def dependency_graph(self):
+        """The declarations and matrix keys read by each section and subtree."""
+        matrix = self.settings.matrix if self.settings else None
+        return DependencyGraph.from_data(spec=self, data=self._data, matrix_keys=matrix)
+
     @cached_property
     def version(self):
         return self.headers[self.VERSION]
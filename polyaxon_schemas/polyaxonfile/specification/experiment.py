@@ -35,10 +35,6 @@ class ExperimentSpecification(BaseSpecification):
                 'ExperimentSpecification cannot contain a `matrix` section, you should '
                 'use a GroupSpecification instead.')
 
-    @cached_property
-    def parsed_data(self):
-        return self._parsed_data
-
     @cached_property
     def validated_data(self):
         return self._validated_data
@@ -1,16 +1,64 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function
 
+import multiprocessing
+import numpy as np
+import pickle
 import six
 
-from polyaxon_schemas.exceptions import PolyaxonConfigurationError
-from polyaxon_schemas.polyaxonfile import validator
-from polyaxon_schemas.polyaxonfile.parser import Parser
+from collections import OrderedDict, namedtuple
+
+from polyaxon_schemas.bayesian_optimization import BayesianOptimizer
+from polyaxon_schemas.early_stopping import EarlyStoppingEvaluator
+from polyaxon_schemas.exceptions import PolyaxonConfigurationError, PolyaxonfileError
+from polyaxon_schemas.matrix import (
+    MatrixConfig,
+    MatrixGrid,
+    MatrixQuasiSampler,
+    MatrixSampler,
+    concatenate_columns,
+    get_shard_range
+)
+from polyaxon_schemas.polyaxonfile.compiler import CompiledPolyaxonfile
 from polyaxon_schemas.polyaxonfile.specification.base import BaseSpecification
 from polyaxon_schemas.polyaxonfile.specification.experiment import ExperimentSpecification
 from polyaxon_schemas.polyaxonfile.utils import cached_property
 from polyaxon_schemas.settings import SettingsConfig
-from polyaxon_schemas.utils import SearchAlgorithms
+from polyaxon_schemas.utils import (
+    Optimization,
+    QuasiRandomMethods,
+    SearchAlgorithms,
+    get_rand_generator
+)
+
+ExperimentSpecResult = namedtuple('ExperimentSpecResult', ['matrix_declaration', 'spec', 'error'])
+
+# The group specification of a worker process, created once by the pool initializer
+_worker_spec = None
+
+
+def _init_worker(spec_class, data, native_types):
+    global _worker_spec  # pylint:disable=global-statement
+    _worker_spec = spec_class(data, native_types=native_types)
+
+
+def _generate_experiment_spec(spec, matrix_declaration, as_dict):
+    try:
+        experiment_spec = spec.get_experiment_spec(matrix_declaration)
+    except Exception as e:  # noqa, the errors are reported per matrix declaration
+        return None, e
+    return (experiment_spec.parsed_data if as_dict else experiment_spec), None
+
+
+def _generate_worker_experiment_spec(args):
+    matrix_declaration, as_dict = args
+    result, error = _generate_experiment_spec(_worker_spec, matrix_declaration, as_dict)
+    if error is not None:
+        try:
+            pickle.loads(pickle.dumps(error))
+        except Exception:  # noqa, the error must be sent back to the main process
+            error = PolyaxonfileError('{}: {}'.format(error.__class__.__name__, error))
+    return ExperimentSpecResult(matrix_declaration, result, error)
 
 
 class GroupSpecification(BaseSpecification):
@@ -30,6 +78,13 @@ class GroupSpecification(BaseSpecification):
 
     _SPEC_KIND = BaseSpecification._GROUP
 
+    # The random streams derived from the search seed
+    GROUP_STREAM = 0
+    BLOCK_STREAM = 1
+
+    # The number of experiments of a random search sampled at once from a block's stream
+    RANDOM_BLOCK_SIZE = 1024
+
     def _extra_validation(self):
         if not self.matrix:
             raise PolyaxonConfigurationError(
@@ -37,19 +92,67 @@ class GroupSpecification(BaseSpecification):
 
     def _set_parsed_data(self):
         # We need to validate that the data is correct
-        # For that we just use a matrix declaration test
-        parsed_data = Parser.parse(self, self._data, self.matrix_declaration_test)
-        validator.validate(spec=self, data=parsed_data)
+        # For that we just use a matrix declaration test to compile the data
+        self._compiled_data = CompiledPolyaxonfile(
+            spec=self, data=self._data, matrix_declarations=self.matrix_declaration_test)
+
+    @property
+    def compiled_data(self):
+        if getattr(self, '_compiled_data', None) is None:
+            # Restored from a snapshot, which does not keep the compiled sections
+            self._set_parsed_data()
+        return self._compiled_data
 
     def get_experiment_spec(self, matrix_declaration):
-        """Returns and experiment spec for this group spec and the given matrix declaration."""
-        parsed_data = Parser.parse(self, self._data, matrix_declaration)
+        """Returns and experiment spec for this group spec and the given matrix declaration.
+
+        Only the sections and subtrees depending on the matrix are parsed and validated,
+        the data and config objects of the static ones are shared by all the experiment specs.
+        """
+        parsed_data, validated_data, fingerprints = self.compiled_data.render(matrix_declaration)
+        parsed_data[self.KIND] = self._EXPERIMENT
         settings = SettingsConfig.get_experiment_settings(parsed_data[self.SETTINGS])
         del parsed_data[self.SETTINGS]
+        fingerprints.pop(self.SETTINGS, None)
         if settings:
             parsed_data[self.SETTINGS] = settings
-        validator.validate(spec=self, data=parsed_data)
-        return ExperimentSpecification(values=[parsed_data, {'kind': self._EXPERIMENT}])
+        return ExperimentSpecification.from_validated_data(parsed_data=parsed_data,
+                                                           validated_data=validated_data,
+                                                           native_types=self.native_types,
+                                                           fingerprints=fingerprints)
+
+    def generate_experiment_specs(self, matrix_declarations, workers=1, as_dict=False,
+                                  chunksize=16):
+        """Generates the experiment specs of many matrix declarations.
+
+        The results are streamed in the order of the matrix declarations,
+        as `ExperimentSpecResult` with either the spec or the error raised for that declaration.
+
+        Args:
+            matrix_declarations: an iterable of matrix declarations.
+            workers: `int`. If higher than 1, the specs are generated by a pool of processes.
+            as_dict: `bool`. To return the validated parsed data instead of the specs.
+            chunksize: `int`. The number of matrix declarations sent at once to a worker.
+        """
+        if workers is None or workers <= 1:
+            for matrix_declaration in matrix_declarations:
+                result, error = _generate_experiment_spec(self, matrix_declaration, as_dict)
+                yield ExperimentSpecResult(matrix_declaration, result, error)
+            return
+
+        pool = multiprocessing.Pool(processes=workers,
+                                    initializer=_init_worker,
+                                    initargs=(self.__class__, self._data, self.native_types))
+        try:
+            results = pool.imap(_generate_worker_experiment_spec,
+                                ((declaration, as_dict) for declaration in matrix_declarations),
+                                chunksize=chunksize)
+            for result in results:
+                yield result
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
 
     @cached_property
     def matrix(self):
@@ -57,6 +160,13 @@ class GroupSpecification(BaseSpecification):
             return self.settings.matrix
         return None
 
+    @cached_property
+    def matrix_constraints(self):
+        """The conditions of the valid matrix declarations, see `MatrixConstraints`."""
+        if self.settings:
+            return self.settings.matrix_constraints
+        return None
+
     @cached_property
     def matrix_space(self):
         if not self.matrix:
@@ -65,9 +175,186 @@ class GroupSpecification(BaseSpecification):
         space_size = 1
 
         for value in six.itervalues(self.matrix):
-            space_size *= len(value.to_numpy())
+            if value.is_distribution:
+                return MatrixConfig.INFINITE
+            # Python ints have an arbitrary precision
+            space_size *= value.length
         return space_size
 
+    @cached_property
+    def matrix_grid(self):
+        """The lazy grid of the matrix declarations, e.g. `self.matrix_grid[i]`."""
+        if not self.matrix:
+            raise PolyaxonConfigurationError('a grid requires a matrix definition.')
+        try:
+            return MatrixGrid(self.matrix, constraints=self.matrix_constraints)
+        except ValueError as e:
+            raise PolyaxonConfigurationError(e)
+
+    @cached_property
+    def n_experiments(self):
+        """The number of experiments of a random, quasi random or bo search."""
+        n_experiments = None
+        if self.settings:
+            search = self.settings.random_search or self.settings.quasi_random_search
+            if search:
+                n_experiments = search.n_experiments
+            elif self.settings.bo:
+                n_experiments = self.settings.bo.n_iterations
+        if not n_experiments:
+            raise PolyaxonConfigurationError(
+                'A random or bo search requires a number of experiments.')
+        return n_experiments
+
+    @cached_property
+    def quasi_random_design(self):
+        """The declarations of a quasi random search in columnar form."""
+        if self.search_algorithm != SearchAlgorithms.QUASI_RANDOM:
+            raise PolyaxonConfigurationError('A design requires a quasi random search.')
+        method = self.settings.quasi_random_search.method or QuasiRandomMethods.SOBOL
+        try:
+            sampler = MatrixQuasiSampler(
+                self.matrix,
+                method=method,
+                rand_generator=self.get_rand_generator(self.GROUP_STREAM),
+                constraints=self.matrix_constraints)
+            return sampler.sample(self.n_experiments)
+        except ValueError as e:
+            raise PolyaxonConfigurationError(e)
+
+    def sample_matrix(self, size=None, unique=False, rand_generator=None):
+        """Samples matrix declarations in columnar form, see `MatrixSampler.sample`.
+
+        The size defaults to the number of experiments of the random search.
+        Without a random generator and without `unique`, the sample is made of
+        the first `size` experiments of the random search, see `get_random_declarations`.
+        """
+        if not self.matrix:
+            raise PolyaxonConfigurationError('a sample requires a matrix definition.')
+        size = self.n_experiments if size is None else size
+        if rand_generator is None and not unique:
+            return self.get_random_columns(0, size)
+        sampler = MatrixSampler(
+            self.matrix, rand_generator=rand_generator, constraints=self.matrix_constraints)
+        return sampler.sample(size=size, unique=unique)
+
+    def get_random_block(self, block):
+        """Returns the declarations, in columnar form, of a block of `RANDOM_BLOCK_SIZE`
+        experiments of a random search, sampled at once from the block's own stream.
+
+        The last sampled block is kept, since consecutive experiments share it.
+        """
+        cached_block = getattr(self, '_random_block', None)
+        if cached_block is not None and cached_block[0] == block:
+            return cached_block[1]
+        sampler = MatrixSampler(self.matrix,
+                                rand_generator=self.get_rand_generator(self.BLOCK_STREAM, block),
+                                constraints=self.matrix_constraints)
+        columns = sampler.sample(size=self.RANDOM_BLOCK_SIZE)
+        self._random_block = block, columns
+        return columns
+
+    def iter_random_blocks(self, start, stop):
+        """Yields the columns of the experiments `start` to `stop` of a random search,
+        one slice of a block at a time.
+        """
+        block_size = self.RANDOM_BLOCK_SIZE
+        for block in six.moves.range(start // block_size, -(-stop // block_size)):
+            columns = self.get_random_block(block)
+            block_start = max(start - block * block_size, 0)
+            block_stop = min(stop - block * block_size, block_size)
+            if len(next(six.itervalues(columns))) < block_stop:
+                # The invalid declarations could not all be replaced
+                raise PolyaxonConfigurationError(
+                    'Not enough valid matrix declarations were sampled, '
+                    'the matrix constraints are too strict.')
+            yield OrderedDict((key, values[block_start:block_stop])
+                              for key, values in six.iteritems(columns))
+
+    def get_random_columns(self, start, stop):
+        """Returns the declarations of the experiments `start` to `stop`
+        of a random search in columnar form.
+        """
+        columns = None
+        for block_columns in self.iter_random_blocks(start, stop):
+            columns = concatenate_columns(columns, block_columns)
+        if columns is None:
+            return OrderedDict((key, np.empty(0)) for key in sorted(self.matrix))
+        return columns
+
+    def get_random_declarations(self, start, stop):
+        """Returns an iterator over the matrix declarations of the experiments
+        `start` to `stop` of a random search.
+
+        The search is split in blocks of `RANDOM_BLOCK_SIZE` experiments, each one
+        sampled with one vectorized draw from a stream derived from the seed and the block,
+        so a declaration only depends on the seed and the index of its experiment.
+        """
+        for columns in self.iter_random_blocks(start, stop):
+            for declaration in MatrixSampler.to_declarations(columns):
+                yield declaration
+
+    @cached_property
+    def search_seed(self):
+        """The seed of the search, if not set, it's derived from the specification content."""
+        seed = self.settings.seed if self.settings else None
+        if seed is None:
+            seed = int(self.fingerprint[:8], 16)
+        return seed % 2 ** 32
+
+    def get_rand_generator(self, *keys):
+        """Returns the random generator of a stream derived from the search seed,
+        e.g. `self.get_rand_generator(self.BLOCK_STREAM, block)`.
+        """
+        return get_rand_generator(self.search_seed, *keys)
+
+    def get_experiment_declaration(self, index):
+        """Returns the matrix declaration of the experiment at `index` of the search.
+
+        The declaration is recreated on demand, for the other searches than grid and
+        quasi random, it is taken from the block of the random search that contains it,
+        see `get_random_declarations`, i.e. it only depends on the seed and the index.
+        """
+        search_algorithm = self.search_algorithm
+        if search_algorithm == SearchAlgorithms.GRID:
+            return self.matrix_grid[index]
+        if search_algorithm in {SearchAlgorithms.RANDOM, SearchAlgorithms.QUASI_RANDOM}:
+            if not 0 <= index < self.n_experiments:
+                raise IndexError('Experiment index out of range.')
+        elif index < 0:
+            raise IndexError('Experiment index out of range.')
+        if search_algorithm == SearchAlgorithms.QUASI_RANDOM:
+            design = self.quasi_random_design
+            if index >= len(next(six.itervalues(design))):
+                # A constrained Latin hypercube design can be smaller
+                raise IndexError('Experiment index out of range.')
+            return {key: values[index] for key, values in six.iteritems(design)}
+        return next(self.get_random_declarations(index, index + 1))
+
+    def get_matrix_declarations(self, shard=0, num_shards=1):
+        """Returns an iterator over the matrix declarations of a shard of the search space.
+
+        Shards are disjoint and balanced, and each one is computed independently,
+        i.e. several schedulers can each generate the experiments of their shard.
+        A grid search is split in ranges of the grid, and a (quasi) random search in ranges
+        of experiments, each one recreated from the seed and its index,
+        so the declarations do not depend on the number of shards.
+        """
+        search_algorithm = self.search_algorithm
+        if search_algorithm == SearchAlgorithms.GRID:
+            return self.matrix_grid.iter_shard(shard, num_shards)
+
+        if search_algorithm in {SearchAlgorithms.RANDOM, SearchAlgorithms.QUASI_RANDOM}:
+            if search_algorithm == SearchAlgorithms.RANDOM:
+                start, stop = get_shard_range(self.n_experiments, shard, num_shards)
+                return self.get_random_declarations(start, stop)
+            size = len(next(six.itervalues(self.quasi_random_design)))
+            start, stop = get_shard_range(size, shard, num_shards)
+            return (self.get_experiment_declaration(i) for i in six.moves.range(start, stop))
+
+        raise PolyaxonConfigurationError(
+            'The search algorithm `{}` cannot be sharded.'.format(search_algorithm))
+
     @cached_property
     def early_stopping(self):
         early_stopping = None
@@ -75,17 +362,61 @@ class GroupSpecification(BaseSpecification):
             early_stopping = self.settings.early_stopping
         return early_stopping or []
 
+    @cached_property
+    def early_stopping_evaluator(self):
+        """The evaluator of the early stopping conditions, see `EarlyStoppingEvaluator`."""
+        return EarlyStoppingEvaluator(self.early_stopping)
+
     @cached_property
     def search_algorithm(self):
         if not self.matrix:
             raise PolyaxonConfigurationError('a search algorithm requires a matrix definition.')
         if self.settings.random_search:
             return SearchAlgorithms.RANDOM
+        if self.settings.quasi_random_search:
+            return SearchAlgorithms.QUASI_RANDOM
         if self.settings.hyperband:
             return SearchAlgorithms.HYPERBAND
+        if self.settings.asha:
+            return SearchAlgorithms.ASHA
+        if self.settings.bo:
+            return SearchAlgorithms.BO
         # Default value
         return SearchAlgorithms.GRID
 
+    @cached_property
+    def hyperband_planner(self):
+        """The brackets and rungs of a hyperband search, see `HyperBandPlanner`."""
+        if self.search_algorithm != SearchAlgorithms.HYPERBAND:
+            raise PolyaxonConfigurationError('A hyperband planner requires a hyperband search.')
+        try:
+            return self.settings.hyperband.get_planner()
+        except ValueError as e:
+            raise PolyaxonConfigurationError(e)
+
+    def get_asha_scheduler(self):
+        """Returns a new scheduler for an asha search, see `ASHAScheduler`."""
+        if self.search_algorithm != SearchAlgorithms.ASHA:
+            raise PolyaxonConfigurationError('An asha scheduler requires an asha search.')
+        try:
+            return self.settings.asha.get_scheduler()
+        except ValueError as e:
+            raise PolyaxonConfigurationError(e)
+
+    def get_bayesian_optimizer(self):
+        """Returns a new optimizer for a bo search, see `BayesianOptimizer`."""
+        if self.search_algorithm != SearchAlgorithms.BO:
+            raise PolyaxonConfigurationError('A bayesian optimizer requires a bo search.')
+        bo = self.settings.bo
+        return BayesianOptimizer(self.matrix,
+                                 optimization=bo.metric.optimization or Optimization.MAXIMIZE,
+                                 n_initial_trials=bo.n_initial_trials or 5,
+                                 n_iterations=bo.n_iterations,
+                                 n_candidates=bo.n_candidates or 1000,
+                                 xi=0.01 if bo.xi is None else bo.xi,
+                                 rand_generator=self.get_rand_generator(self.GROUP_STREAM),
+                                 constraints=self.matrix_constraints)
+
     @cached_property
     def concurrent_experiments(self):
         concurrent_experiments = None
@@ -107,4 +438,22 @@ class GroupSpecification(BaseSpecification):
         if not self.matrix:
             return {}
 
-        return {k: v.to_numpy()[0] for k, v in six.iteritems(self.matrix)}
+        rand_generator = self.get_rand_generator(self.GROUP_STREAM)
+        if self.matrix_constraints:
+            # The first valid declaration of the grid, or of a sample
+            if self.matrix_space != MatrixConfig.INFINITE:
+                declaration = next(iter(self.matrix_grid), None)
+            else:
+                sampler = MatrixSampler(
+                    self.matrix, rand_generator=rand_generator, constraints=self.matrix_constraints)
+                declarations = sampler.sample_declarations(1)
+                declaration = declarations[0] if declarations else None
+            if declaration is None:
+                raise PolyaxonConfigurationError(
+                    'No matrix declaration satisfies the matrix constraints.')
+            return declaration
+
+        return {
+            k: v.sample(rand_generator=rand_generator) if v.is_distribution else v.get_value(0)
+            for k, v in six.iteritems(self.matrix)
+        }
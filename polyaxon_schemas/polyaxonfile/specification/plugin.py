@@ -24,10 +24,6 @@ class PluginSpecification(BaseSpecification):
             raise PolyaxonConfigurationError(
                 'Plugin specification must contain a valid `run` section.')
 
-    @cached_property
-    def parsed_data(self):
-        return self._parsed_data
-
     @cached_property
     def validated_data(self):
         return self._validated_data
@@ -1,9 +1,19 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function
 
+import datetime
+import hashlib
+import json
+import numpy as np
 import six
+import threading
 
-from collections import Mapping
+from collections import Mapping, OrderedDict
+
+from polyaxon_schemas.exceptions import PolyaxonfileError
+
+# The scalar types with a canonical json form
+CANONICAL_TYPES = six.string_types + six.integer_types + (float, type(None))
 
 
 def deep_update(config, override_config):
@@ -20,6 +30,101 @@ def deep_update(config, override_config):
     return config
 
 
+def to_canonical(value):
+    """Converts a parsed value to a canonical json serializable form.
+
+    Raises `PolyaxonfileError` for values without a canonical form,
+    since their fingerprint could differ between processes.
+    """
+    if isinstance(value, Mapping):
+        return {six.text_type(k): to_canonical(v) for k, v in six.iteritems(value)}
+    if isinstance(value, (list, tuple)):
+        return [to_canonical(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(to_canonical(v) for v in value)
+    if isinstance(value, np.ndarray):
+        return to_canonical(value.tolist())
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, 'to_dict'):
+        return to_canonical(value.to_dict())
+    if isinstance(value, (datetime.date, datetime.time)):
+        # e.g. dates read from yaml
+        return value.isoformat()
+    if isinstance(value, CANONICAL_TYPES):
+        return value
+    raise PolyaxonfileError(
+        'The value `{}` of type `{}` has no canonical form.'.format(
+            value, value.__class__.__name__))
+
+
+def get_fingerprint(value):
+    """Returns a stable hash of the canonical form of a value."""
+    content = json.dumps(to_canonical(value), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def get_section_fingerprint(value, subtree_fingerprints=None):
+    """Returns the fingerprint of a section from the fingerprints of its top level subtrees.
+
+    Args:
+        value: the parsed section.
+        subtree_fingerprints: `dict`. The already known fingerprints of some subtrees.
+    """
+    if not isinstance(value, Mapping):
+        return get_fingerprint(value)
+
+    subtree_fingerprints = subtree_fingerprints or {}
+    return get_fingerprint({
+        key: subtree_fingerprints.get(key) or get_fingerprint(subtree_value)
+        for key, subtree_value in six.iteritems(value)
+    })
+
+
+class DeclarationsScope(Mapping):
+    """A read-only layered view of declarations, similar to `collections.ChainMap`.
+
+    Lookups go through the layers in order, the first layer has the highest priority.
+    Creating a nested scope is O(1) and never copies the declarations.
+    """
+    def __init__(self, *maps):
+        self.maps = list(maps) or [{}]
+
+    @classmethod
+    def wrap(cls, declarations):
+        if isinstance(declarations, cls):
+            return declarations
+        return cls(declarations if declarations is not None else {})
+
+    def __getitem__(self, key):
+        for mapping in self.maps:
+            try:
+                return mapping[key]
+            except KeyError:
+                pass
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return any(key in mapping for mapping in self.maps)
+
+    def __iter__(self):
+        return iter(set().union(*self.maps))
+
+    def __len__(self):
+        return len(set().union(*self.maps))
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, ', '.join(repr(m) for m in self.maps))
+
+    def new_child(self, values=None):
+        """Returns a scope where `values` override the current declarations."""
+        return self.__class__(values if values is not None else {}, *self.maps)
+
+    def new_defaults(self, values):
+        """Returns a scope where `values` are only used if not already declared."""
+        return self.__class__(*(self.maps + [values]))
+
+
 class cached_property(object):  # noqa
     """
     Decorator that converts a method with a single self argument into a
@@ -38,3 +143,50 @@ class cached_property(object):  # noqa
             return self
         res = instance.__dict__[self.name] = self.func(instance)
         return res
+
+
+class LRUCache(object):
+    """A bounded, thread-safe, least recently used cache.
+
+    Keeps track of the number of hits and misses to allow monitoring the cache efficiency.
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get_or_set(self, key, factory):
+        """Returns the cached value for `key`, or creates it by calling `factory(key)`."""
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+                self.hits += 1
+            except KeyError:
+                self.misses += 1
+                value = factory(key)
+                if len(self._data) >= self.maxsize:
+                    self._data.popitem(last=False)
+            self._data[key] = value
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'maxsize': self.maxsize,
+            'size': len(self._data),
+        }
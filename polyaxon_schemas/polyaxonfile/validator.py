@@ -26,19 +26,32 @@ def validate_headers(spec, data):
     return validated_data
 
 
+def get_section_configs(spec):
+    """Returns the validated sections and their config classes, in their validation order."""
+    return (
+        (spec.ENVIRONMENT, EnvironmentConfig),
+        (spec.RUN_EXEC, RunExecConfig),
+        (spec.MODEL, ModelConfig),
+        (spec.TRAIN, TrainConfig),
+        (spec.EVAL, EvalConfig),
+    )
+
+
+def validate_section(spec, section, data):
+    """Validates the data of one section and creates its config object."""
+    config = dict(get_section_configs(spec)).get(section)
+    if config is None or not data:
+        return None
+    return config.from_dict(copy.deepcopy(data))
+
+
 def validate(spec, data):
     """Validates the data and creates the config objects"""
     data = copy.deepcopy(data)
     validated_data = {}
 
-    def add_validated_section(section, config):
+    for section, config in get_section_configs(spec):
         if data.get(section):
             validated_data[section] = config.from_dict(data[section])
 
-    add_validated_section(spec.ENVIRONMENT, EnvironmentConfig)
-    add_validated_section(spec.RUN_EXEC, RunExecConfig)
-    add_validated_section(spec.MODEL, ModelConfig)
-    add_validated_section(spec.TRAIN, TrainConfig)
-    add_validated_section(spec.EVAL, EvalConfig)
-
     return validated_data
@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function
+
+import datetime
+import keyword
+import re
+import six
+import threading
+import time
+import uuid
+
+from collections import Mapping, OrderedDict
+from dateutil import tz
+
+from marshmallow import Schema, ValidationError, fields
+from marshmallow.decorators import POST_DUMP, POST_LOAD
+from marshmallow.utils import from_iso, isoformat, missing
+
+from polyaxon_schemas.exceptions import PolyaxonSchemaError
+from polyaxon_schemas.utils import UUID
+
+
+class CompiledSchemaFallback(Exception):
+    """Raised by the compiled functions when a value requires the marshmallow path."""
+    pass
+
+
+def _to_uuid(value):
+    try:
+        return uuid.UUID(value)
+    except (ValueError, AttributeError, TypeError):
+        raise CompiledSchemaFallback()
+
+
+# The canonical strings of `datetime.isoformat`, e.g. `2018-01-01T10:00:00.123456+00:00`
+_ISOFORMAT_RE = re.compile(r'^([0-9]{4})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})'
+                           r'(?:\.([0-9]{6}))?(?:([+-])([0-9]{2}):([0-9]{2}))?\Z')
+
+
+def _from_isoformat(value):
+    """Parses a canonical `isoformat` string, or returns `None` for the other strings.
+
+    The time zones are the ones returned by the dateutil parser used by marshmallow.
+    """
+    match = _ISOFORMAT_RE.match(value)
+    if match is None:
+        return None
+    values = match.groups()
+    tzinfo = None
+    if values[7]:
+        offset = int(values[8]) * 3600 + int(values[9]) * 60
+        if offset:
+            tzinfo = tz.tzoffset(None, -offset if values[7] == '-' else offset)
+        elif 'UTC' in time.tzname:
+            # The zero offsets are named `UTC`, i.e. the local time zone if it has this name
+            tzinfo = tz.tzlocal()
+        else:
+            tzinfo = tz.tzutc()
+    value = datetime.datetime(*[int(v or 0) for v in values[:7]], tzinfo=tzinfo)
+    if tzinfo is not None and not offset and value.tzname() != 'UTC':
+        value = value.replace(tzinfo=tz.tzutc())
+    return value
+
+
+def _from_iso(value):
+    try:
+        result = _from_isoformat(value)
+        return from_iso(value) if result is None else result
+    except (ValueError, AttributeError, TypeError):
+        raise CompiledSchemaFallback()
+
+
+def _is_identifier(name):
+    return re.match(r'^[A-Za-z_][A-Za-z0-9_]*\Z', name) and not keyword.iskeyword(name)
+
+
+class SchemaCompiler(object):
+    """Generates the straight-line dump and load functions of a schema from its declared fields.
+
+    The generated functions only handle the common values of each field,
+    e.g. a `datetime` for a `DateTime` field or a `dict` for a `Dict` field,
+    and raise `CompiledSchemaFallback` for any other value, so that the caller
+    can use marshmallow, which then returns the same result or raises the same errors.
+
+    Only the schemas with `Str`, `Int`, `Float`, `Bool`, `Dict`, `UUID`, `DateTime`,
+    and `Nested` fields, and with `post_load` and `post_dump` hooks, can be compiled.
+    """
+
+    DATEFORMATS = {None, 'iso', 'iso8601'}
+
+    def __init__(self, schema_cls, compiling=None):
+        self.schema_cls = schema_cls
+        self.compiling = (compiling or set()) | {schema_cls}
+        self.check_schema()
+        # A schema instance for the bound fields and hooks
+        self.schema = schema_cls()
+        self.namespace = {
+            'missing': missing,
+            'Mapping': Mapping,
+            'Fallback': CompiledSchemaFallback,
+            'dict_class': OrderedDict if self.schema.ordered else dict,
+            'text_type': six.text_type,
+            'int': int,
+            'float': float,
+            'dict': dict,
+            'list': list,
+            'tuple': tuple,
+            'OrderedDict': OrderedDict,
+            'datetime': datetime.datetime,
+            'UUIDType': uuid.UUID,
+            'isoformat': isoformat,
+            'to_uuid': _to_uuid,
+            'from_iso': _from_iso,
+        }
+        self._num_values = 0
+
+    def fail(self, message):
+        raise PolyaxonSchemaError('Schema `{}` cannot be compiled: {}.'.format(
+            self.schema_cls.__name__, message))
+
+    def check_schema(self):
+        schema_cls = self.schema_cls
+        opts = schema_cls.opts
+        if (set(opts.fields) | set(opts.additional)) - set(schema_cls._declared_fields):
+            self.fail('it has implicit fields')
+        if opts.exclude or opts.load_only or opts.dump_only:
+            self.fail('it has field options')
+        if schema_cls.get_attribute is not Schema.get_attribute or schema_cls.__accessor__:
+            self.fail('it has a custom accessor')
+        for (tag, pass_many), attr_names in six.iteritems(schema_cls.__processors__):
+            if not attr_names:
+                continue
+            if tag not in {POST_DUMP, POST_LOAD} or pass_many:
+                self.fail('it has `{}` hooks'.format(tag))
+            for attr_name in attr_names:
+                kwargs = getattr(schema_cls, attr_name).__marshmallow_kwargs__[(tag, pass_many)]
+                if kwargs.get('pass_original'):
+                    self.fail('its hooks require the original data')
+
+    def add_value(self, value, prefix):
+        """Adds a value to the namespace of the generated code and returns its name."""
+        self._num_values += 1
+        name = '{}_{}'.format(prefix, self._num_values)
+        self.namespace[name] = value
+        return name
+
+    def get_nested(self, field):
+        if field.only is not None or field.exclude:
+            self.fail('nested field `{}` has a projection'.format(field.name))
+        nested_cls = field.schema.__class__
+        if nested_cls in self.compiling:
+            self.fail('nested field `{}` is recursive'.format(field.name))
+        return get_compiled_functions(nested_cls, compiling=self.compiling)
+
+    def get_field_kind(self, field):
+        field_cls = field.__class__
+        if field_cls in {fields.String, fields.Integer, fields.Float, fields.Boolean,
+                         fields.Dict, fields.UUID, UUID, fields.Nested}:
+            if getattr(field, 'as_string', False):
+                self.fail('number field `{}` is dumped as a string'.format(field.name))
+            return field_cls
+        if field_cls in {fields.DateTime, fields.LocalDateTime}:
+            if field.dateformat not in self.DATEFORMATS:
+                self.fail('datetime field `{}` has a custom format'.format(field.name))
+            return field_cls
+        self.fail('field `{}` is a `{}`'.format(field.name, field_cls.__name__))
+
+    def get_attr_expression(self, attr):
+        if _is_identifier(attr):
+            return 'obj.{}'.format(attr)
+        return 'getattr(obj, {!r})'.format(attr)
+
+    def get_dump_lines(self, field):
+        """Returns the lines converting a non null `value` to its dumped value."""
+        kind = self.get_field_kind(field)
+        if kind is fields.String:
+            return ['if value.__class__ is not text_type: raise Fallback()']
+        if kind is fields.Integer:
+            return ['if value.__class__ is not int: raise Fallback()']
+        if kind is fields.Float:
+            return ['if value.__class__ is int: value = float(value)',
+                    'elif value.__class__ is not float: raise Fallback()']
+        if kind is fields.Boolean:
+            return ['if value is not True and value is not False: raise Fallback()']
+        if kind is fields.Dict:
+            return ['if value.__class__ is not dict and value.__class__ is not OrderedDict: '
+                    'raise Fallback()']
+        if kind in {fields.UUID, UUID}:
+            to_text = 'value.hex' if kind is UUID else 'str(value)'
+            return ['if value.__class__ is text_type: value = to_uuid(value)',
+                    'elif value.__class__ is not UUIDType: raise Fallback()',
+                    'value = {}'.format(to_text)]
+        if kind in {fields.DateTime, fields.LocalDateTime}:
+            return ['if value.__class__ is not datetime: raise Fallback()',
+                    'value = isoformat(value, localtime={})'.format(field.localtime)]
+        # Nested
+        dump = self.add_value(self.get_nested(field)[0], 'dump')
+        if field.many:
+            return ['if value.__class__ is not list: raise Fallback()',
+                    'value = [{}(item) for item in value]'.format(dump)]
+        return ['value = {}(value)'.format(dump)]
+
+    def get_load_lines(self, field):
+        """Returns the lines converting a non null `value` to its loaded value."""
+        kind = self.get_field_kind(field)
+        if kind is fields.String:
+            return ['if value.__class__ is not text_type: raise Fallback()']
+        if kind is fields.Integer:
+            return ['if value.__class__ is not int: raise Fallback()']
+        if kind is fields.Float:
+            return ['if value.__class__ is int: value = float(value)',
+                    'elif value.__class__ is not float: raise Fallback()']
+        if kind is fields.Boolean:
+            return ['if value is not True and value is not False: raise Fallback()']
+        if kind is fields.Dict:
+            return ['if not isinstance(value, Mapping): raise Fallback()']
+        if kind in {fields.UUID, UUID}:
+            return ['if value.__class__ is text_type: value = to_uuid(value)',
+                    'elif value.__class__ is not UUIDType: raise Fallback()']
+        if kind in {fields.DateTime, fields.LocalDateTime}:
+            return ['if value.__class__ is not text_type or not value: raise Fallback()',
+                    'value = from_iso(value)']
+        # Nested
+        load = self.add_value(self.get_nested(field)[1], 'load')
+        if field.many:
+            return ['if value.__class__ is not list and value.__class__ is not tuple: '
+                    'raise Fallback()',
+                    'value = [{}(item) for item in value]'.format(load)]
+        return ['if not isinstance(value, Mapping): raise Fallback()',
+                'value = {}(value)'.format(load)]
+
+    def get_hook_lines(self, tag):
+        lines = []
+        for attr_name in self.schema_cls.__processors__.get((tag, False), []):
+            hook = self.add_value(getattr(self.schema, attr_name), 'hook')
+            lines += ['result = {}(data)'.format(hook),
+                      'if result is not None: data = result']
+        return lines
+
+    def compile_dump(self, field_names=None):
+        lines = ['def dump(obj):', '    data = dict_class()']
+        for name, field in six.iteritems(self.schema.fields):
+            if field.load_only or (field_names is not None and name not in field_names):
+                continue
+            lines.append('    value = {}'.format(self.get_attr_expression(field.attribute or name)))
+            lines.append('    if value is not None:')
+            lines += ['        ' + line for line in self.get_dump_lines(field)]
+            lines.append('    data[{!r}] = value'.format(field.dump_to or name))
+        lines += ['    ' + line for line in self.get_hook_lines(POST_DUMP)]
+        lines.append('    return data')
+        return lines
+
+    def compile_load(self):
+        lines = ['def load(values):',
+                 '    if not isinstance(values, Mapping): raise Fallback()',
+                 '    data = dict_class()']
+        for name, field in six.iteritems(self.schema.fields):
+            if field.dump_only:
+                continue
+            if field.missing is not missing:
+                self.fail('field `{}` has a missing value'.format(name))
+            lines.append('    value = values.get({!r}, missing)'.format(name))
+            if field.load_from:
+                lines.append('    if value is missing: value = values.get({!r}, missing)'.format(
+                    field.load_from))
+            if field.required:
+                lines.append('    if value is missing: raise Fallback()')
+            lines.append('    if value is not missing:')
+            lines.append('        if value is not None:')
+            lines += ['            ' + line for line in self.get_load_lines(field)]
+            for validator in field.validators:
+                validate = self.add_value(validator, 'validate')
+                lines.append('            if {}(value) is False: raise Fallback()'.format(validate))
+            if not field.allow_none:
+                lines.append('        else: raise Fallback()')
+            lines.append('        data[{!r}] = value'.format(field.attribute or name))
+        lines += ['    ' + line for line in self.get_hook_lines(POST_LOAD)]
+        lines.append('    return data')
+        return lines
+
+    def compile(self):
+        """Returns the generated dump and load functions, and their source code."""
+        source = '\n'.join(self.compile_dump() + [''] + self.compile_load()) + '\n'
+        code = compile(source, '<compiled {}>'.format(self.schema_cls.__name__), 'exec')
+        six.exec_(code, self.namespace)
+        return self.namespace['dump'], self.namespace['load'], source
+
+    def compile_projection(self, field_names):
+        """Returns the generated dump of the fields `field_names` only, and its source code."""
+        source = '\n'.join(self.compile_dump(field_names)) + '\n'
+        code = compile(source, '<compiled {} projection>'.format(self.schema_cls.__name__), 'exec')
+        namespace = dict(self.namespace)
+        six.exec_(code, namespace)
+        return namespace['dump'], source
+
+
+_COMPILED_FUNCTIONS = {}
+_COMPILED_PROJECTIONS = {}
+_COMPILED_FUNCTIONS_LOCK = threading.RLock()
+
+
+def get_compiled_functions(schema_cls, compiling=None):
+    """Returns the generated `(dump, load, source)` of a schema, compiled once per class."""
+    try:
+        return _COMPILED_FUNCTIONS[schema_cls]
+    except KeyError:
+        pass
+    with _COMPILED_FUNCTIONS_LOCK:
+        if schema_cls not in _COMPILED_FUNCTIONS:
+            _COMPILED_FUNCTIONS[schema_cls] = SchemaCompiler(schema_cls, compiling).compile()
+        return _COMPILED_FUNCTIONS[schema_cls]
+
+
+def get_compiled_projection(schema_cls, only=None, exclude=()):
+    """Returns the generated `(dump, source)` of a projection of a schema,
+    i.e. of its `only` and `exclude` options, compiled once per projection.
+    """
+    key = (schema_cls, only, exclude)
+    try:
+        return _COMPILED_PROJECTIONS[key]
+    except KeyError:
+        pass
+    with _COMPILED_FUNCTIONS_LOCK:
+        if key not in _COMPILED_PROJECTIONS:
+            field_names = set(schema_cls._declared_fields if only is None else only)
+            _COMPILED_PROJECTIONS[key] = SchemaCompiler(schema_cls).compile_projection(
+                field_names - set(exclude))
+        return _COMPILED_PROJECTIONS[key]
+
+
+class CompiledSchema(object):
+    """The compiled dump and load of a schema, falling back to marshmallow when needed.
+
+    Args:
+        schema_cls: the `Schema` class to compile.
+        dump_fallback: the marshmallow dump of an object.
+        load_fallback: the marshmallow load of a value.
+        projection_fallback: the marshmallow dump of a projection of an object,
+            with the `only` and `exclude` keyword arguments.
+    """
+
+    FALLBACK_ERRORS = (CompiledSchemaFallback, ValidationError, AttributeError)
+
+    def __init__(self, schema_cls, dump_fallback, load_fallback, projection_fallback=None):
+        self.schema_cls = schema_cls
+        self._dump, self._load, self.source = get_compiled_functions(schema_cls)
+        self.dump_fallback = dump_fallback
+        self.load_fallback = load_fallback
+        self.projection_fallback = projection_fallback
+
+    def dump(self, obj):
+        try:
+            return self._dump(obj)
+        except self.FALLBACK_ERRORS:
+            return self.dump_fallback(obj)
+
+    def load(self, value):
+        try:
+            return self._load(value)
+        except self.FALLBACK_ERRORS:
+            return self.load_fallback(value)
+
+    def dump_projection(self, obj, only=None, exclude=()):
+        """Dumps the fields of a projection of the object, see `get_compiled_projection`."""
+        try:
+            return get_compiled_projection(self.schema_cls, only, exclude)[0](obj)
+        except self.FALLBACK_ERRORS:
+            return self.projection_fallback(obj, only=only, exclude=exclude)
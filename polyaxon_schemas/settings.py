@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function
 
+import heapq
+import jinja2
 import six
 
+from collections import namedtuple
+
 from marshmallow import (
     Schema,
     ValidationError,
@@ -15,8 +19,8 @@ from marshmallow import (
 
 from polyaxon_schemas.base import BaseConfig
 from polyaxon_schemas.logging import LoggingConfig, LoggingSchema
-from polyaxon_schemas.matrix import MatrixConfig
-from polyaxon_schemas.utils import EarlyStoppingPolicy, Optimization
+from polyaxon_schemas.matrix import MatrixConfig, MatrixConstraints
+from polyaxon_schemas.utils import EarlyStoppingPolicy, Optimization, QuasiRandomMethods
 
 
 class EarlyStoppingMetricSchema(Schema):
@@ -75,6 +79,31 @@ class RandomSearchConfig(BaseConfig):
         self.n_experiments = n_experiments
 
 
+class QuasiRandomSearchSchema(Schema):
+    n_experiments = fields.Int(allow_none=True, validate=validate.Range(min=1))
+    method = fields.Str(allow_none=True, validate=validate.OneOf(QuasiRandomMethods.VALUES))
+
+    class Meta:
+        ordered = True
+
+    @post_load
+    def make(self, data):
+        return QuasiRandomSearchConfig(**data)
+
+    @post_dump
+    def unmake(self, data):
+        return QuasiRandomSearchConfig.remove_reduced_attrs(data)
+
+
+class QuasiRandomSearchConfig(BaseConfig):
+    SCHEMA = QuasiRandomSearchSchema
+    IDENTIFIER = 'quasi_random_search'
+
+    def __init__(self, n_experiments, method=QuasiRandomMethods.SOBOL):
+        self.n_experiments = n_experiments
+        self.method = method
+
+
 class HyperBandSchema(Schema):
     max_iter = fields.Int(allow_none=True, validate=validate.Range(min=1))
     eta = fields.Int(allow_none=True, validate=validate.Range(min=0))
@@ -99,6 +128,246 @@ class HyperBandConfig(BaseConfig):
         self.max_iter = max_iter
         self.eta = eta
 
+    def get_planner(self):
+        return HyperBandPlanner(max_iter=self.max_iter, eta=self.eta or 3)
+
+
+class HyperBandPlanner(object):
+    """The brackets and rungs of a Hyperband search, precomputed from its config.
+
+    Brackets are indexed by iteration, the first one being the most exploratory,
+    i.e. the one with the most configurations and the least resources per configuration.
+    Each rung of a bracket keeps the best `1 / eta` of the configurations of the previous one,
+    and gives them `eta` times more resources.
+
+    Args:
+        max_iter: `int`. The maximum resources allocated to a configuration, e.g. epochs.
+        eta: `int`. The proportion of configurations discarded in each rung.
+    """
+
+    def __init__(self, max_iter, eta=3):
+        if max_iter < 1:
+            raise ValueError('Hyperband requires a positive max_iter.')
+        if eta < 2:
+            raise ValueError('Hyperband requires an eta higher than 1.')
+        self.max_iter = max_iter
+        self.eta = eta
+
+        # The largest s such that eta ** s <= max_iter, without float rounding issues of logs
+        self.s_max = 0
+        while eta ** (self.s_max + 1) <= max_iter:
+            self.s_max += 1
+        # The budget of each bracket
+        self.bracket_budget = (self.s_max + 1) * max_iter
+
+        self.brackets = []
+        self._rungs = {}
+        for bracket in range(self.s_max + 1):
+            s = self.s_max - bracket
+            n_configs = -(-(self.s_max + 1) * eta ** s // (s + 1))
+            rungs = []
+            for rung in range(s + 1):
+                rung_plan = (n_configs // eta ** rung, max_iter / eta ** (s - rung))
+                rungs.append(rung_plan)
+                self._rungs[(bracket, rung)] = rung_plan
+            self.brackets.append(rungs)
+
+    @property
+    def num_brackets(self):
+        return len(self.brackets)
+
+    def get_num_rungs(self, bracket):
+        return len(self.brackets[bracket])
+
+    def get_rung(self, bracket, rung):
+        """Returns the number of configurations and the resources of each one in a rung."""
+        return self._rungs[(bracket, rung)]
+
+    def get_next_rung(self, bracket, rung):
+        """Returns the number of configurations to promote and their resources
+        after a rung, or `None` if it is the last rung of its bracket."""
+        return self._rungs.get((bracket, rung + 1))
+
+    @property
+    def experiments_per_rung(self):
+        """The number of experiments created by each rung of each bracket."""
+        return [[n_configs for n_configs, _ in rungs] for rungs in self.brackets]
+
+    @property
+    def num_experiments(self):
+        return sum(n_configs for n_configs, _ in six.itervalues(self._rungs))
+
+    @property
+    def total_budget(self):
+        """The resources used by all the experiments of all the brackets."""
+        return sum(n_configs * resources for n_configs, resources in six.itervalues(self._rungs))
+
+    @property
+    def peak_concurrency(self):
+        """The maximum number of experiments of a rung, i.e. that can run concurrently
+        when brackets are run one after the other."""
+        return max(n_configs for n_configs, _ in six.itervalues(self._rungs))
+
+
+class ASHASchema(Schema):
+    max_iter = fields.Int(allow_none=True, validate=validate.Range(min=1))
+    min_iter = fields.Int(allow_none=True, validate=validate.Range(min=1))
+    eta = fields.Int(allow_none=True, validate=validate.Range(min=2))
+    n_experiments = fields.Int(allow_none=True, validate=validate.Range(min=1))
+    metric = fields.Nested(EarlyStoppingMetricSchema)
+
+    class Meta:
+        ordered = True
+
+    @post_load
+    def make(self, data):
+        return ASHAConfig(**data)
+
+    @post_dump
+    def unmake(self, data):
+        return ASHAConfig.remove_reduced_attrs(data)
+
+
+class ASHAConfig(BaseConfig):
+    """Asynchronous successive halving.
+
+    Args:
+        max_iter: `int`. The maximum resources allocated to a configuration, e.g. epochs.
+        metric: `EarlyStoppingMetricConfig`. The metric, and its optimization,
+            used to rank the configurations.
+        min_iter: `int`. The resources allocated to a configuration in the first rung.
+        eta: `int`. Only the best `1 / eta` of the configurations of a rung are promoted.
+        n_experiments: `int`. The number of configurations to create, unlimited if not set.
+    """
+    SCHEMA = ASHASchema
+    IDENTIFIER = 'asha'
+
+    def __init__(self, max_iter, metric, min_iter=1, eta=3, n_experiments=None):
+        self.max_iter = max_iter
+        self.metric = metric
+        self.min_iter = min_iter
+        self.eta = eta
+        self.n_experiments = n_experiments
+
+    def get_scheduler(self):
+        return ASHAScheduler(max_iter=self.max_iter,
+                             min_iter=self.min_iter or 1,
+                             eta=self.eta or 3,
+                             optimization=self.metric.optimization or Optimization.MAXIMIZE,
+                             n_experiments=self.n_experiments)
+
+
+ASHAJob = namedtuple('ASHAJob', ['experiment', 'rung', 'resources'])
+
+
+class ASHAScheduler(object):
+    """Decides the next job of an asynchronous successive halving search.
+
+    A configuration is promoted to the next rung as soon as it is in the best `1 / eta`
+    of the results reported to its rung, without waiting for the other configurations
+    of the rung, so that workers are never idle while a rung synchronizes.
+
+    Experiments are identified by the caller,
+    a job without experiment means that a new configuration must be created in the first rung.
+    """
+
+    def __init__(self, max_iter, min_iter=1, eta=3, optimization=Optimization.MAXIMIZE,
+                 n_experiments=None):
+        if not 1 <= min_iter <= max_iter:
+            raise ValueError('ASHA requires a min_iter between 1 and max_iter.')
+        if eta < 2:
+            raise ValueError('ASHA requires an eta higher than 1.')
+        self.max_iter = max_iter
+        self.min_iter = min_iter
+        self.eta = eta
+        self.maximize = Optimization.maximize(optimization)
+        self.n_experiments = n_experiments
+
+        # The number of rungs such that min_iter * eta ** (num_rungs - 1) <= max_iter
+        num_rungs = 1
+        while min_iter * eta ** num_rungs <= max_iter:
+            num_rungs += 1
+        self.num_rungs = num_rungs
+        # The results and the promoted experiments of each rung
+        self.results = [{} for _ in range(num_rungs)]
+        self.promoted = [set() for _ in range(num_rungs)]
+        self.num_created = 0
+
+    def get_resources(self, rung):
+        return self.min_iter * self.eta ** rung
+
+    def report(self, experiment, rung, value):
+        """Records the metric value of an experiment at the end of a rung."""
+        self.results[rung][experiment] = value
+
+    def get_promotable(self, rung):
+        """Returns an experiment of a rung that can be promoted, if any."""
+        results = self.results[rung]
+        num_promotable = len(results) // self.eta - len(self.promoted[rung])
+        if num_promotable <= 0:
+            return None
+        select = heapq.nlargest if self.maximize else heapq.nsmallest
+        top = select(len(results) // self.eta, results, key=results.get)
+        for experiment in top:
+            if experiment not in self.promoted[rung]:
+                return experiment
+        return None
+
+    def get_next_job(self):
+        """Returns the next job, a promotion from the highest possible rung,
+        a new configuration, or `None` if the search must wait for more results.
+        """
+        for rung in reversed(range(self.num_rungs - 1)):
+            experiment = self.get_promotable(rung)
+            if experiment is not None:
+                self.promoted[rung].add(experiment)
+                return ASHAJob(experiment, rung + 1, self.get_resources(rung + 1))
+
+        if self.n_experiments is None or self.num_created < self.n_experiments:
+            self.num_created += 1
+            return ASHAJob(None, 0, self.get_resources(0))
+        return None
+
+
+class BOSchema(Schema):
+    n_iterations = fields.Int(allow_none=True, validate=validate.Range(min=1))
+    n_initial_trials = fields.Int(allow_none=True, validate=validate.Range(min=1))
+    n_candidates = fields.Int(allow_none=True, validate=validate.Range(min=1))
+    xi = fields.Float(allow_none=True, validate=validate.Range(min=0))
+    metric = fields.Nested(EarlyStoppingMetricSchema)
+
+    class Meta:
+        ordered = True
+
+    @post_load
+    def make(self, data):
+        return BOConfig(**data)
+
+    @post_dump
+    def unmake(self, data):
+        return BOConfig.remove_reduced_attrs(data)
+
+
+class BOConfig(BaseConfig):
+    """Bayesian optimization.
+
+    Args:
+        n_iterations: `int`. The number of experiments suggested by the optimizer.
+        metric: `EarlyStoppingMetricConfig`. The metric, and its optimization, to optimize.
+        n_initial_trials: `int`. The number of random experiments before using the surrogate.
+        n_candidates: `int`. The number of candidates evaluated for each suggestion.
+        xi: `float`. The exploration of the expected improvement.
+    """
+    SCHEMA = BOSchema
+    IDENTIFIER = 'bo'
+
+    def __init__(self, n_iterations, metric, n_initial_trials=5, n_candidates=1000, xi=0.01):
+        self.n_iterations = n_iterations
+        self.metric = metric
+        self.n_initial_trials = n_initial_trials
+        self.n_candidates = n_candidates
+        self.xi = xi
+
 
 def validate_search_algorithm(algorithms):
     if sum([1 for f in algorithms if f is not None]) > 1:
@@ -116,6 +385,26 @@ def validate_matrix(matrix):
     return matrix_data
 
 
+def validate_constraints(constraints, matrix):
+    """Validates the matrix constraints and returns them compiled, see `MatrixConstraints`."""
+    if not constraints:
+        return None
+
+    if not matrix:
+        raise ValidationError('Matrix constraints require a matrix.')
+
+    try:
+        matrix_constraints = MatrixConstraints(constraints)
+    except jinja2.TemplateSyntaxError as e:
+        raise ValidationError('Matrix constraint is not valid: {}'.format(e))
+
+    unknown_variables = matrix_constraints.get_unknown_variables(matrix)
+    if unknown_variables:
+        raise ValidationError('Matrix constraints read unknown matrix keys: {}'.format(
+            ', '.join(sorted(unknown_variables))))
+    return matrix_constraints
+
+
 class SettingsSchema(Schema):
     logging = fields.Nested(LoggingSchema, allow_none=True)
     seed = fields.Int(allow_none=True)
@@ -124,6 +413,10 @@ class SettingsSchema(Schema):
     random_search = fields.Nested(RandomSearchSchema, allow_none=None)
     hyperband = fields.Nested(HyperBandSchema, allow_none=None)
     early_stopping = fields.Nested(EarlyStoppingMetricSchema, many=True, allow_none=True)
+    quasi_random_search = fields.Nested(QuasiRandomSearchSchema, allow_none=None)
+    asha = fields.Nested(ASHASchema, allow_none=None)
+    bo = fields.Nested(BOSchema, allow_none=None)
+    constraints = fields.List(fields.Str(), allow_none=True)
 
     class Meta:
         ordered = True
@@ -139,7 +432,10 @@ class SettingsSchema(Schema):
     @validates_schema
     def validate_quantity(self, data):
         validate_search_algorithm([data.get('random_search'),
+                                   data.get('quasi_random_search'),
                                    data.get('hyperband'),
+                                   data.get('asha'),
+                                   data.get('bo'),
                                    data.get('pytorch'),
                                    data.get('horovod')])
 
@@ -160,15 +456,25 @@ class SettingsConfig(BaseConfig):
                  concurrent_experiments=1,
                  random_search=None,
                  hyperband=None,
-                 early_stopping=None):
+                 early_stopping=None,
+                 quasi_random_search=None,
+                 asha=None,
+                 bo=None,
+                 constraints=None):
         self.logging = logging
         self.seed = seed
         matrix = validate_matrix(matrix)
         self.matrix = matrix
+        # The constraints are only validated, and compiled, once by the config
+        self.matrix_constraints = validate_constraints(constraints, matrix)
+        self.constraints = constraints if self.matrix_constraints else None
         self.concurrent_experiments = concurrent_experiments
-        validate_search_algorithm([random_search, hyperband])
+        validate_search_algorithm([random_search, quasi_random_search, hyperband, asha, bo])
         self.random_search = random_search
+        self.quasi_random_search = quasi_random_search
         self.hyperband = hyperband
+        self.asha = asha
+        self.bo = bo
         self.early_stopping = early_stopping
 
     @classmethod
@@ -157,10 +157,19 @@ class LogSpace(Range):
     KEYS = REQUIRED_KEYS + OPTIONAL_KEYS
 
 
+def uniform(low, high, size=None, rand_generator=None):
+    rand_generator = rand_generator or np.random
+    return rand_generator.uniform(low=low, high=high, size=size)
+
+
+def quantize(value, q):
+    return np.round(value // q) * q
+
+
 def quniform(low, high, q, size=None, rand_generator=None):
     rand_generator = rand_generator or np.random
     value = rand_generator.uniform(low=low, high=high, size=size)
-    return np.round(value // q) * q
+    return quantize(value, q)
 
 
 def loguniform(low, high, size=None, rand_generator=None):
@@ -171,13 +180,18 @@ def loguniform(low, high, size=None, rand_generator=None):
 
 def qloguniform(low, high, q, size=None, rand_generator=None):
     value = loguniform(low=low, high=high, size=size, rand_generator=rand_generator)
-    return np.round(value // q) * q
+    return quantize(value, q)
+
+
+def normal(loc, scale, size=None, rand_generator=None):
+    rand_generator = rand_generator or np.random
+    return rand_generator.normal(loc=loc, scale=scale, size=size)
 
 
 def qnormal(loc, scale, q, size=None, rand_generator=None):
     rand_generator = rand_generator or np.random
     draw = rand_generator.normal(loc=loc, scale=scale, size=size)
-    return np.round(draw // q) * q
+    return quantize(draw, q)
 
 
 def lognormal(loc, scale, size=None, rand_generator=None):
@@ -185,17 +199,163 @@ def lognormal(loc, scale, size=None, rand_generator=None):
     return rand_generator.lognormal(mean=loc, sigma=scale, size=size)
 
 
-def qlognormal(loc, scale, size=None, rand_generator=None):
+def qlognormal(loc, scale, q, size=None, rand_generator=None):
     draw = lognormal(loc=loc, scale=scale, size=size, rand_generator=rand_generator)
-    return np.exp(draw)
+    return quantize(draw, q)
+
+
+# Coefficients of the rational approximations of the normal quantile function by P. Acklam,
+# with a relative error lower than 1.15e-9
+_NORM_PPF_A = [-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+               1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00]
+_NORM_PPF_B = [-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+               6.680131188771972e+01, -1.328068155288572e+01, 1.]
+_NORM_PPF_C = [-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+               -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00]
+_NORM_PPF_D = [7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+               3.754408661907416e+00, 1.]
+_NORM_PPF_LOW = 0.02425
+
+
+def norm_ppf(quantiles):
+    """The quantile function, i.e. inverse CDF, of the standard normal distribution."""
+    quantiles = np.asarray(quantiles, dtype=np.float64)
+    values = np.empty_like(quantiles)
+    low = quantiles < _NORM_PPF_LOW
+    high = quantiles > 1 - _NORM_PPF_LOW
+    central = ~(low | high)
+
+    r = quantiles[central] - 0.5
+    t = r * r
+    values[central] = (np.polyval(_NORM_PPF_A, t) * r) / np.polyval(_NORM_PPF_B, t)
+    t = np.sqrt(-2 * np.log(quantiles[low]))
+    values[low] = np.polyval(_NORM_PPF_C, t) / np.polyval(_NORM_PPF_D, t)
+    t = np.sqrt(-2 * np.log(1 - quantiles[high]))
+    values[high] = -np.polyval(_NORM_PPF_C, t) / np.polyval(_NORM_PPF_D, t)
+    return values
+
+
+# Coefficients of the approximation of the error function by Abramowitz and Stegun (7.1.26),
+# with an absolute error lower than 1.5e-7
+_ERF_P = 0.3275911
+_ERF_A = [1.061405429, -1.453152027, 1.421413741, -0.284496736, 0.254829592, 0.]
+
+
+def norm_cdf(values):
+    """The CDF of the standard normal distribution."""
+    x = np.asarray(values, dtype=np.float64) / np.sqrt(2)
+    t = 1. / (1. + _ERF_P * np.abs(x))
+    erf = 1. - np.polyval(_ERF_A, t) * np.exp(-x * x)
+    return 0.5 * (1. + np.sign(x) * erf)
+
+
+def norm_pdf(values):
+    """The PDF of the standard normal distribution."""
+    values = np.asarray(values, dtype=np.float64)
+    return np.exp(-0.5 * values * values) / np.sqrt(2 * np.pi)
+
+
+# The primitive polynomials, as degree and coefficients, and the initial direction numbers
+# of the dimensions, after the first one, of Sobol sequences from S. Joe and F. Kuo
+SOBOL_DIRECTIONS = [
+    (1, 0, [1]),
+    (2, 1, [1, 3]),
+    (3, 1, [1, 3, 1]),
+    (3, 2, [1, 1, 1]),
+    (4, 1, [1, 1, 3, 3]),
+    (4, 4, [1, 3, 5, 13]),
+    (5, 2, [1, 1, 5, 5, 17]),
+    (5, 4, [1, 1, 5, 5, 5]),
+    (5, 7, [1, 1, 7, 11, 19]),
+    (5, 11, [1, 1, 5, 1, 1]),
+    (5, 13, [1, 1, 1, 3, 11]),
+    (5, 14, [1, 3, 5, 5, 31]),
+    (6, 1, [1, 3, 3, 9, 7, 49]),
+    (6, 13, [1, 1, 1, 15, 21, 21]),
+    (6, 16, [1, 3, 1, 13, 27, 49]),
+    (6, 19, [1, 1, 1, 15, 7, 5]),
+    (6, 22, [1, 3, 1, 15, 13, 25]),
+    (6, 25, [1, 1, 5, 5, 19, 61]),
+    (7, 1, [1, 3, 7, 11, 23, 15, 103]),
+    (7, 4, [1, 3, 7, 13, 13, 15, 69]),
+]
+SOBOL_MAX_DIMENSIONS = len(SOBOL_DIRECTIONS) + 1
+SOBOL_BITS = 32
+
+
+def get_sobol_directions(dimensions):
+    """Returns the direction numbers of the dimensions of a Sobol sequence as integers."""
+    directions = np.zeros((dimensions, SOBOL_BITS), dtype=np.uint64)
+    directions[0] = [1 << (SOBOL_BITS - 1 - j) for j in range(SOBOL_BITS)]
+    for dimension in range(1, dimensions):
+        degree, coefficients, initial_numbers = SOBOL_DIRECTIONS[dimension - 1]
+        numbers = [m << (SOBOL_BITS - 1 - j) for j, m in enumerate(initial_numbers)]
+        for j in range(degree, SOBOL_BITS):
+            number = numbers[j - degree] ^ (numbers[j - degree] >> degree)
+            for k in range(1, degree):
+                if (coefficients >> (degree - 1 - k)) & 1:
+                    number ^= numbers[j - k]
+            numbers.append(number)
+        directions[dimension] = numbers
+    return directions
+
+
+def sobol(size, dimensions, start=0, shift=None):
+    """Returns the `size` points of a Sobol sequence from index `start` in the unit hypercube.
+
+    The sequence can be scrambled with a digital `shift`, an integer below `2 ** SOBOL_BITS`
+    for each dimension. The points are centered in their cells, i.e. never 0 or 1.
+    """
+    if not 0 < dimensions <= SOBOL_MAX_DIMENSIONS:
+        raise ValueError('Sobol sequences support 1 to {} dimensions, received {}.'.format(
+            SOBOL_MAX_DIMENSIONS, dimensions))
+    directions = get_sobol_directions(dimensions)
+    indices = np.arange(start, start + size, dtype=np.uint64)
+    gray_codes = indices ^ (indices >> np.uint64(1))
+    points = np.zeros((size, dimensions), dtype=np.uint64)
+    for j in range(SOBOL_BITS):
+        bits = ((gray_codes >> np.uint64(j)) & np.uint64(1)).astype(bool)
+        points[bits] ^= directions[:, j]
+    if shift is not None:
+        points ^= np.asarray(shift, dtype=np.uint64)
+    return (points + 0.5) / 2 ** SOBOL_BITS
+
+
+def latin_hypercube(size, dimensions, rand_generator=None):
+    """Returns a Latin hypercube design of `size` points in the unit hypercube,
+    i.e. each dimension has exactly one point in each of `size` equal strata.
+    """
+    rand_generator = rand_generator or np.random
+    strata = np.argsort(rand_generator.uniform(size=(dimensions, size)), axis=1).T
+    return (strata + rand_generator.uniform(size=(size, dimensions))) / size
+
+
+def get_rand_generator(seed, *keys):
+    """Returns a random generator for the stream identified by `keys` of a seed.
+
+    The streams of different keys, e.g. the indices of experiments, are independent,
+    and each one can be recreated from the seed and its keys alone.
+    """
+    return np.random.RandomState([seed % 2 ** 32] + [key % 2 ** 32 for key in keys])
+
+
+def to_object_array(values):
+    """Returns a 1-d object array of values, unlike `np.asarray` mixed types are not cast
+    to strings and lists are not converted to dimensions."""
+    array = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        array[i] = value
+    return array
 
 
 def pvalues(values, size=None, rand_generator=None):
     rand_generator = rand_generator or np.random
-    keys = list(six.iterkeys(values))
-    dists = list(six.itervalues(values))
-    indices = rand_generator.multinomial(1, dists, size=size)
-    return [keys[ind.argmax()] for ind in indices]
+    if isinstance(values, Mapping):
+        values = list(six.iteritems(values))
+    keys = to_object_array([value[0] for value in values])
+    dists = [value[1] for value in values]
+    indices = rand_generator.choice(len(keys), size=size, p=dists)
+    return keys[indices]
 
 
 class Uniform(Range):
@@ -204,8 +364,9 @@ class Uniform(Range):
 
 
 class QUniform(Range):
-    REQUIRED_KEYS = ['low', 'high', 'size']
-    KEYS = REQUIRED_KEYS
+    REQUIRED_KEYS = ['low', 'high', 'q']
+    OPTIONAL_KEYS = ['size']
+    KEYS = REQUIRED_KEYS + OPTIONAL_KEYS
 
 
 class LogUniform(Range):
@@ -214,8 +375,9 @@ class LogUniform(Range):
 
 
 class QLogUniform(Range):
-    REQUIRED_KEYS = ['low', 'high', 'size']
-    KEYS = REQUIRED_KEYS
+    REQUIRED_KEYS = ['low', 'high', 'q']
+    OPTIONAL_KEYS = ['size']
+    KEYS = REQUIRED_KEYS + OPTIONAL_KEYS
 
 
 class Normal(Range):
@@ -224,8 +386,9 @@ class Normal(Range):
 
 
 class QNormal(Range):
-    REQUIRED_KEYS = ['loc', 'scale', 'size']
-    KEYS = REQUIRED_KEYS
+    REQUIRED_KEYS = ['loc', 'scale', 'q']
+    OPTIONAL_KEYS = ['size']
+    KEYS = REQUIRED_KEYS + OPTIONAL_KEYS
 
 
 class LogNormal(Range):
@@ -234,8 +397,9 @@ class LogNormal(Range):
 
 
 class QLogNormal(Range):
-    REQUIRED_KEYS = ['start', 'stop', 'size']
-    KEYS = REQUIRED_KEYS
+    REQUIRED_KEYS = ['loc', 'scale', 'q']
+    OPTIONAL_KEYS = ['size']
+    KEYS = REQUIRED_KEYS + OPTIONAL_KEYS
 
 
 class StrOrFct(fields.Str):
@@ -333,13 +497,20 @@ TIME_ZONE = timezone('UTC')
 class SearchAlgorithms(object):
     GRID = 'grid'
     RANDOM = 'random'
+    QUASI_RANDOM = 'quasi_random'
     HYPERBAND = 'hyperband'
+    ASHA = 'asha'
+    BO = 'bo'
 
     GRID_VALUES = [GRID, GRID.upper(), GRID.capitalize()]
     RANDOM_VALUES = [RANDOM, RANDOM.upper(), RANDOM.capitalize()]
+    QUASI_RANDOM_VALUES = [QUASI_RANDOM, QUASI_RANDOM.upper(), QUASI_RANDOM.capitalize()]
     HYPERBAND_VALUES = [HYPERBAND, HYPERBAND.upper(), HYPERBAND.capitalize()]
+    ASHA_VALUES = [ASHA, ASHA.upper(), ASHA.capitalize()]
+    BO_VALUES = [BO, BO.upper(), BO.capitalize()]
 
-    VALUES = GRID_VALUES + RANDOM_VALUES + HYPERBAND_VALUES
+    VALUES = (GRID_VALUES + RANDOM_VALUES + QUASI_RANDOM_VALUES + HYPERBAND_VALUES +
+              ASHA_VALUES + BO_VALUES)
 
     @classmethod
     def is_grid(cls, value):
@@ -349,10 +520,41 @@ class SearchAlgorithms(object):
     def is_random(cls, value):
         return value in cls.RANDOM_VALUES
 
+    @classmethod
+    def is_quasi_random(cls, value):
+        return value in cls.QUASI_RANDOM_VALUES
+
     @classmethod
     def is_hyperband(cls, value):
         return value in cls.HYPERBAND_VALUES
 
+    @classmethod
+    def is_asha(cls, value):
+        return value in cls.ASHA_VALUES
+
+    @classmethod
+    def is_bo(cls, value):
+        return value in cls.BO_VALUES
+
+
+class QuasiRandomMethods(object):
+    SOBOL = 'sobol'
+    LATIN_HYPERCUBE = 'latin_hypercube'
+
+    SOBOL_VALUES = [SOBOL, SOBOL.upper(), SOBOL.capitalize()]
+    LATIN_HYPERCUBE_VALUES = [
+        LATIN_HYPERCUBE, LATIN_HYPERCUBE.upper(), LATIN_HYPERCUBE.capitalize()]
+
+    VALUES = SOBOL_VALUES + LATIN_HYPERCUBE_VALUES
+
+    @classmethod
+    def is_sobol(cls, value):
+        return value in cls.SOBOL_VALUES
+
+    @classmethod
+    def is_latin_hypercube(cls, value):
+        return value in cls.LATIN_HYPERCUBE_VALUES
+
 
 class Optimization(object):
     MAXIMIZE = 'maximize'
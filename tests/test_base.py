@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function
+
+import copy
+import pickle
+import threading
+import uuid
+
+from unittest import TestCase
+
+from marshmallow import ValidationError
+from mock import patch
+from tests.utils import get_job_dict
+
+from polyaxon_schemas.base import BaseConfig, SchemaCache, get_schema_slots
+from polyaxon_schemas.environments import K8SResourcesConfig, K8SResourcesSchema
+from polyaxon_schemas.exceptions import PolyaxonSchemaError
+from polyaxon_schemas.experiment import (
+    ExperimentConfig,
+    ExperimentJobConfig,
+    ExperimentJobSchema,
+    ExperimentMetricConfig,
+    ExperimentStatusConfig,
+    ExperimentStatusSchema
+)
+from polyaxon_schemas.layers.wrappers import TimeDistributedConfig
+from polyaxon_schemas.operators import ForConfig, ForSchema
+from polyaxon_schemas.schema_compiler import get_compiled_projection
+from polyaxon_schemas.utils import local_now
+
+
+class TestSchemaCache(TestCase):
+    def setUp(self):
+        self.cache = SchemaCache()
+
+    def test_reuses_released_schemas(self):
+        schema = self.cache.acquire(K8SResourcesSchema)
+        assert schema.strict is True
+        assert schema.many is False
+        self.cache.release(schema)
+        assert self.cache.acquire(K8SResourcesSchema) is schema
+
+        many_schema = self.cache.acquire(K8SResourcesSchema, many=True)
+        assert many_schema.many is True
+        assert many_schema is not schema
+
+    def test_schemas_in_use_are_not_shared(self):
+        schema = self.cache.acquire(K8SResourcesSchema)
+        other_schema = self.cache.acquire(K8SResourcesSchema)
+        assert other_schema is not schema
+        self.cache.release(schema)
+        self.cache.release(other_schema)
+        assert {self.cache.acquire(K8SResourcesSchema),
+                self.cache.acquire(K8SResourcesSchema)} == {schema, other_schema}
+
+    def test_threads_have_their_own_schemas(self):
+        schema = self.cache.acquire(K8SResourcesSchema)
+        self.cache.release(schema)
+        schemas = []
+
+        def acquire():
+            schemas.append(self.cache.acquire(K8SResourcesSchema))
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        thread.join()
+        assert schemas[0] is not schema
+        assert self.cache.acquire(K8SResourcesSchema) is schema
+
+    def test_schemas_with_implicit_fields_are_not_cached(self):
+        assert self.cache.is_cacheable(K8SResourcesSchema) is True
+        assert self.cache.is_cacheable(ForSchema) is False
+        schema = self.cache.acquire(ForSchema)
+        self.cache.release(schema)
+        assert self.cache.acquire(ForSchema) is not schema
+
+    def test_clear(self):
+        schema = self.cache.acquire(K8SResourcesSchema)
+        self.cache.release(schema)
+        self.cache.clear()
+        assert self.cache.acquire(K8SResourcesSchema) is not schema
+
+
+class TestBaseConfigSchemaCache(TestCase):
+    def setUp(self):
+        BaseConfig.SCHEMA_CACHE.clear()
+
+    def test_configs_use_cached_schemas(self):
+        config_dict = {'cpu': {'requests': 1, 'limits': 2}}
+        config = K8SResourcesConfig.from_dict(config_dict['cpu'])
+        schema = BaseConfig.SCHEMA_CACHE.acquire(K8SResourcesSchema)
+        BaseConfig.SCHEMA_CACHE.release(schema)
+        assert K8SResourcesConfig.from_dict(config_dict['cpu']).to_dict() == config.to_dict()
+        assert BaseConfig.SCHEMA_CACHE.acquire(K8SResourcesSchema) is schema
+
+    def test_failed_schemas_are_not_reused(self):
+        K8SResourcesConfig.from_dict({'requests': 1})
+        schema = BaseConfig.SCHEMA_CACHE.acquire(K8SResourcesSchema)
+        BaseConfig.SCHEMA_CACHE.release(schema)
+        with self.assertRaises(ValidationError):
+            K8SResourcesConfig.from_dict({'requests': 'foo'})
+        assert BaseConfig.SCHEMA_CACHE.acquire(K8SResourcesSchema) is not schema
+
+    def test_nested_configs_of_the_same_class(self):
+        config_dict = {
+            'layer': {
+                'TimeDistributed': {
+                    'layer': {'Dense': {'units': 2}},
+                    'name': 'inner',
+                }
+            },
+            'name': 'outer',
+        }
+        config = TimeDistributedConfig.from_dict(config_dict)
+        assert config.name == 'outer'
+        assert config.layer.name == 'inner'
+        assert TimeDistributedConfig.from_dict(config.to_dict()).to_dict() == config.to_dict()
+
+    def test_implicit_fields_follow_each_object(self):
+        config_dict = {'len': 5, 'do': 'Value at {{ i }}', 'index': 'i'}
+        assert ForConfig.from_dict(config_dict).to_dict() == config_dict
+        config_dict['do'] = [{'Conv2D': {'strides': ['{{ i }}', '{{ i }}']}}]
+        assert ForConfig.from_dict(config_dict).to_dict() == config_dict
+
+
+class TestBaseConfigBulk(TestCase):
+    def test_from_dicts_and_to_dicts(self):
+        config_dicts = [get_job_dict(i) for i in range(5)]
+        configs = list(ExperimentJobConfig.from_dicts(config_dicts))
+        assert len(configs) == 5
+        assert all(isinstance(config, ExperimentJobConfig) for config in configs)
+        assert ([config.to_dict() for config in configs] ==
+                list(ExperimentJobConfig.to_dicts(configs)) ==
+                [ExperimentJobConfig.from_dict(d).to_dict() for d in config_dicts])
+
+        humanized_dicts = list(ExperimentJobConfig.to_dicts(configs, humanize_values=True))
+        assert humanized_dicts == [config.to_dict(humanize_values=True) for config in configs]
+        assert humanized_dicts[0]['created_at'] == 'a few seconds ago'
+
+        assert list(ExperimentJobConfig.from_dicts([])) == []
+        assert list(ExperimentJobConfig.to_dicts([])) == []
+
+    def test_bulk_methods_stream_by_chunks(self):
+        consumed = []
+
+        def iter_dicts():
+            for i in range(10):
+                consumed.append(i)
+                yield {'uuid': uuid.uuid4().hex,
+                       'experiment': uuid.uuid4().hex,
+                       'created_at': local_now().isoformat(),
+                       'values': {'loss': i}}
+
+        ExperimentMetricConfig.BULK_CHUNK_SIZE = 4
+        try:
+            configs = ExperimentMetricConfig.from_dicts(iter_dicts())
+            assert consumed == []
+            assert next(configs).values == {'loss': 0}
+            assert consumed == [0, 1, 2, 3]
+            configs = [next(configs) for _ in range(3)] + list(configs)
+            assert [config.values['loss'] for config in configs] == list(range(1, 10))
+
+            data_dicts = ExperimentMetricConfig.to_dicts(iter(configs))
+            assert next(data_dicts)['values'] == {'loss': 1}
+            assert len(list(data_dicts)) == 8
+        finally:
+            del ExperimentMetricConfig.BULK_CHUNK_SIZE
+
+    def test_from_dicts_raises_for_non_valid_values(self):
+        config_dicts = [get_job_dict(0), get_job_dict(1)]
+        config_dicts[1]['resources'] = {'cpu': {'requests': 'foo'}}
+        with self.assertRaises(ValidationError):
+            list(ExperimentJobConfig.from_dicts(config_dicts))
+
+
+class TestBaseConfigProjections(TestCase):
+    def setUp(self):
+        job_dict = get_job_dict(0)
+        self.config = ExperimentConfig.from_dict({
+            'uuid': uuid.uuid4().hex,
+            'project': uuid.uuid4().hex,
+            'project_name': 'user.proj',
+            'unique_name': 'user.proj.1',
+            'last_status': 'Running',
+            'description': 'description',
+            'config': {'k': 'v'},
+            'resources': {'cpu': {'requests': 1, 'limits': 2}},
+            'jobs': [job_dict],
+            'num_jobs': 1,
+            'created_at': local_now().isoformat(),
+            'updated_at': local_now().isoformat(),
+        })
+
+    def get_legacy_light_dict(self, humanize_values=False, include_attrs=None, exclude_attrs=None):
+        obj_dict = self.config.to_dict(humanize_values=humanize_values)
+        if not any([include_attrs, exclude_attrs]):
+            include_attrs = self.config.DEFAULT_INCLUDE_ATTRIBUTES
+            exclude_attrs = self.config.DEFAULT_EXCLUDE_ATTRIBUTES
+        if include_attrs:
+            exclude_attrs = set(obj_dict) - set(include_attrs)
+        for attr in exclude_attrs:
+            obj_dict.pop(attr, None)
+        return obj_dict
+
+    def test_projections_match_filtered_dicts(self):
+        for kwargs in [{},
+                       {'include_attrs': ['uuid', 'created_at', 'jobs', 'foo']},
+                       {'include_attrs': ['created_at', 'unique_name']},
+                       {'include_attrs': ['foo']},
+                       {'exclude_attrs': ['jobs', 'resources', 'config', 'foo']}]:
+            for humanize_values in [False, True]:
+                light_dict = self.config.to_light_dict(humanize_values=humanize_values, **kwargs)
+                expected = self.get_legacy_light_dict(humanize_values=humanize_values, **kwargs)
+                # The keys are in the same order
+                assert list(light_dict.items()) == list(expected.items())
+
+    def test_get_projection(self):
+        assert ExperimentConfig.get_projection(['unique_name', 'uuid', 'foo']) == (
+            ('uuid', 'unique_name'), ())
+        assert ExperimentConfig.get_projection(exclude_attrs=['jobs', 'foo']) == (
+            None, ('jobs',))
+        assert ExperimentConfig.get_projection() == (None, ())
+
+    def test_only_the_projection_is_dumped(self):
+        self.config.jobs = object()
+        with self.assertRaises(Exception):
+            self.config.to_dict()
+        light_dict = self.config.to_light_dict(include_attrs=['unique_name', 'last_status'])
+        assert light_dict == {'unique_name': 'user.proj.1', 'last_status': 'Running'}
+        light_dict = self.config.to_light_dict(exclude_attrs=['jobs'])
+        assert 'jobs' not in light_dict
+        assert light_dict['unique_name'] == 'user.proj.1'
+
+    def test_projection_schemas_are_cached(self):
+        BaseConfig.SCHEMA_CACHE.clear()
+        with patch.object(ExperimentConfig, 'COMPILED_SCHEMA', False):
+            self.config.to_light_dict(include_attrs=['unique_name'])
+            schema = BaseConfig.SCHEMA_CACHE.acquire(
+                ExperimentConfig.SCHEMA, only=('unique_name',))
+            assert list(schema.fields) == ['unique_name']
+            BaseConfig.SCHEMA_CACHE.release(schema)
+            self.config.to_light_dict(include_attrs=['unique_name'])
+            assert BaseConfig.SCHEMA_CACHE.acquire(
+                ExperimentConfig.SCHEMA, only=('unique_name',)) is schema
+
+    def test_compiled_projections(self):
+        self.config.to_light_dict(include_attrs=['unique_name'])
+        dump, source = get_compiled_projection(ExperimentConfig.SCHEMA, ('unique_name',), ())
+        assert get_compiled_projection(ExperimentConfig.SCHEMA, ('unique_name',), ())[0] is dump
+        assert "data['unique_name']" in source
+        assert "data['uuid']" not in source
+
+        # The values that the compiled dump does not handle are dumped by marshmallow
+        self.config.last_status = 1
+        light_dict = self.config.to_light_dict(include_attrs=['last_status'])
+        assert light_dict == {'last_status': '1'}
+
+    def test_include_and_exclude_are_exclusive(self):
+        with self.assertRaises(PolyaxonSchemaError):
+            self.config.to_light_dict(include_attrs=['uuid'], exclude_attrs=['jobs'])
+
+
+class TestBaseConfigSlots(TestCase):
+    def test_get_schema_slots(self):
+        assert get_schema_slots(ExperimentStatusSchema) == (
+            'uuid', 'experiment', 'created_at', 'status', 'message')
+        assert get_schema_slots(ExperimentStatusSchema, 'status', 'foo') == (
+            'uuid', 'experiment', 'created_at', 'status', 'message', 'foo')
+        assert ExperimentJobConfig.get_slots() == get_schema_slots(ExperimentJobSchema)
+        assert K8SResourcesConfig.get_slots() == ('limits', 'requests')
+        assert ForConfig.get_slots() == ()
+
+    def test_slotted_configs_have_no_dict(self):
+        job_dict = get_job_dict(0)
+        config = ExperimentJobConfig.from_dict(job_dict)
+        assert not hasattr(config, '__dict__')
+        assert not hasattr(config.resources, '__dict__')
+        assert not hasattr(config.resources.cpu, '__dict__')
+        with self.assertRaises(AttributeError):
+            config.foo = 'bar'
+        assert ExperimentJobConfig.from_dict(config.to_dict()).to_dict() == config.to_dict()
+
+    def test_pickle_and_copy(self):
+        config = ExperimentStatusConfig(uuid=uuid.uuid4().hex,
+                                        experiment=uuid.uuid4().hex,
+                                        created_at=local_now(),
+                                        status='Running')
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            assert pickle.loads(pickle.dumps(config, protocol=protocol)).to_dict() == (
+                config.to_dict())
+        config_copy = copy.copy(config)
+        config_copy.status = 'Succeeded'
+        assert config.status == 'Running'
+        assert config_copy.to_dict()['created_at'] == config.to_dict()['created_at']
+
+        # Configs without slots keep their `__dict__`
+        config = ForConfig.from_dict({'len': 5, 'do': 'Value at {{ i }}', 'index': 'i'})
+        assert pickle.loads(pickle.dumps(config, protocol=0)).to_dict() == config.to_dict()
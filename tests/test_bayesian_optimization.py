@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function
+
+import numpy as np
+
+from unittest import TestCase
+
+from polyaxon_schemas.bayesian_optimization import (
+    BayesianOptimizer,
+    GaussianProcess,
+    MatrixEncoder,
+    expected_improvement
+)
+from polyaxon_schemas.exceptions import PolyaxonConfigurationError
+from polyaxon_schemas.matrix import MatrixConfig, MatrixConstraints
+from polyaxon_schemas.utils import Optimization
+
+
+class TestMatrixEncoder(TestCase):
+    def test_encode(self):
+        matrix = {
+            'activation': MatrixConfig.from_dict({'values': ['relu', 'sigmoid', 'tanh']}),
+            'units': MatrixConfig.from_dict({'values': [64, 16, 32]}),
+            'layers': MatrixConfig.from_dict({'range': '1:4:1'}),
+            'lr': MatrixConfig.from_dict({'loguniform': '-4:0:1'}),
+            'dropout': MatrixConfig.from_dict({'uniform': '0:0.5:1'}),
+            'momentum': MatrixConfig.from_dict({'normal': '0:1:1'}),
+        }
+        encoder = MatrixEncoder(matrix)
+        assert encoder.num_columns == 8
+        x = encoder.encode_declarations([
+            {'activation': 'sigmoid', 'units': 32, 'layers': 3, 'lr': np.exp(-2),
+             'dropout': 0.25, 'momentum': 2},
+            {'activation': 'relu', 'units': 16, 'layers': 1, 'lr': 1,
+             'dropout': 0, 'momentum': 0},
+        ])
+        # Columns: activation (one-hot), dropout, layers, lr, momentum, units (ordinal)
+        assert np.allclose(x, [
+            [0, 1, 0, 0.5, 1, 0.5, 1, 0.5],
+            [1, 0, 0, 0, 0, 1, 0.5, 0],
+        ])
+
+
+class TestGaussianProcess(TestCase):
+    def test_incremental_cholesky(self):
+        rand_generator = np.random.RandomState(1)
+        x = rand_generator.uniform(size=(20, 3))
+        y = np.sin(x.sum(axis=1))
+        gaussian_process = GaussianProcess(length_scale=0.5).fit(x, y)
+        kernel = gaussian_process.kernel(x, x) + gaussian_process.noise * np.eye(20)
+        assert np.allclose(gaussian_process.cholesky, np.linalg.cholesky(kernel))
+
+        mean, std = gaussian_process.predict(x)
+        assert np.allclose(mean, y, atol=1e-2)
+        assert (std < 0.05).all()
+
+        # Far from the observations, the posterior is the prior
+        mean, std = gaussian_process.predict(np.full((1, 3), 10.))
+        assert np.isclose(mean[0], np.mean(y))
+        assert np.isclose(std[0], np.std(y))
+
+    def test_duplicate_observations(self):
+        gaussian_process = GaussianProcess().fit([[0.5], [0.5], [0.5]], [1, 2, 3])
+        mean, _ = gaussian_process.predict([[0.5]])
+        assert np.isclose(mean[0], 2, atol=1e-2)
+
+    def test_expected_improvement(self):
+        ei = expected_improvement(np.array([0., 1., 1.]), np.array([1., 1., 2.]), best=1., xi=0.)
+        assert ei[0] < ei[1] < ei[2]
+
+
+class TestBayesianOptimizer(TestCase):
+    def optimize(self, optimization, function):
+        matrix = {
+            'x': MatrixConfig.from_dict({'uniform': '0:1:1'}),
+            'y': MatrixConfig.from_dict({'linspace': '0:1:21'}),
+        }
+        optimizer = BayesianOptimizer(matrix,
+                                      optimization=optimization,
+                                      n_initial_trials=5,
+                                      rand_generator=np.random.RandomState(1))
+        values = []
+        for _ in range(25):
+            declaration = optimizer.suggest()
+            value = function(declaration['x'], declaration['y'])
+            optimizer.observe(declaration, value)
+            values.append(value)
+        assert optimizer.num_observations == 25
+        return values
+
+    def test_maximize(self):
+        values = self.optimize(Optimization.MAXIMIZE,
+                               lambda x, y: -(x - 0.3) ** 2 - (y - 0.7) ** 2)
+        assert max(values) > -0.005
+
+    def test_minimize(self):
+        values = self.optimize(Optimization.MINIMIZE,
+                               lambda x, y: (x - 0.8) ** 2 + (y - 0.2) ** 2)
+        assert min(values) < 0.005
+
+    def test_n_iterations(self):
+        matrix = {'x': MatrixConfig.from_dict({'uniform': '0:1:1'})}
+        optimizer = BayesianOptimizer(matrix,
+                                      n_initial_trials=2,
+                                      n_iterations=3,
+                                      rand_generator=np.random.RandomState(1))
+        for i in range(3):
+            declaration = optimizer.suggest()
+            optimizer.observe(declaration, i)
+        assert optimizer.suggest() is None
+
+    def test_no_valid_candidates(self):
+        matrix = {'x': MatrixConfig.from_dict({'values': [1, 2]})}
+        optimizer = BayesianOptimizer(matrix,
+                                      n_initial_trials=1,
+                                      rand_generator=np.random.RandomState(1),
+                                      constraints=MatrixConstraints(['x > 2']))
+        with self.assertRaises(PolyaxonConfigurationError):
+            optimizer.suggest()
+        optimizer.observe({'x': 1}, 1.)
+        with self.assertRaises(PolyaxonConfigurationError):
+            optimizer.suggest()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function
+
+import uuid
+
+from unittest import TestCase
+
+from polyaxon_schemas.early_stopping import EarlyStoppingEvaluator
+from polyaxon_schemas.experiment import ExperimentMetricConfig
+from polyaxon_schemas.settings import EarlyStoppingMetricConfig
+from polyaxon_schemas.utils import EarlyStoppingPolicy, Optimization, local_now
+
+
+class TestEarlyStoppingEvaluator(TestCase):
+    def setUp(self):
+        self.early_stopping = [
+            EarlyStoppingMetricConfig(metric='loss',
+                                      value=0.1,
+                                      optimization=Optimization.MINIMIZE,
+                                      policy=EarlyStoppingPolicy.EXPERIMENT),
+            EarlyStoppingMetricConfig(metric='accuracy',
+                                      value=0.9,
+                                      optimization=Optimization.MAXIMIZE,
+                                      policy=EarlyStoppingPolicy.GROUP),
+            EarlyStoppingMetricConfig(metric='precision',
+                                      value=0.99,
+                                      optimization=None,
+                                      policy=None),
+        ]
+        self.experiments = [uuid.uuid4().hex for _ in range(3)]
+
+    def get_metric(self, experiment, **values):
+        return ExperimentMetricConfig(uuid=uuid.uuid4().hex,
+                                      experiment=self.experiments[experiment],
+                                      created_at=local_now(),
+                                      values=values)
+
+    def test_evaluator(self):
+        evaluator = EarlyStoppingEvaluator(self.early_stopping)
+        assert len(evaluator) == 3
+        assert evaluator.maximize.tolist() == [False, True, True]
+        assert evaluator.stop_experiment.tolist() == [True, False, True]
+        assert evaluator.stop_group.tolist() == [False, True, True]
+        assert evaluator.stop_all.tolist() == [False, False, True]
+
+    def test_get_mask(self):
+        evaluator = EarlyStoppingEvaluator(self.early_stopping)
+        metrics = [
+            self.get_metric(0, loss=0.05, accuracy=0.5),
+            self.get_metric(1, loss=0.5, accuracy=0.95),
+            self.get_metric(2, loss='nan', precision=0.999),
+            self.get_metric(2, steps=10),
+        ]
+        assert evaluator.get_mask(metrics).tolist() == [
+            [True, False, False],
+            [False, True, False],
+            [False, False, True],
+            [False, False, False],
+        ]
+
+    def test_evaluate(self):
+        evaluator = EarlyStoppingEvaluator(self.early_stopping)
+        decision = evaluator.evaluate([
+            self.get_metric(1, loss=0.5),
+            self.get_metric(0, loss=0.05),
+            self.get_metric(1, loss=0.01),
+            self.get_metric(0, loss=0.02),
+        ])
+        assert decision.experiments == [self.experiments[0], self.experiments[1]]
+        assert decision.stop_group is False
+        assert decision.stop_all is False
+
+        decision = evaluator.evaluate([self.get_metric(0, accuracy=0.95)])
+        assert decision.experiments == []
+        assert decision.stop_group is True
+        assert decision.stop_all is False
+
+        decision = evaluator.evaluate([self.get_metric(2, precision=1.)])
+        assert decision.experiments == [self.experiments[2]]
+        assert decision.stop_group is True
+        assert decision.stop_all is True
+
+    def test_evaluate_without_conditions_or_records(self):
+        decision = EarlyStoppingEvaluator(None).evaluate([self.get_metric(0, loss=0.)])
+        assert decision == ([], False, False)
+        decision = EarlyStoppingEvaluator(self.early_stopping).evaluate([])
+        assert decision == ([], False, False)
+
+        # Conditions without a value are never reached
+        early_stopping = [EarlyStoppingMetricConfig(metric='loss')]
+        decision = EarlyStoppingEvaluator(early_stopping).evaluate([self.get_metric(0, loss=0.)])
+        assert decision == ([], False, False)
+
+    def test_evaluate_many_records(self):
+        evaluator = EarlyStoppingEvaluator(self.early_stopping)
+        metrics = [self.get_metric(i % 3, loss=1. / (i + 1), accuracy=i / 10000.)
+                   for i in range(10000)]
+        decision = evaluator.evaluate(metrics)
+        # The loss reaches 0.1 at the tenth record, the accuracy 0.9 at the 9000th
+        assert decision.experiments == [self.experiments[0], self.experiments[1],
+                                        self.experiments[2]]
+        assert decision.stop_group is True
+        assert decision.stop_all is False
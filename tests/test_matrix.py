@@ -1,11 +1,22 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function
 
+import itertools
 import numpy as np
 
 from unittest import TestCase
 
-from polyaxon_schemas.matrix import MatrixConfig
+from marshmallow import ValidationError
+
+from polyaxon_schemas.matrix import (
+    MatrixConfig,
+    MatrixConstraints,
+    MatrixGrid,
+    MatrixQuasiSampler,
+    MatrixSampler,
+    get_shard_range
+)
+from polyaxon_schemas.utils import QuasiRandomMethods
 
 
 class TestMatrixConfigs(TestCase):
@@ -22,6 +33,16 @@ class TestMatrixConfigs(TestCase):
         with self.assertRaises(ValueError):
             MatrixConfig.from_dict(config_dict)
 
+    def test_matrix_pvalues_probabilities(self):
+        config_dict = {'pvalues': [['a', 0.3], ['b', 0.7]]}
+        assert MatrixConfig.from_dict(config_dict).to_dict() == config_dict
+        # Float rounding is accepted
+        MatrixConfig.from_dict({'pvalues': [['a', 0.1], ['b', 0.2], ['c', 0.7]]})
+
+        for pvalues in [[['a', 0.3], ['b', 0.3]], [['a', 1.3], ['b', -0.3]]]:
+            with self.assertRaises(ValidationError):
+                MatrixConfig.from_dict({'pvalues': pvalues})
+
     def test_matrix_values_option(self):
         config_dict = {
             'values': [1, 2, 3],
@@ -144,3 +165,378 @@ class TestMatrixConfigs(TestCase):
         config_dict['logspace'] = {'start': 1.2, 'stop': 1.8, 'num': 0.1, 'base': 2}
         config = MatrixConfig.from_dict(config_dict)
         assert config.to_dict() == config_dict
+
+    def test_matrix_length(self):
+        config_dicts = [
+            {'values': [1, 2, 3]},
+            {'pvalues': [['a', 0.3], ['b', 0.7]]},
+            {'range': [1, 2, 3]},
+            {'range': '0:10:1'},
+            {'range': {'start': 1.2, 'stop': 1.8, 'step': 0.1}},
+            {'range': '0:10:3'},
+            {'linspace': '0:10:5'},
+            {'logspace': '0:10:7:2'},
+            {'geomspace': '1:10:4'},
+        ]
+        for config_dict in config_dicts:
+            config = MatrixConfig.from_dict(config_dict)
+            assert config.is_distribution is False
+            assert config.length == len(config.to_numpy())
+
+        for key in ['uniform', 'quniform', 'loguniform', 'normal', 'lognormal']:
+            config = MatrixConfig.from_dict({key: '0:1:2'})
+            assert config.is_distribution is True
+            assert config.length == MatrixConfig.INFINITE
+
+    def test_matrix_uniform_sample(self):
+        config = MatrixConfig.from_dict({'uniform': '0:1:2'})
+        values = config.sample(size=5, rand_generator=np.random.RandomState(1))
+        assert len(values) == 5
+        assert all(0 <= v < 1 for v in values)
+
+    def test_matrix_get_value(self):
+        config_dicts = [
+            {'values': [1, 2, 3]},
+            {'pvalues': [['a', 0.3], ['b', 0.7]]},
+            {'range': [1, 2, 3]},
+            {'range': '0:10:1'},
+            {'range': {'start': 1.2, 'stop': 1.8, 'step': 0.1}},
+            {'range': '-1:10:0.3'},
+            {'linspace': '0:10:5'},
+            {'linspace': '0.1:0.9:17'},
+            {'linspace': '3:7:1'},
+            {'logspace': '0:10:7:2'},
+            {'logspace': '-3:-1:9'},
+            {'geomspace': '1:10:4'},
+            {'geomspace': '0.001:0.1:13'},
+            {'geomspace': '-1000:-1:5'},
+        ]
+        for config_dict in config_dicts:
+            config = MatrixConfig.from_dict(config_dict)
+            values = config.to_numpy()
+            assert [config.get_value(i) for i in range(config.length)] == list(values)
+            assert config.get_value(-1) == values[-1]
+
+            with self.assertRaises(IndexError):
+                config.get_value(config.length)
+
+        config = MatrixConfig.from_dict({'uniform': '0:1:2'})
+        with self.assertRaises(ValueError):
+            config.get_value(0)
+
+    def test_matrix_q_distributions(self):
+        config_dicts = [
+            {'quniform': '0:1:0.1'},
+            {'qloguniform': {'low': 0, 'high': 1, 'q': 0.5}},
+            {'qnormal': '0:1:0.2'},
+            {'qlognormal': [0, 1, 0.5]},
+        ]
+        for config_dict in config_dicts:
+            config = MatrixConfig.from_dict(config_dict)
+            assert config.is_distribution is True
+            values = config.sample(size=10, rand_generator=np.random.RandomState(1))
+            q = config.get_option()[1]['q']
+            assert len(values) == 10
+            assert np.allclose(values / q, np.round(values / q))
+
+    def test_matrix_ppf(self):
+        quantiles = (np.arange(1000) + 0.5) / 1000
+
+        config = MatrixConfig.from_dict({'values': ['a', 'b', 'c', 'd']})
+        values = config.ppf(quantiles)
+        assert [np.sum(values == v) for v in 'abcd'] == [250, 250, 250, 250]
+
+        config = MatrixConfig.from_dict({'pvalues': [['a', 0.2], ['b', 0.8]]})
+        values = config.ppf(quantiles)
+        assert [np.sum(values == v) for v in 'ab'] == [200, 800]
+
+        config = MatrixConfig.from_dict({'range': '0:10:2'})
+        assert set(config.ppf(quantiles)) == {0, 2, 4, 6, 8}
+
+        config = MatrixConfig.from_dict({'uniform': '-1:1:1'})
+        assert np.allclose(config.ppf([0., 0.25, 0.5]), [-1, -0.5, 0])
+
+        config = MatrixConfig.from_dict({'loguniform': '0:2:1'})
+        assert np.allclose(config.ppf([0., 0.5]), [1, np.e])
+
+        config = MatrixConfig.from_dict({'quniform': '0:1:0.25'})
+        assert np.allclose(config.ppf([0.1, 0.3, 0.6]), [0, 0.25, 0.5])
+
+        config = MatrixConfig.from_dict({'normal': '1:2:1'})
+        values = config.ppf(quantiles)
+        assert np.isclose(np.mean(values), 1)
+        assert np.isclose(np.std(values), 2, rtol=0.05)
+
+        config = MatrixConfig.from_dict({'lognormal': '0:1:1'})
+        assert np.isclose(config.ppf([0.5])[0], 1)
+
+
+class TestMatrixGrid(TestCase):
+    def setUp(self):
+        self.matrix = {
+            'lr': MatrixConfig.from_dict({'logspace': '-3:-1:3'}),
+            'activation': MatrixConfig.from_dict({'values': ['relu', 'sigmoid']}),
+            'units': MatrixConfig.from_dict({'range': '16:64:16'}),
+        }
+
+    def get_product(self):
+        keys = sorted(self.matrix)
+        values = [self.matrix[key].to_numpy() for key in keys]
+        return [dict(zip(keys, v)) for v in itertools.product(*values)]
+
+    def test_grid_order_and_indexing(self):
+        grid = MatrixGrid(self.matrix)
+        product = self.get_product()
+        assert len(grid) == len(product) == 18
+        assert list(grid) == product
+        assert [grid[i] for i in range(len(grid))] == product
+        assert grid[-1] == product[-1]
+        assert grid[3:11:2] == product[3:11:2]
+
+        with self.assertRaises(IndexError):
+            grid[18]  # noqa, pylint:disable=pointless-statement
+
+    def test_grid_iter_range(self):
+        grid = MatrixGrid(self.matrix)
+        product = self.get_product()
+        assert list(grid.iter_range(5)) == product[5:]
+        assert list(grid.iter_range(5, 12)) == product[5:12]
+        assert list(grid.iter_range(12, 100)) == product[12:]
+        assert list(grid.iter_range(12, 5)) == []
+
+    def test_grid_iter_shard(self):
+        grid = MatrixGrid(self.matrix)
+        product = self.get_product()
+        for num_shards in [1, 4, 7, 18, 25]:
+            shards = [list(grid.iter_shard(i, num_shards)) for i in range(num_shards)]
+            assert [d for shard in shards for d in shard] == product
+            sizes = [len(shard) for shard in shards]
+            assert max(sizes) - min(sizes) <= 1
+
+    def test_grid_is_lazy(self):
+        matrix = {
+            'a': MatrixConfig.from_dict({'range': '0:1000000:1'}),
+            'b': MatrixConfig.from_dict({'linspace': '0:1:1000000'}),
+            'c': MatrixConfig.from_dict({'values': [1, 2, 3]}),
+        }
+        grid = MatrixGrid(matrix)
+        assert grid.size == 3 * 10 ** 12
+        assert grid[0] == {'a': 0, 'b': 0., 'c': 1}
+        assert grid[-1] == {'a': 999999, 'b': 1., 'c': 3}
+        assert grid[grid.size // 2] == {'a': 500000, 'b': 0., 'c': 1}
+
+    def test_grid_raises_for_distributions(self):
+        self.matrix['dropout'] = MatrixConfig.from_dict({'uniform': '0:1:2'})
+        with self.assertRaises(ValueError):
+            MatrixGrid(self.matrix)
+
+
+class TestMatrixUtils(TestCase):
+    def test_get_shard_range(self):
+        assert get_shard_range(10, 0, 1) == (0, 10)
+        assert [get_shard_range(10, i, 3) for i in range(3)] == [(0, 3), (3, 6), (6, 10)]
+        assert [get_shard_range(2, i, 3) for i in range(3)] == [(0, 0), (0, 1), (1, 2)]
+
+        with self.assertRaises(ValueError):
+            get_shard_range(10, 3, 3)
+        with self.assertRaises(ValueError):
+            get_shard_range(10, 0, 0)
+
+
+class TestMatrixSampler(TestCase):
+    def setUp(self):
+        self.matrix = {
+            'lr': MatrixConfig.from_dict({'uniform': '0:1:1'}),
+            'activation': MatrixConfig.from_dict({'values': ['relu', 'sigmoid']}),
+            'units': MatrixConfig.from_dict({'pvalues': [[16, 0.5], [32, 0.5]]}),
+            'layers': MatrixConfig.from_dict({'range': '1:4:1'}),
+        }
+
+    def test_sample_columns(self):
+        sampler = MatrixSampler(self.matrix, np.random.RandomState(1))
+        columns = sampler.sample(1000)
+        assert list(columns) == ['activation', 'layers', 'lr', 'units']
+        assert all(len(values) == 1000 for values in columns.values())
+        assert ((0 <= columns['lr']) & (columns['lr'] < 1)).all()
+        assert set(columns['activation']) == {'relu', 'sigmoid'}
+        assert set(columns['units']) == {16, 32}
+        assert set(columns['layers']) == {1, 2, 3}
+
+        same_columns = MatrixSampler(self.matrix, np.random.RandomState(1)).sample(1000)
+        for key in columns:
+            assert (columns[key] == same_columns[key]).all()
+
+        assert all(len(values) == 1 for values in sampler.sample(1).values())
+        assert all(len(values) == 0 for values in sampler.sample(0).values())
+
+    def test_sample_keeps_values(self):
+        matrix = {'a': MatrixConfig.from_dict({'values': [1, 'a', [1, 2]]}),
+                  'b': MatrixConfig.from_dict({'pvalues': [[1, 0.5], ['b', 0.5]]})}
+        columns = MatrixSampler(matrix, np.random.RandomState(1)).sample(100)
+        assert {str(v) for v in columns['a']} == {'1', 'a', '[1, 2]'}
+        assert {v for v in columns['b']} == {1, 'b'}
+
+    def test_sample_declarations(self):
+        sampler = MatrixSampler(self.matrix, np.random.RandomState(1))
+        declarations = sampler.sample_declarations(10)
+        assert len(declarations) == 10
+        for declaration in declarations:
+            assert set(declaration) == {'lr', 'activation', 'units', 'layers'}
+            assert 0 <= declaration['lr'] < 1
+            assert declaration['activation'] in ['relu', 'sigmoid']
+
+    def test_sample_unique(self):
+        del self.matrix['lr']
+        sampler = MatrixSampler(self.matrix, np.random.RandomState(1))
+        assert sampler.is_discrete is True
+        columns = sampler.sample(10, unique=True)
+        declarations = sampler.to_declarations(columns)
+        assert len(declarations) == 10
+        assert len({tuple(sorted(d.items())) for d in declarations}) == 10
+
+        # The sample size is limited by the matrix space
+        declarations = sampler.sample_declarations(100, unique=True)
+        assert len(declarations) == 12
+        assert len({tuple(sorted(d.items())) for d in declarations}) == 12
+
+    def test_sample_is_vectorized(self):
+        matrix = {
+            'a': MatrixConfig.from_dict({'pvalues': [['a', 0.2], ['b', 0.3], ['c', 0.5]]}),
+            'b': MatrixConfig.from_dict({'normal': '0:1:1'}),
+            'c': MatrixConfig.from_dict({'linspace': '0:1:100'}),
+        }
+        columns = MatrixSampler(matrix, np.random.RandomState(1)).sample(100000)
+        assert all(len(values) == 100000 for values in columns.values())
+        frequencies = [np.mean(columns['a'] == v) for v in ['a', 'b', 'c']]
+        assert np.allclose(frequencies, [0.2, 0.3, 0.5], atol=0.01)
+
+
+class TestMatrixQuasiSampler(TestCase):
+    def setUp(self):
+        self.matrix = {
+            'lr': MatrixConfig.from_dict({'loguniform': '-5:0:1'}),
+            'dropout': MatrixConfig.from_dict({'uniform': '0:1:1'}),
+            'momentum': MatrixConfig.from_dict({'normal': '0:1:1'}),
+            'activation': MatrixConfig.from_dict({'values': ['relu', 'sigmoid']}),
+        }
+
+    def test_sobol_design(self):
+        sampler = MatrixQuasiSampler(self.matrix, rand_generator=np.random.RandomState(1))
+        columns = sampler.sample(64)
+        assert list(columns) == ['activation', 'dropout', 'lr', 'momentum']
+        assert all(len(values) == 64 for values in columns.values())
+        # Each dimension is stratified
+        assert len(set(np.floor(columns['dropout'] * 64))) == 64
+        assert np.sum(columns['activation'] == 'relu') == 32
+        assert ((np.exp(-5) <= columns['lr']) & (columns['lr'] <= 1)).all()
+
+        # The same generator state and an offset continue the same sequence
+        sampler = MatrixQuasiSampler(self.matrix, rand_generator=np.random.RandomState(1))
+        declarations = sampler.sample_declarations(32, start=32)
+        assert declarations == MatrixSampler.to_declarations(columns)[32:]
+
+    def test_latin_hypercube_design(self):
+        sampler = MatrixQuasiSampler(self.matrix,
+                                     method=QuasiRandomMethods.LATIN_HYPERCUBE,
+                                     rand_generator=np.random.RandomState(1))
+        columns = sampler.sample(50)
+        assert len(set(np.floor(columns['dropout'] * 50))) == 50
+        assert np.sum(columns['activation'] == 'relu') == 25
+
+        with self.assertRaises(ValueError):
+            sampler.sample(10, start=10)
+
+    def test_raises_for_unknown_methods(self):
+        with self.assertRaises(ValueError):
+            MatrixQuasiSampler(self.matrix, method='foo')
+
+
+class TestMatrixConstraints(TestCase):
+    def setUp(self):
+        self.matrix = {
+            'n_ps': MatrixConfig.from_dict({'values': [0, 1, 2]}),
+            'n_workers': MatrixConfig.from_dict({'values': [0, 1, 2, 4]}),
+            'units': MatrixConfig.from_dict({'range': '16:64:16'}),
+        }
+        self.constraints = MatrixConstraints(['n_ps == 0 or n_workers > 0',
+                                              '{{ n_workers >= n_ps }}'])
+
+    def get_valid_product(self):
+        keys = sorted(self.matrix)
+        values = [self.matrix[key].to_numpy() for key in keys]
+        declarations = [dict(zip(keys, v)) for v in itertools.product(*values)]
+        return [d for d in declarations if d['n_workers'] >= d['n_ps']]
+
+    def test_constraints(self):
+        assert len(self.constraints) == 2
+        assert self.constraints.expressions == ['n_ps == 0 or n_workers > 0',
+                                                'n_workers >= n_ps']
+        assert self.constraints.get_unknown_variables(self.matrix) == set()
+        assert self.constraints.get_unknown_variables(['n_ps']) == {'n_workers'}
+        assert self.constraints.get_positions(sorted(self.matrix)) == [1, 1]
+        assert self.constraints.is_valid({'n_ps': 0, 'n_workers': 0, 'units': 16})
+        assert self.constraints.get_failures({'n_ps': 2, 'n_workers': 0, 'units': 16}) == [0, 1]
+        assert self.constraints.get_failures({'n_ps': 2, 'n_workers': 1, 'units': 16}) == [1]
+
+        columns = {'n_ps': np.array([0, 2, 1]), 'n_workers': np.array([0, 4, 0])}
+        assert self.constraints.get_mask(columns).tolist() == [True, True, False]
+
+    def test_grid_prunes_invalid_declarations(self):
+        grid = MatrixGrid(self.matrix, constraints=self.constraints)
+        product = self.get_valid_product()
+        assert len(grid) == 36
+        assert list(grid) == product
+        assert grid.is_valid(product[0])
+        assert not grid.is_valid({'n_ps': 1, 'n_workers': 0, 'units': 16})
+
+        shards = [list(grid.iter_shard(i, 5)) for i in range(5)]
+        assert [d for shard in shards for d in shard] == product
+
+    def test_grid_skips_invalid_prefixes(self):
+        matrix = {
+            'a': MatrixConfig.from_dict({'range': '0:100:1'}),
+            'b': MatrixConfig.from_dict({'range': '0:1000:1'}),
+        }
+        constraints = MatrixConstraints(['a < 2'])
+        checked = []
+        get_failures = constraints.get_failures
+        constraints.get_failures = lambda d: checked.append(d) or get_failures(d)
+
+        grid = MatrixGrid(matrix, constraints=constraints)
+        assert len(list(grid.iter_range(1000))) == 1000
+        # Only the first declaration of each invalid value of `a` is checked
+        assert len(checked) == 1000 + 98
+
+    def test_sampler_rejects_invalid_declarations(self):
+        self.matrix['lr'] = MatrixConfig.from_dict({'uniform': '0:1:1'})
+        sampler = MatrixSampler(self.matrix,
+                                rand_generator=np.random.RandomState(1),
+                                constraints=self.constraints)
+        declarations = sampler.sample_declarations(100)
+        assert len(declarations) == 100
+        assert all(d['n_workers'] >= d['n_ps'] for d in declarations)
+
+    def test_sampler_unique_valid_declarations(self):
+        sampler = MatrixSampler(self.matrix,
+                                rand_generator=np.random.RandomState(1),
+                                constraints=self.constraints)
+        declarations = sampler.sample_declarations(100, unique=True)
+        assert len(declarations) == 27
+        assert sorted(declarations, key=lambda d: sorted(d.items())) == sorted(
+            self.get_valid_product(), key=lambda d: sorted(d.items()))
+
+    def test_quasi_sampler_constraints(self):
+        sampler = MatrixQuasiSampler(self.matrix,
+                                     rand_generator=np.random.RandomState(1),
+                                     constraints=self.constraints)
+        declarations = sampler.sample_declarations(20)
+        assert len(declarations) == 20
+        assert all(d['n_workers'] >= d['n_ps'] for d in declarations)
+
+        sampler = MatrixQuasiSampler(self.matrix,
+                                     method=QuasiRandomMethods.LATIN_HYPERCUBE,
+                                     rand_generator=np.random.RandomState(1),
+                                     constraints=self.constraints)
+        declarations = sampler.sample_declarations(20)
+        assert 0 < len(declarations) <= 20
+        assert all(d['n_workers'] >= d['n_ps'] for d in declarations)
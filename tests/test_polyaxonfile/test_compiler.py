@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function
+
+import itertools
+import os
+import six
+
+from unittest import TestCase
+
+from marshmallow import ValidationError
+from mock import patch
+
+from polyaxon_schemas.polyaxonfile import validator
+from polyaxon_schemas.polyaxonfile.compiler import CompiledPolyaxonfile, get_schema
+from polyaxon_schemas.polyaxonfile.parser import Parser
+from polyaxon_schemas.polyaxonfile.specification import (
+    ExperimentSpecification,
+    GroupSpecification
+)
+from polyaxon_schemas.settings import SettingsConfig
+
+
+class TestCompiledPolyaxonfile(TestCase):
+    GROUP_FILES = [
+        'matrix_file.yml',
+        'matrix_file_early_stopping.yml',
+        'matrix_file_ignored_n_experiments.yml',
+        'one_matrix_file.yml',
+        'run_exec_matrix_file.yml',
+    ]
+
+    @staticmethod
+    def get_spec(filename):
+        return GroupSpecification.read(os.path.abspath('tests/fixtures/{}'.format(filename)))
+
+    @staticmethod
+    def get_matrix_declarations(spec):
+        keys = list(six.iterkeys(spec.matrix))
+        values = [spec.matrix[key].to_numpy() for key in keys]
+        return [dict(zip(keys, point)) for point in itertools.product(*values)]
+
+    @staticmethod
+    def get_legacy_experiment_spec(spec, matrix_declaration):
+        parsed_data = Parser.parse(spec, spec.data, matrix_declaration)
+        settings = SettingsConfig.get_experiment_settings(parsed_data[spec.SETTINGS])
+        del parsed_data[spec.SETTINGS]
+        if settings:
+            parsed_data[spec.SETTINGS] = settings
+        validator.validate(spec=spec, data=parsed_data)
+        return ExperimentSpecification(values=[parsed_data, {'kind': spec._EXPERIMENT}])
+
+    def test_static_and_dynamic_sections(self):
+        spec = self.get_spec('matrix_file.yml')
+        assert isinstance(spec.compiled_data, CompiledPolyaxonfile)
+        assert spec.compiled_data.dynamic_sections == [spec.MODEL]
+        assert spec.compiled_data.static_sections == [spec.SETTINGS, spec.TRAIN]
+        assert spec.compiled_data.sections[spec.MODEL].dependencies == {'lr', 'loss'}
+
+        # Declarations not depending on the matrix are static
+        spec = self.get_spec('one_matrix_file.yml')
+        assert spec.compiled_data.dynamic_declarations == {'loss'}
+        assert spec.compiled_data.sections[spec.MODEL].dependencies == {'loss'}
+
+    def test_dynamic_subtrees(self):
+        spec = self.get_spec('matrix_file.yml')
+        model = spec.compiled_data.sections[spec.MODEL]
+        assert model.dynamic_subtrees == ['loss', 'optimizer']
+        assert model.subtrees['graph'].is_static
+
+    def test_validates_only_dynamic_subtrees(self):
+        spec = self.get_spec('matrix_file.yml')
+        declarations = self.get_matrix_declarations(spec)
+        model = spec.compiled_data.sections[spec.MODEL]
+        assert [key for key, _, _ in model.dynamic_fields] == ['loss', 'optimizer']
+        assert set(model.loaded_data) == {'graph'}
+
+        graph_field = get_schema(model.schema_cls).fields['graph']
+        with patch.object(graph_field, 'deserialize') as deserialize:
+            spec1 = spec.get_experiment_spec(declarations[0])
+            spec2 = spec.get_experiment_spec(declarations[-1])
+        assert deserialize.call_count == 0
+        # The configs do not share the static values
+        assert spec1.model.graph is not spec2.model.graph
+        assert spec1.model.graph.to_dict() == spec2.model.graph.to_dict()
+        assert spec1.model.loss is not spec2.model.loss
+
+    def test_configs_are_created_with_their_constructor(self):
+        spec = self.get_spec('matrix_file.yml')
+        model = spec.compiled_data.sections[spec.MODEL]
+        declarations = self.get_matrix_declarations(spec)
+        with patch.object(model.schema_cls, 'make', autospec=True,
+                          side_effect=model.schema_cls.make) as make:
+            spec1 = spec.get_experiment_spec(declarations[0])
+        assert make.call_count == 1
+        assert spec1.model.to_dict() == self.get_legacy_experiment_spec(
+            spec, declarations[0]).model.to_dict()
+
+    def test_invalid_dynamic_subtrees_raise_the_section_errors(self):
+        spec = self.get_spec('matrix_file.yml')
+        declaration = dict(self.get_matrix_declarations(spec)[0], lr='foo')
+        with self.assertRaises(ValidationError) as context:
+            spec.get_experiment_spec(declaration)
+        with self.assertRaises(ValidationError) as legacy_context:
+            self.get_legacy_experiment_spec(spec, declaration)
+        assert context.exception.messages == legacy_context.exception.messages
+
+    def test_experiment_specs_match_legacy_parsing(self):
+        for filename in self.GROUP_FILES:
+            spec = self.get_spec(filename)
+            for matrix_declaration in self.get_matrix_declarations(spec):
+                experiment_spec = spec.get_experiment_spec(matrix_declaration)
+                expected_spec = self.get_legacy_experiment_spec(spec, matrix_declaration)
+                assert experiment_spec.kind == expected_spec.kind
+                if expected_spec.settings:
+                    assert experiment_spec.settings.to_dict() == expected_spec.settings.to_dict()
+                else:
+                    assert experiment_spec.settings is None
+                assert experiment_spec.parsed_data == expected_spec.parsed_data
+                assert (set(six.iterkeys(experiment_spec.validated_data)) ==
+                        set(six.iterkeys(expected_spec.validated_data)))
+                for key, value in six.iteritems(expected_spec.validated_data):
+                    assert experiment_spec.validated_data[key].to_dict() == value.to_dict()
+
+    def test_static_sections_are_reused(self):
+        spec = self.get_spec('matrix_file.yml')
+        declarations = self.get_matrix_declarations(spec)
+        spec1 = spec.get_experiment_spec(declarations[0])
+        spec2 = spec.get_experiment_spec(declarations[-1])
+        assert spec1.train is spec2.train
+        assert spec1.model is not spec2.model
+        assert spec1.model.optimizer.learning_rate != spec2.model.optimizer.learning_rate
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function
+
+import os
+
+from unittest import TestCase
+
+from polyaxon_schemas.polyaxonfile.dependencies import DependencyGraph
+from polyaxon_schemas.polyaxonfile.specification import (
+    ExperimentSpecification,
+    GroupSpecification
+)
+
+
+class TestDependencyGraph(TestCase):
+    def test_dependencies_through_declarations(self):
+        data = {
+            'declarations': {'a': '{{ lr }}', 'b': '{{ a }}', 'c': 1},
+            'run': {'image': 'test', 'cmd': 'train --b={{ b }} --c={{ c }} --i={{ i }}'},
+            'model': {'optimizer': {'Adam': {'learning_rate': '{{ a }}'}},
+                      'graph': {'input_layers': 'images', 'layers': []}},
+        }
+        graph = DependencyGraph.from_data(spec=GroupSpecification, data=data, matrix_keys=['lr'])
+        assert graph.dynamic_declarations == {'lr', 'a', 'b'}
+        assert graph.get_dependencies(('run',)) == {'b', 'c'}
+        assert graph.get_all_dependencies(('run',)) == {'a', 'b', 'c', 'lr'}
+        assert graph.get_matrix_dependencies(('run',)) == {'a', 'b', 'lr'}
+        assert graph.get_matrix_dependencies(('model', 'optimizer')) == {'a', 'lr'}
+        assert graph.get_matrix_dependencies(('model', 'graph')) == set()
+        assert graph.get_affected(['c']) == [('run',), ('run', 'cmd')]
+        assert graph.get_affected(['lr']) == [
+            ('run',), ('run', 'cmd'), ('model',), ('model', 'optimizer')]
+
+    def test_specification_dependency_graph(self):
+        spec = GroupSpecification.read(os.path.abspath('tests/fixtures/matrix_file.yml'))
+        graph = spec.dependency_graph
+        assert graph.matrix_keys == {'lr', 'loss'}
+        assert graph.get_dependencies((spec.MODEL,)) == {'lr', 'loss'}
+        assert graph.get_dependencies((spec.MODEL, 'graph')) == set()
+        assert graph.get_affected(['lr']) == [(spec.MODEL,), (spec.MODEL, 'optimizer')]
+
+        spec = ExperimentSpecification.read(os.path.abspath('tests/fixtures/simple_file.yml'))
+        assert spec.dependency_graph.matrix_keys == set()
+        assert spec.dependency_graph.dynamic_declarations == set()
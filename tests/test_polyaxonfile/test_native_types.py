@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function
+
+import os
+
+from unittest import TestCase
+
+from polyaxon_schemas.polyaxonfile.parser import Parser
+from polyaxon_schemas.polyaxonfile.specification import (
+    ExperimentSpecification,
+    GroupSpecification
+)
+
+
+class NativeExperimentSpecification(ExperimentSpecification):
+    native_types = True
+
+
+class TestNativeTypesParity(TestCase):
+    """Checks that native-types evaluation gives the same results as text rendering."""
+
+    EXPERIMENT_FILES = [
+        'simple_file.yml',
+        'simple_generator_file.yml',
+        'advanced_file.yml',
+        'advanced_file_with_custom_configs_and_resources.yml',
+        'distributed_tensorflow_file.yml',
+        'distributed_horovod_file.yml',
+        'distributed_mxnet_file.yml',
+        'distributed_pytorch_file.yml',
+        'run_exec_simple_file.yml',
+    ]
+
+    GROUP_FILES = [
+        'matrix_file.yml',
+        'matrix_file_early_stopping.yml',
+        'matrix_file_ignored_n_experiments.yml',
+        'one_matrix_file.yml',
+        'run_exec_matrix_file.yml',
+    ]
+
+    @staticmethod
+    def get_path(filename):
+        return os.path.abspath('tests/fixtures/{}'.format(filename))
+
+    def assert_parity(self, expression, declarations, check_operators=False, check_graph=False):
+        expected = Parser.parse_expression(
+            ExperimentSpecification, expression, declarations, check_operators, check_graph)
+        result = Parser.parse_expression(
+            NativeExperimentSpecification, expression, declarations, check_operators, check_graph)
+        assert result == expected
+        assert type(result) == type(expected)  # noqa
+
+    def test_expressions(self):
+        declarations = {
+            'lr': 0.01,
+            'n': 3,
+            'flag': True,
+            'nothing': None,
+            'name': 'relu',
+            'number_str': '12',
+            'layers': [32, 64],
+            'conv': {'filters': [32, 64], 'kernel_size': [[3, 3], [2, 2]]},
+        }
+        expressions = [
+            '{{ lr }}', '{{ n }}', '{{ flag }}', '{{ nothing }}', '{{ name }}',
+            '{{ number_str }}', '{{ layers }}', '{{ conv }}', '{{ conv.filters[1] }}',
+            '{{ conv.kernel_size[0] }}', 'layer_{{ n }}', '{{ n }}{{ n }}', '{{ undefined }}',
+            '{% if flag %}1{% else %}0{% endif %}', '{{ n }}\n',
+            {'Dense': {'units': '{{ layers[0] }}', 'activation': '{{ name }}'}},
+        ]
+        for expression in expressions:
+            self.assert_parity(expression, declarations)
+
+    def test_native_values_are_not_shared_with_declarations(self):
+        declarations = {'conv': {'filters': 32}}
+        result = Parser.parse_expression(NativeExperimentSpecification, '{{ conv }}', declarations)
+        result['name'] = 'Conv2D_1'
+        assert declarations == {'conv': {'filters': 32}}
+
+    def test_graph_with_operators(self):
+        declarations = {'conv2d': {'filters': [32, 64], 'activation': ['relu', 'linear']}}
+        expression = {
+            'graph': {
+                'input_layers': ['images'],
+                'layers': [
+                    {'for': {
+                        'len': 2,
+                        'index': 'i',
+                        'do': {'Conv2D': {
+                            'filters': '{{ conv2d.filters[i] }}',
+                            'activation': '{{ conv2d.activation[i] }}',
+                            'tags': ['tag1']}}}},
+                    {'Flatten': {'inbound_nodes': ['{{ tags.tag1[1] }}']}},
+                ]
+            }
+        }
+        self.assert_parity(expression, declarations, check_operators=True, check_graph=True)
+
+    def test_experiment_files(self):
+        for filename in self.EXPERIMENT_FILES:
+            spec = ExperimentSpecification.read(self.get_path(filename))
+            native_spec = ExperimentSpecification(self.get_path(filename), native_types=True)
+            assert native_spec.parsed_data == spec.parsed_data
+            assert native_spec.validated_data.keys() == spec.validated_data.keys()
+            for key, value in spec.validated_data.items():
+                assert native_spec.validated_data[key].to_dict() == value.to_dict()
+
+    def test_group_files(self):
+        for filename in self.GROUP_FILES:
+            spec = GroupSpecification.read(self.get_path(filename))
+            native_spec = GroupSpecification(self.get_path(filename), native_types=True)
+            experiment_spec = spec.get_experiment_spec(spec.matrix_declaration_test)
+            native_experiment_spec = native_spec.get_experiment_spec(spec.matrix_declaration_test)
+            assert native_experiment_spec.native_types is True
+            assert native_experiment_spec.parsed_data == experiment_spec.parsed_data
@@ -23,6 +23,39 @@ class TestParser(TestCase):
         assert parser.parse_expression(ExperimentSpecification, '{{ something }}', {}) == ''
         assert parser.parse_expression(ExperimentSpecification, '{{ something }}', {'something': 1}) == 1
 
+    def test_parse_expression_reuses_compiled_templates(self):
+        parser = Parser()
+        parser.template_cache.clear()
+        for i in range(3):
+            assert parser.parse_expression(
+                ExperimentSpecification, '{{ lr }}', {'lr': i}) == i
+        assert '{{ lr }}' in parser.template_cache
+        assert parser.template_cache.hits == 2
+
+    def test_parse_literal_expressions_skip_rendering(self):
+        parser = Parser()
+        parser.template_cache.clear()
+        data = ['relu', '1', '1.5', '[1, 2]', "{'a': 1}", 'path/to/file\n', 'a\r\nb', '']
+        for d in data:
+            expected = parser._evaluate_expression(ExperimentSpecification, d, {}, False, False)
+            assert parser.parse_expression(ExperimentSpecification, d, {}) == expected
+        parser.template_cache.clear()
+        for d in data:
+            parser.parse_expression(ExperimentSpecification, d, {})
+        assert len(parser.template_cache) == 0
+
+        # Only Jinja's newlines are normalized, other line boundaries are rendered
+        for d in ['a\rb\r\n', 'a\n\n', u'a\x0bb', u'a\x0cb', u'a\u2028b\n']:
+            expected = parser._evaluate_expression(ExperimentSpecification, d, {}, False, False)
+            assert parser.parse_expression(ExperimentSpecification, d, {}) == expected
+        assert parser.is_literal('a\r\nb') is True
+        assert parser.is_literal(u'a\x0bb') is False
+
+        # Memoized mutable values are not shared
+        value = parser.parse_expression(ExperimentSpecification, '[1, 2]', {})
+        value.append(3)
+        assert parser.parse_expression(ExperimentSpecification, '[1, 2]', {}) == [1, 2]
+
     def test_parse_graph_expression(self):
         expression = {
             'graph': {
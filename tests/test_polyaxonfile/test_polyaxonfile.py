@@ -332,6 +332,8 @@ class TestPolyaxonfile(TestCase):
         assert spec.early_stopping == spec.settings.early_stopping
         assert len(spec.settings.early_stopping) == 1
         assert isinstance(spec.settings.early_stopping[0], EarlyStoppingMetricConfig)
+        assert len(spec.early_stopping_evaluator) == 1
+        assert spec.early_stopping_evaluator.metrics == ['loss']
 
         # assert spec.experiments_def == (
         #     10,
@@ -6,8 +6,13 @@ import os
 from unittest import TestCase
 
 from polyaxon_schemas.exceptions import PolyaxonConfigurationError
-from polyaxon_schemas.polyaxonfile.specification import ExperimentSpecification, PluginSpecification
-from polyaxon_schemas.utils import TaskType
+from polyaxon_schemas.matrix import MatrixConfig, MatrixSampler
+from polyaxon_schemas.polyaxonfile.specification import (
+    ExperimentSpecification,
+    GroupSpecification,
+    PluginSpecification
+)
+from polyaxon_schemas.utils import SearchAlgorithms, TaskType
 
 
 class TestSpecifications(TestCase):
@@ -22,4 +27,338 @@ class TestSpecifications(TestCase):
 
     def test_cluster_def_without_framwork(self):
         spec = ExperimentSpecification.read(os.path.abspath('tests/fixtures/env_without_framework.yml'))
-        self.assertEqual(spec.cluster_def, ({TaskType.MASTER: 1}, False))
\ No newline at end of file
+        self.assertEqual(spec.cluster_def, ({TaskType.MASTER: 1}, False))
+
+    def test_generate_experiment_specs(self):
+        spec = GroupSpecification.read(os.path.abspath('tests/fixtures/matrix_file.yml'))
+        declarations = [{'lr': lr, 'loss': loss}
+                        for lr in spec.matrix['lr'].to_numpy()
+                        for loss in spec.matrix['loss'].to_numpy()]
+        declarations.insert(1, {'lr': 0.1, 'loss': 'UnknownLoss'})
+        for workers in [1, 2]:
+            results = list(spec.generate_experiment_specs(declarations, workers=workers))
+            assert [r.matrix_declaration for r in results] == declarations
+            assert results[1].spec is None
+            assert results[1].error is not None
+            for result in results[:1] + results[2:]:
+                assert result.error is None
+                expected_spec = spec.get_experiment_spec(result.matrix_declaration)
+                assert result.spec.parsed_data == expected_spec.parsed_data
+                assert result.spec.model.to_dict() == expected_spec.model.to_dict()
+
+        results = list(spec.generate_experiment_specs(declarations[:2], workers=2, as_dict=True))
+        assert results[0].spec == spec.get_experiment_spec(declarations[0]).parsed_data
+
+    def test_snapshots(self):
+        spec = ExperimentSpecification.read(os.path.abspath('tests/fixtures/advanced_file.yml'))
+        assert spec.model is not None
+        snapshot = spec.to_snapshot()
+        assert snapshot.startswith(b'polyaxon-specification 2 ')
+        assert len(spec.get_snapshot_hash(snapshot)) == 64
+        assert spec.to_snapshot() == snapshot
+
+        # Only the source data and the validated configs are kept
+        assert set(spec.__getstate__()) == {'_data', '_headers', '_validated_data', '_fingerprints'}
+        new_spec = ExperimentSpecification.from_snapshot(snapshot)
+        assert new_spec._parsed_data is None
+        assert new_spec.validated_data.keys() == spec.validated_data.keys()
+        assert new_spec.parsed_data == spec.parsed_data
+        assert new_spec.values == [spec.data]
+        assert new_spec.model.to_dict() == spec.model.to_dict()
+        assert new_spec.cluster_def == spec.cluster_def
+
+        # The experiments of a group keep their parsed data, which is their source data
+        spec = GroupSpecification.read(os.path.abspath('tests/fixtures/matrix_file.yml'))
+        experiment_spec = spec.get_experiment_spec(spec.matrix_declaration_test)
+        new_spec = ExperimentSpecification.from_snapshot(experiment_spec.to_snapshot())
+        assert new_spec._parsed_data is new_spec._data
+        assert new_spec.parsed_data == experiment_spec.parsed_data
+
+        # Group specifications are compiled again
+        assert '_compiled_data' not in spec.__getstate__()
+        new_spec = GroupSpecification.from_snapshot(spec.to_snapshot())
+        declaration = spec.matrix_declaration_test
+        assert (new_spec.get_experiment_spec(declaration).parsed_data ==
+                spec.get_experiment_spec(declaration).parsed_data)
+
+    def test_snapshots_raise_for_non_valid_content(self):
+        spec = ExperimentSpecification.read(os.path.abspath('tests/fixtures/simple_file.yml'))
+        snapshot = spec.to_snapshot()
+        with self.assertRaises(PolyaxonConfigurationError):
+            ExperimentSpecification.from_snapshot(snapshot[:-1])
+        with self.assertRaises(PolyaxonConfigurationError):
+            ExperimentSpecification.from_snapshot(snapshot.replace(b' 2 ', b' 3 ', 1))
+        with self.assertRaises(PolyaxonConfigurationError):
+            ExperimentSpecification.from_snapshot(b'not a snapshot')
+        with self.assertRaises(PolyaxonConfigurationError):
+            GroupSpecification.from_snapshot(snapshot)
+
+    def test_fingerprints(self):
+        spec = GroupSpecification.read(os.path.abspath('tests/fixtures/matrix_file.yml'))
+        lrs = spec.matrix['lr'].to_numpy()
+        spec1 = spec.get_experiment_spec({'lr': lrs[0], 'loss': 'MeanSquaredError'})
+        spec2 = spec.get_experiment_spec({'lr': float(lrs[0]), 'loss': 'MeanSquaredError'})
+        spec3 = spec.get_experiment_spec({'lr': lrs[1], 'loss': 'MeanSquaredError'})
+        assert spec1.fingerprint == spec2.fingerprint
+        assert spec1.fingerprint != spec3.fingerprint
+        assert spec1.section_fingerprints['train'] == spec3.section_fingerprints['train']
+        assert spec1.section_fingerprints['model'] != spec3.section_fingerprints['model']
+
+        # Fingerprints do not depend on how the specification was created
+        same_spec = ExperimentSpecification.read(spec1.parsed_data)
+        assert same_spec.section_fingerprints == spec1.section_fingerprints
+        assert same_spec.fingerprint == spec1.fingerprint
+
+    def test_matrix_space_is_analytic(self):
+        data = {
+            'version': 1,
+            'kind': 'group',
+            'project': {'name': 'project1'},
+            'settings': {'matrix': {
+                'a': {'range': '0:1000000:1'},
+                'b': {'linspace': '0:1:1000000'},
+                'c': {'values': [1, 2, 3]},
+            }},
+            'run': {'image': 'test', 'cmd': 'train --a={{ a }} --b={{ b }} --c={{ c }}'},
+        }
+        spec = GroupSpecification.read(data)
+        assert spec.matrix_space == 3 * 10 ** 12
+
+        data['settings']['matrix']['d'] = {'uniform': '0:1:1'}
+        spec = GroupSpecification.read(data)
+        assert spec.matrix_space == MatrixConfig.INFINITE
+
+    def test_matrix_grid(self):
+        data = {
+            'version': 1,
+            'kind': 'group',
+            'project': {'name': 'project1'},
+            'settings': {'matrix': {
+                'a': {'range': '0:1000000:1'},
+                'b': {'values': [1, 2, 3]},
+            }},
+            'run': {'image': 'test', 'cmd': 'train --a={{ a }} --b={{ b }}'},
+        }
+        spec = GroupSpecification.read(data)
+        assert len(spec.matrix_grid) == spec.matrix_space
+        assert spec.matrix_grid[0] == spec.matrix_declaration_test
+        assert spec.matrix_grid[4] == {'a': 1, 'b': 2}
+        assert spec.get_experiment_declaration(4) == spec.matrix_grid[4]
+
+        experiment_spec = spec.get_experiment_spec(spec.matrix_grid[-1])
+        assert experiment_spec.run_exec.cmd == 'train --a=999999 --b=3'
+
+        data['settings']['matrix']['c'] = {'uniform': '0:1:1'}
+        spec = GroupSpecification.read(data)
+        with self.assertRaises(PolyaxonConfigurationError):
+            spec.matrix_grid  # noqa, pylint:disable=pointless-statement
+
+    def test_matrix_declarations_shards(self):
+        data = {
+            'version': 1,
+            'kind': 'group',
+            'project': {'name': 'project1'},
+            'settings': {'matrix': {
+                'a': {'range': '0:10:1'},
+                'b': {'values': [1, 2, 3]},
+            }},
+            'run': {'image': 'test', 'cmd': 'train --a={{ a }} --b={{ b }}'},
+        }
+        spec = GroupSpecification.read(data)
+        declarations = list(spec.get_matrix_declarations())
+        assert declarations == list(spec.matrix_grid)
+        shards = [list(spec.get_matrix_declarations(i, 4)) for i in range(4)]
+        assert [len(shard) for shard in shards] == [7, 8, 7, 8]
+        assert [d for shard in shards for d in shard] == declarations
+
+        data['settings']['seed'] = 33
+        data['settings']['random_search'] = {'n_experiments': 10}
+        data['settings']['matrix']['c'] = {'uniform': '0:1:1'}
+        spec = GroupSpecification.read(data)
+        assert spec.search_seed == 33
+        shards = [list(spec.get_matrix_declarations(i, 3)) for i in range(3)]
+        assert [len(shard) for shard in shards] == [3, 3, 4]
+        # Shards are reproducible and use independent streams
+        assert shards == [list(spec.get_matrix_declarations(i, 3)) for i in range(3)]
+        assert shards[0] != shards[1]
+
+        # Each experiment only depends on the seed and its index
+        declarations = [d for shard in shards for d in shard]
+        assert [spec.get_experiment_declaration(i) for i in range(10)] == declarations
+        assert [d for i in range(4) for d in spec.get_matrix_declarations(i, 4)] == declarations
+        with self.assertRaises(IndexError):
+            spec.get_experiment_declaration(10)
+
+        columns = spec.sample_matrix()
+        same_columns = GroupSpecification.read(data).sample_matrix()
+        assert all((columns[key] == same_columns[key]).all() for key in columns)
+        # The sample is made of the experiments of the search
+        assert MatrixSampler.to_declarations(columns) == declarations
+
+        # The experiments of a shard can span several blocks
+        spec = GroupSpecification.read(data)
+        spec.RANDOM_BLOCK_SIZE = 4
+        shards = [list(spec.get_matrix_declarations(i, 3)) for i in range(3)]
+        declarations = [d for shard in shards for d in shard]
+        assert len(set(tuple(sorted(d.items())) for d in declarations)) == 10
+        assert [spec.get_experiment_declaration(i) for i in range(10)] == declarations
+        assert MatrixSampler.to_declarations(spec.sample_matrix()) == declarations
+        assert spec.matrix_declaration_test == GroupSpecification.read(data).matrix_declaration_test
+
+        # Without a seed, the streams are still the same for the same specification
+        del data['settings']['seed']
+        spec = GroupSpecification.read(data)
+        assert (list(spec.get_matrix_declarations(1, 3)) ==
+                list(GroupSpecification.read(data).get_matrix_declarations(1, 3)))
+
+        columns = spec.sample_matrix()
+        assert sorted(columns) == ['a', 'b', 'c']
+        assert all(len(values) == 10 for values in columns.values())
+
+        data['settings']['hyperband'] = {'max_iter': 10}
+        del data['settings']['random_search']
+        spec = GroupSpecification.read(data)
+        with self.assertRaises(PolyaxonConfigurationError):
+            spec.get_matrix_declarations(0, 3)
+
+    def test_quasi_random_search(self):
+        data = {
+            'version': 1,
+            'kind': 'group',
+            'project': {'name': 'project1'},
+            'settings': {
+                'seed': 1,
+                'quasi_random_search': {'n_experiments': 16},
+                'matrix': {
+                    'lr': {'loguniform': '-5:0:1'},
+                    'dropout': {'quniform': '0:1:0.1'},
+                    'activation': {'values': ['relu', 'sigmoid']},
+                }
+            },
+            'run': {'image': 'test', 'cmd': 'train --lr={{ lr }} --activation={{ activation }}'},
+        }
+        spec = GroupSpecification.read(data)
+        assert spec.search_algorithm == SearchAlgorithms.QUASI_RANDOM
+        assert spec.n_experiments == 16
+
+        design = spec.quasi_random_design
+        assert sorted(design) == ['activation', 'dropout', 'lr']
+        assert sum(design['activation'] == 'relu') == 8
+
+        declarations = [d for i in range(3) for d in spec.get_matrix_declarations(i, 3)]
+        assert len(declarations) == 16
+        assert declarations[5] == spec.get_experiment_declaration(5)
+        assert declarations == [
+            d for d in GroupSpecification.read(data).get_matrix_declarations()]
+
+        experiment_spec = spec.get_experiment_spec(declarations[0])
+        activation = '--activation={}'.format(declarations[0]['activation'])
+        assert activation in experiment_spec.run_exec.cmd
+
+    def test_matrix_constraints(self):
+        data = {
+            'version': 1,
+            'kind': 'group',
+            'project': {'name': 'project1'},
+            'settings': {
+                'matrix': {
+                    'n_ps': {'values': [1, 2]},
+                    'n_workers': {'values': [0, 1, 2, 4]},
+                },
+                'constraints': ['n_workers >= 2 * n_ps'],
+            },
+            'run': {'image': 'test', 'cmd': 'train --ps={{ n_ps }} --workers={{ n_workers }}'},
+        }
+        spec = GroupSpecification.read(data)
+        assert spec.matrix_constraints.expressions == ['n_workers >= 2 * n_ps']
+        assert spec.matrix_declaration_test == {'n_ps': 1, 'n_workers': 2}
+        declarations = list(spec.get_matrix_declarations())
+        assert declarations == [{'n_ps': 1, 'n_workers': 2},
+                                {'n_ps': 1, 'n_workers': 4},
+                                {'n_ps': 2, 'n_workers': 4}]
+        shards = [list(spec.get_matrix_declarations(i, 2)) for i in range(2)]
+        assert [d for shard in shards for d in shard] == declarations
+
+        data['settings']['seed'] = 1
+        data['settings']['random_search'] = {'n_experiments': 10}
+        data['settings']['matrix']['lr'] = {'uniform': '0:1:1'}
+        spec = GroupSpecification.read(data)
+        declarations = list(spec.get_matrix_declarations())
+        assert len(declarations) == 10
+        assert all(d['n_workers'] >= 2 * d['n_ps'] for d in declarations)
+        assert spec.get_experiment_declaration(3) == declarations[3]
+        columns = spec.sample_matrix()
+        assert (columns['n_workers'] >= 2 * columns['n_ps']).all()
+        declaration = spec.matrix_declaration_test
+        assert declaration['n_workers'] >= 2 * declaration['n_ps']
+
+        del data['settings']['random_search']
+        data['settings']['quasi_random_search'] = {'n_experiments': 10}
+        spec = GroupSpecification.read(data)
+        declarations = list(spec.get_matrix_declarations())
+        assert len(declarations) == 10
+        assert all(d['n_workers'] >= 2 * d['n_ps'] for d in declarations)
+
+    def test_hyperband_planner(self):
+        data = {
+            'version': 1,
+            'kind': 'group',
+            'project': {'name': 'project1'},
+            'settings': {
+                'hyperband': {'max_iter': 27, 'eta': 3},
+                'matrix': {'lr': {'loguniform': '-5:0:1'}},
+            },
+            'run': {'image': 'test', 'cmd': 'train --lr={{ lr }}'},
+        }
+        spec = GroupSpecification.read(data)
+        assert spec.hyperband_planner.experiments_per_rung[0] == [27, 9, 3, 1]
+
+        data['settings']['hyperband']['eta'] = 1
+        spec = GroupSpecification.read(data)
+        with self.assertRaises(PolyaxonConfigurationError):
+            spec.hyperband_planner  # noqa, pylint:disable=pointless-statement
+
+    def test_asha_scheduler(self):
+        data = {
+            'version': 1,
+            'kind': 'group',
+            'project': {'name': 'project1'},
+            'settings': {
+                'asha': {'max_iter': 27, 'metric': {'metric': 'accuracy'}},
+                'matrix': {'lr': {'loguniform': '-5:0:1'}},
+            },
+            'run': {'image': 'test', 'cmd': 'train --lr={{ lr }}'},
+        }
+        spec = GroupSpecification.read(data)
+        assert spec.search_algorithm == SearchAlgorithms.ASHA
+        scheduler = spec.get_asha_scheduler()
+        assert scheduler.num_rungs == 4
+        assert scheduler.maximize is True
+        assert spec.get_experiment_declaration(100) == spec.get_experiment_declaration(100)
+
+    def test_bayesian_optimizer(self):
+        data = {
+            'version': 1,
+            'kind': 'group',
+            'project': {'name': 'project1'},
+            'settings': {
+                'bo': {
+                    'n_iterations': 10,
+                    'n_initial_trials': 2,
+                    'metric': {'metric': 'loss', 'optimization': 'minimize'}
+                },
+                'matrix': {'lr': {'loguniform': '-5:0:1'}, 'units': {'values': [16, 32]}},
+            },
+            'run': {'image': 'test', 'cmd': 'train --lr={{ lr }} --units={{ units }}'},
+        }
+        spec = GroupSpecification.read(data)
+        assert spec.search_algorithm == SearchAlgorithms.BO
+        assert spec.n_experiments == 10
+        optimizer = spec.get_bayesian_optimizer()
+        assert optimizer.maximize is False
+        assert optimizer.n_iterations == 10
+        for i in range(3):
+            declaration = optimizer.suggest()
+            optimizer.observe(declaration, i)
+        experiment_spec = spec.get_experiment_spec(optimizer.suggest())
+        assert experiment_spec.run_exec.cmd.startswith('train --lr=')
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function
+
+import datetime
+import numpy as np
+
+from unittest import TestCase
+
+from polyaxon_schemas.exceptions import PolyaxonfileError
+from polyaxon_schemas.polyaxonfile.utils import (
+    DeclarationsScope,
+    LRUCache,
+    get_fingerprint,
+    to_canonical
+)
+
+
+class TestLRUCache(TestCase):
+    def test_get_or_set_counts_hits_and_misses(self):
+        cache = LRUCache(maxsize=2)
+        assert cache.get_or_set('a', lambda k: k * 2) == 'aa'
+        assert cache.get_or_set('a', lambda k: k * 3) == 'aa'
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.get_or_set('a', lambda k: k)
+        cache.get_or_set('b', lambda k: k)
+        cache.get_or_set('a', lambda k: k)
+        cache.get_or_set('c', lambda k: k)
+        assert len(cache) == 2
+        assert 'a' in cache
+        assert 'b' not in cache
+
+        cache.clear()
+        assert cache.info() == {'hits': 0, 'misses': 0, 'maxsize': 2, 'size': 0}
+
+
+class TestDeclarationsScope(TestCase):
+    def test_nested_scopes(self):
+        declarations = {'lr': 0.1, 'index': 'declared'}
+        scope = DeclarationsScope.wrap(declarations)
+        assert DeclarationsScope.wrap(scope) is scope
+
+        child = scope.new_child({'lr': 0.2, 'tags': {}})
+        assert child['lr'] == 0.2
+        assert child['index'] == 'declared'
+        assert set(child) == {'lr', 'index', 'tags'}
+        assert len(child) == 3
+        assert scope['lr'] == 0.1
+        assert 'tags' not in scope
+
+        defaults = scope.new_defaults({'index': 1, 'i': 2})
+        assert defaults['index'] == 'declared'
+        assert defaults['i'] == 2
+        with self.assertRaises(KeyError):
+            defaults['foo']  # noqa
+
+        # Scopes are views, the declarations are never copied
+        declarations['new'] = 1
+        assert child['new'] == 1
+
+
+class TestFingerprints(TestCase):
+    def test_to_canonical(self):
+        value = {
+            'a': (1, np.float64(0.5), np.arange(2)),
+            1: {'b', 'a'},
+            'c': [True, None, datetime.date(2018, 1, 1)],
+        }
+        assert to_canonical(value) == {
+            'a': [1, 0.5, [0, 1]],
+            '1': ['a', 'b'],
+            'c': [True, None, '2018-01-01'],
+        }
+        assert get_fingerprint(value) == get_fingerprint(to_canonical(value))
+        assert get_fingerprint({'a': 1, 'b': 2}) == get_fingerprint({'b': 2, 'a': 1})
+
+    def test_values_without_canonical_form_raise(self):
+        with self.assertRaises(PolyaxonfileError):
+            to_canonical({'a': [object()]})
+        with self.assertRaises(PolyaxonfileError):
+            get_fingerprint(lambda: 1)
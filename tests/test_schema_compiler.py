@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function
+
+import datetime
+import uuid
+
+from unittest import TestCase
+
+from dateutil import tz
+from marshmallow import ValidationError
+from marshmallow.utils import from_iso
+from tests.utils import get_job_dict
+
+from polyaxon_schemas.base import BaseConfig
+from polyaxon_schemas.clusters import ClusterNodeConfig
+from polyaxon_schemas.environments import K8SResourcesConfig, K8SResourcesSchema
+from polyaxon_schemas.exceptions import PolyaxonSchemaError
+from polyaxon_schemas.experiment import (
+    ExperimentConfig,
+    ExperimentJobConfig,
+    ExperimentMetricConfig,
+    ExperimentStatusConfig,
+    PodStateConfig
+)
+from polyaxon_schemas.operators import ForSchema
+from polyaxon_schemas.schema_compiler import (
+    CompiledSchemaFallback,
+    SchemaCompiler,
+    _from_iso,
+    get_compiled_functions
+)
+from polyaxon_schemas.utils import local_now
+
+
+def get_state(value):
+    """Returns the attributes of the value and its nested configs."""
+    if isinstance(value, list):
+        return [get_state(v) for v in value]
+    if isinstance(value, BaseConfig):
+        return (value.__class__, {k: get_state(v) for k, v in value.__getstate__().items()})
+    return value
+
+
+class TestSchemaCompiler(TestCase):
+    def assert_fidelity(self, config_cls, config_dict):
+        """Asserts that the compiled functions return the same results as marshmallow."""
+        dump, load, _ = get_compiled_functions(config_cls.SCHEMA)
+        config = load(config_dict)
+        expected_config = config_cls.schema_load(config_dict)
+        assert isinstance(config, config_cls)
+        assert get_state(config) == get_state(expected_config)
+        data_dict = dump(config)
+        expected_dict = config_cls.schema_dump(expected_config)
+        # The keys are in the same order
+        assert list(data_dict.items()) == list(expected_dict.items())
+        assert config_cls.from_dict(data_dict).to_dict() == data_dict
+
+    def test_experiment_configs(self):
+        self.assert_fidelity(ExperimentJobConfig, get_job_dict())
+        self.assert_fidelity(ExperimentConfig, {
+            'uuid': uuid.uuid4().hex,
+            'project': uuid.uuid4().hex,
+            'project_name': 'user.proj',
+            'experiment_group': None,
+            'unique_name': 'user.proj.1',
+            'sequence': 1,
+            'last_status': 'Running',
+            'last_metric': {'loss': 0.1},
+            'declarations': {'lr': 0.1},
+            'num_jobs': 2,
+            'jobs': [get_job_dict(), get_job_dict()],
+            'created_at': local_now().isoformat(),
+            'started_at': '2018-01-01T10:00:00+00:00',
+            'finished_at': '2018-01-01T10:10:00+00:00',
+        })
+        self.assert_fidelity(ExperimentStatusConfig, {
+            'uuid': uuid.uuid4().hex,
+            'experiment': uuid.uuid4().hex,
+            'created_at': local_now().isoformat(),
+            'status': 'Running',
+            'message': None,
+        })
+        self.assert_fidelity(ExperimentMetricConfig, {
+            'uuid': uuid.uuid4().hex,
+            'experiment': uuid.uuid4().hex,
+            'created_at': '2018-01-01T10:00:00',
+            'values': {'loss': 0.1, 'step': 10},
+        })
+
+    def test_pod_state_config(self):
+        # The reduced attributes of the nested labels are removed
+        self.assert_fidelity(PodStateConfig, {
+            'event_type': 'ADDED',
+            'labels': {
+                'project_name': 'user.proj',
+                'project_uuid': uuid.uuid4().hex,
+                'experiment_uuid': None,
+                'role': 'polyaxon-workers',
+                'type': 'polyaxon-experiment',
+            },
+            'phase': 'Running',
+            'deletion_timestamp': None,
+            'pod_conditions': {'Ready': {'status': True}},
+        })
+
+    def test_cluster_node_config(self):
+        self.assert_fidelity(ClusterNodeConfig, {
+            'uuid': uuid.uuid4().hex,
+            'sequence': 1,
+            'name': 'node',
+            'role': 'Worker',
+            'schedulable_taints': False,
+            'memory': 8 * 1024 * 1024 * 1024,
+            'cpu': 4,
+            'n_gpus': 1,
+            'gpus': [{'index': 0,
+                      'name': 'gpu',
+                      'uuid': uuid.uuid4().hex,
+                      'memory': 1024,
+                      'serial': 'serial',
+                      'cluster_node': uuid.uuid4().hex}],
+        })
+
+    def test_dates_are_localized(self):
+        dump, _, _ = get_compiled_functions(ExperimentStatusConfig.SCHEMA)
+        config = ExperimentStatusConfig(uuid=uuid.uuid4(),
+                                        experiment=uuid.uuid4().hex,
+                                        created_at=datetime.datetime(2018, 1, 1, 10),
+                                        status='Running')
+        assert config.created_at.tzinfo is not None
+        assert dump(config) == ExperimentStatusConfig.schema_dump(config)
+
+    def test_isoformat_strings_are_parsed_as_marshmallow(self):
+        values = [local_now().isoformat(),
+                  datetime.datetime(2018, 1, 1, 10, 0, 0, 5).isoformat(),
+                  datetime.datetime(2018, 1, 1, tzinfo=tz.tzoffset(None, -5400)).isoformat(),
+                  '2018-01-01T10:00:00-00:00',
+                  '2018-01-01T10:00:00Z',
+                  '2018-01-01 10:00']
+        for value in values:
+            result = _from_iso(value)
+            expected = from_iso(value)
+            assert result == expected
+            assert repr(result.tzinfo) == repr(expected.tzinfo)
+
+        with self.assertRaises(CompiledSchemaFallback):
+            _from_iso('2018-02-30T10:00:00')
+
+    def test_unexpected_values_fall_back(self):
+        dump, load, _ = get_compiled_functions(ExperimentMetricConfig.SCHEMA)
+        metric_dict = {'uuid': uuid.uuid4().hex,
+                       'experiment': uuid.uuid4().hex,
+                       'created_at': local_now().isoformat(),
+                       'values': {'loss': 0.1}}
+        for key, value in [('uuid', 'foo'), ('uuid', None), ('created_at', ''),
+                           ('created_at', local_now()), ('values', [])]:
+            with self.assertRaises(CompiledSchemaFallback):
+                load(dict(metric_dict, **{key: value}))
+
+        config = ExperimentMetricConfig.from_dict(metric_dict)
+        config.created_at = datetime.date(2018, 1, 1)
+        with self.assertRaises(CompiledSchemaFallback):
+            dump(config)
+        with self.assertRaises(ValidationError):
+            config.to_dict()
+
+    def test_configs_raise_the_marshmallow_errors(self):
+        job_dict = get_job_dict()
+        job_dict['resources'] = {'cpu': {'requests': 'foo'}}
+        with self.assertRaises(ValidationError):
+            ExperimentJobConfig.from_dict(job_dict)
+        job_dict['resources'] = None
+        job_dict['created_at'] = None
+        with self.assertRaises(ValidationError):
+            ExperimentJobConfig.from_dict(job_dict)
+
+        # Values that marshmallow coerces are loaded by marshmallow
+        job_dict = get_job_dict()
+        job_dict['resources'] = {'cpu': {'requests': '1'}}
+        job_dict['uuid'] = uuid.uuid4()
+        config = ExperimentJobConfig.from_dict(job_dict)
+        assert config.resources.cpu.requests == 1.
+        assert config.to_dict()['uuid'] == job_dict['uuid'].hex
+
+    def test_compiled_functions_are_cached(self):
+        assert (get_compiled_functions(K8SResourcesSchema) is
+                get_compiled_functions(K8SResourcesSchema))
+        compiled_schema = ExperimentStatusConfig.get_compiled_schema()
+        assert ExperimentStatusConfig.get_compiled_schema() is compiled_schema
+        assert 'def dump(obj):' in compiled_schema.source
+        assert 'def load(values):' in compiled_schema.source
+        assert K8SResourcesConfig.get_compiled_schema() is None
+
+    def test_schemas_that_cannot_be_compiled(self):
+        with self.assertRaises(PolyaxonSchemaError):
+            SchemaCompiler(ForSchema)
@@ -1,14 +1,27 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function
 
+import pickle
+
 from unittest import TestCase
 
 from marshmallow.exceptions import ValidationError
+from mock import patch
 from tests.utils import assert_equal_dict
 
 from polyaxon_schemas.logging import LoggingConfig
-from polyaxon_schemas.settings import EarlyStoppingMetricConfig, SettingsConfig
-from polyaxon_schemas.utils import EarlyStoppingPolicy, Optimization
+from polyaxon_schemas.matrix import MatrixConstraints
+from polyaxon_schemas.settings import (
+    ASHAConfig,
+    ASHAJob,
+    ASHAScheduler,
+    BOConfig,
+    EarlyStoppingMetricConfig,
+    HyperBandConfig,
+    HyperBandPlanner,
+    SettingsConfig
+)
+from polyaxon_schemas.utils import EarlyStoppingPolicy, Optimization, QuasiRandomMethods
 
 
 class TestSettingConfigs(TestCase):
@@ -68,3 +81,175 @@ class TestSettingConfigs(TestCase):
         ]
         config = SettingsConfig.from_dict(config_dict)
         assert_equal_dict(config.to_dict(), config_dict)
+
+    def test_quasi_random_search_settings(self):
+        config_dict = {
+            'logging': LoggingConfig().to_dict(),
+            'concurrent_experiments': 2,
+            'quasi_random_search': {
+                'n_experiments': 10,
+                'method': QuasiRandomMethods.LATIN_HYPERCUBE
+            },
+        }
+        config = SettingsConfig.from_dict(config_dict)
+        assert_equal_dict(config.to_dict(), config_dict)
+
+        config_dict['quasi_random_search']['method'] = 'foo'
+        with self.assertRaises(ValidationError):
+            SettingsConfig.from_dict(config_dict)
+
+        # Only one search algorithm can be used
+        config_dict['quasi_random_search']['method'] = QuasiRandomMethods.SOBOL
+        config_dict['random_search'] = {'n_experiments': 10}
+        with self.assertRaises(ValidationError):
+            SettingsConfig.from_dict(config_dict)
+
+    def test_matrix_constraints_settings(self):
+        config_dict = {
+            'matrix': {
+                'n_ps': {'values': [0, 1, 2]},
+                'n_workers': {'values': [0, 1, 2]},
+            },
+            'constraints': ['n_ps == 0 or n_workers > 0', '{{ n_workers >= n_ps }}'],
+        }
+        with patch('polyaxon_schemas.settings.MatrixConstraints',
+                   wraps=MatrixConstraints) as matrix_constraints:
+            config = SettingsConfig.from_dict(config_dict)
+        # The constraints are compiled once
+        assert matrix_constraints.call_count == 1
+        assert config.matrix_constraints.expressions == ['n_ps == 0 or n_workers > 0',
+                                                         'n_workers >= n_ps']
+        assert config.constraints == config_dict['constraints']
+        assert config.to_dict()['constraints'] == config_dict['constraints']
+        config = pickle.loads(pickle.dumps(config))
+        assert config.matrix_constraints.is_valid({'n_ps': 1, 'n_workers': 2})
+
+        # Constraints only read matrix keys
+        config_dict['constraints'].append('n_gpus > 0')
+        with self.assertRaises(ValidationError):
+            SettingsConfig.from_dict(config_dict)
+
+        config_dict['constraints'] = ['n_ps ==']
+        with self.assertRaises(ValidationError):
+            SettingsConfig.from_dict(config_dict)
+
+        del config_dict['matrix']
+        config_dict['constraints'] = ['n_ps == 0']
+        with self.assertRaises(ValidationError):
+            SettingsConfig.from_dict(config_dict)
+
+    def test_hyperband_planner(self):
+        planner = HyperBandConfig.from_dict({'max_iter': 81, 'eta': 3}).get_planner()
+        assert planner.num_brackets == 5
+        assert planner.experiments_per_rung == [
+            [81, 27, 9, 3, 1],
+            [34, 11, 3, 1],
+            [15, 5, 1],
+            [8, 2],
+            [5],
+        ]
+        assert [planner.get_rung(i, 0)[1] for i in range(5)] == [1, 3, 9, 27, 81]
+        assert planner.get_rung(1, 2) == (3, 27)
+        assert planner.get_next_rung(1, 2) == (1, 81)
+        assert planner.get_next_rung(1, 3) is None
+        assert planner.get_num_rungs(2) == 3
+        assert planner.bracket_budget == 5 * 81
+        assert planner.num_experiments == 206
+        assert planner.peak_concurrency == 81
+        assert planner.total_budget == sum(
+            n_configs * resources for rungs in planner.brackets for n_configs, resources in rungs)
+
+        # Exact powers of eta
+        planner = HyperBandPlanner(max_iter=1000, eta=10)
+        assert planner.experiments_per_rung[0] == [1000, 100, 10, 1]
+        planner = HyperBandPlanner(max_iter=1, eta=3)
+        assert planner.brackets == [[(1, 1)]]
+
+        with self.assertRaises(ValueError):
+            HyperBandPlanner(max_iter=10, eta=1)
+
+    def test_asha_config(self):
+        config_dict = {
+            'max_iter': 81,
+            'min_iter': 1,
+            'eta': 3,
+            'n_experiments': 100,
+            'metric': {
+                'metric': 'loss',
+                'optimization': Optimization.MINIMIZE,
+                'policy': EarlyStoppingPolicy.ALL
+            },
+        }
+        config = ASHAConfig.from_dict(config_dict)
+        assert_equal_dict(config.to_dict(), config_dict)
+        scheduler = config.get_scheduler()
+        assert scheduler.num_rungs == 5
+        assert scheduler.maximize is False
+        assert [scheduler.get_resources(i) for i in range(5)] == [1, 3, 9, 27, 81]
+
+        config_dict['eta'] = 1
+        with self.assertRaises(ValidationError):
+            ASHAConfig.from_dict(config_dict)
+
+        # Only one search algorithm can be used
+        config_dict['eta'] = 3
+        settings_dict = {'asha': config_dict, 'hyperband': {'max_iter': 10}}
+        with self.assertRaises(ValidationError):
+            SettingsConfig.from_dict(settings_dict)
+
+    def test_asha_scheduler_promotes_asynchronously(self):
+        scheduler = ASHAScheduler(max_iter=9, min_iter=1, eta=3, n_experiments=5)
+        assert scheduler.num_rungs == 3
+
+        jobs = [scheduler.get_next_job() for _ in range(3)]
+        assert jobs == [ASHAJob(None, 0, 1)] * 3
+        scheduler.report('a', 0, 0.5)
+        scheduler.report('b', 0, 0.9)
+        # One result is not enough for a promotion
+        assert scheduler.get_next_job() == ASHAJob(None, 0, 1)
+        scheduler.report('c', 0, 0.1)
+        # The best of 3 results is promoted without waiting for the other experiments
+        assert scheduler.get_next_job() == ASHAJob('b', 1, 3)
+        assert scheduler.get_next_job() == ASHAJob(None, 0, 1)
+        # All the configurations are created
+        assert scheduler.get_next_job() is None
+
+        scheduler.report('d', 0, 0.95)
+        scheduler.report('e', 0, 0.2)
+        scheduler.report('f', 0, 0.3)
+        assert scheduler.get_next_job() == ASHAJob('d', 1, 3)
+        assert scheduler.get_next_job() is None
+
+        scheduler.report('b', 1, 0.7)
+        scheduler.report('d', 1, 0.8)
+        scheduler.report('a', 1, 0.6)
+        # Promotions from the highest rungs first
+        assert scheduler.get_next_job() == ASHAJob('d', 2, 9)
+
+        # Minimization
+        scheduler = ASHAScheduler(max_iter=9, optimization=Optimization.MINIMIZE)
+        for experiment, value in [('a', 0.5), ('b', 0.9), ('c', 0.1)]:
+            scheduler.report(experiment, 0, value)
+        assert scheduler.get_next_job() == ASHAJob('c', 1, 3)
+
+        with self.assertRaises(ValueError):
+            ASHAScheduler(max_iter=9, min_iter=10)
+
+    def test_bo_config(self):
+        config_dict = {
+            'n_iterations': 20,
+            'n_initial_trials': 5,
+            'n_candidates': 500,
+            'xi': 0.1,
+            'metric': {
+                'metric': 'loss',
+                'optimization': Optimization.MINIMIZE,
+                'policy': EarlyStoppingPolicy.ALL
+            },
+        }
+        config = BOConfig.from_dict(config_dict)
+        assert_equal_dict(config.to_dict(), config_dict)
+
+        config_dict['xi'] = -1
+        with self.assertRaises(ValidationError):
+            BOConfig.from_dict(config_dict)
@@ -2,10 +2,22 @@
 from __future__ import absolute_import, division, print_function
 
 import datetime
+import math
+import numpy as np
 
 from unittest import TestCase
 
-from polyaxon_schemas.utils import humanize_timedelta, humanize_timesince, local_now, to_percentage
+from polyaxon_schemas.utils import (
+    SOBOL_MAX_DIMENSIONS,
+    get_rand_generator,
+    humanize_timedelta,
+    humanize_timesince,
+    latin_hypercube,
+    local_now,
+    norm_ppf,
+    sobol,
+    to_percentage
+)
 
 
 class HumanizeTimesinceTest(TestCase):
@@ -86,3 +98,63 @@ class ToPercentageTest(TestCase):
     def test_raises_value_error_for_invalid_types(self):
         with self.assertRaises(ValueError):
             to_percentage('foo')
+
+
+class GetRandGeneratorTest(TestCase):
+    """A test case for the `get_rand_generator`."""
+    def test_streams_are_reproducible_and_independent(self):
+        values = get_rand_generator(42, 1, 3).uniform(size=5)
+        assert np.array_equal(get_rand_generator(42, 1, 3).uniform(size=5), values)
+        assert not np.array_equal(get_rand_generator(42, 1, 4).uniform(size=5), values)
+        assert not np.array_equal(get_rand_generator(43, 1, 3).uniform(size=5), values)
+        assert not np.array_equal(get_rand_generator(42, 1).uniform(size=5), values)
+
+    def test_works_for_large_and_negative_seeds(self):
+        value = get_rand_generator(-1, 2 ** 40).uniform()
+        assert get_rand_generator(-1, 2 ** 40).uniform() == value
+
+
+class NormPpfTest(TestCase):
+    """A test case for the `norm_ppf`."""
+    def test_is_the_inverse_of_the_normal_cdf(self):
+        quantiles = np.array([1e-12, 1e-6, 0.001, 0.02, 0.1, 0.3, 0.5, 0.7, 0.975, 0.999999])
+        values = norm_ppf(quantiles)
+        cdf = [0.5 * math.erfc(-v / math.sqrt(2)) for v in values]
+        assert np.allclose(cdf, quantiles, rtol=1e-6, atol=0)
+        assert norm_ppf(0.5) == 0
+        assert np.isclose(norm_ppf(0.975), 1.959963985)
+
+
+class LowDiscrepancyTest(TestCase):
+    """A test case for `sobol` and `latin_hypercube`."""
+    def test_sobol_is_stratified(self):
+        points = sobol(1024, SOBOL_MAX_DIMENSIONS)
+        assert points.shape == (1024, SOBOL_MAX_DIMENSIONS)
+        assert ((0 < points) & (points < 1)).all()
+        for dimension in range(SOBOL_MAX_DIMENSIONS):
+            # Each dimension has a point in each of the 1024 equal intervals
+            strata = np.floor(points[:, dimension] * 1024)
+            assert len(set(strata)) == 1024
+
+        # The first two dimensions are a (0, m, 2)-net
+        strata = np.floor(points[:, 0] * 32) * 32 + np.floor(points[:, 1] * 32)
+        assert len(set(strata)) == 1024
+
+    def test_sobol_start_and_shift(self):
+        points = sobol(64, 3)
+        assert np.array_equal(sobol(32, 3, start=32), points[32:])
+
+        shift = np.random.RandomState(1).randint(0, 2 ** 32, size=3, dtype=np.uint64)
+        shifted_points = sobol(64, 3, shift=shift)
+        assert not np.array_equal(shifted_points, points)
+        for dimension in range(3):
+            assert len(set(np.floor(shifted_points[:, dimension] * 64))) == 64
+
+        with self.assertRaises(ValueError):
+            sobol(10, SOBOL_MAX_DIMENSIONS + 1)
+
+    def test_latin_hypercube_is_stratified(self):
+        points = latin_hypercube(100, 5, rand_generator=np.random.RandomState(1))
+        assert points.shape == (100, 5)
+        for dimension in range(5):
+            assert len(set(np.floor(points[:, dimension] * 100))) == 100
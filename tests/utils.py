@@ -2,9 +2,31 @@
 from __future__ import absolute_import, division, print_function
 
 import six
+import uuid
 
 from collections import Mapping
 
+from polyaxon_schemas.utils import local_now
+
+
+def get_job_dict(index=0):
+    """Returns the data of an experiment job, e.g. of the `index`-th master."""
+    return {
+        'uuid': uuid.uuid4().hex,
+        'experiment': uuid.uuid4().hex,
+        'experiment_name': 'user.proj.1',
+        'unique_name': 'user.proj.1.master.{}'.format(index),
+        'role': 'master',
+        'definition': {'id': index},
+        'last_status': 'Running',
+        'is_running': True,
+        'is_done': False,
+        'resources': {'cpu': {'requests': 1, 'limits': 2.5}, 'gpu': None},
+        'created_at': local_now().isoformat(),
+        'updated_at': local_now().isoformat(),
+        'started_at': None,
+    }
+
 
 def assert_equal_dict(dict1, dict2):
     for k, v in six.iteritems(dict1):